@@ -7,15 +7,137 @@ Rileva i valori mancanti e richiede l'input all'utente
 
 import pandas as pd
 import numpy as np
+import hashlib
+import json
+import os
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
+# Journal delle risoluzioni NaN (valori inseriti/riempiti), riapplicato al ricaricamento
+NAN_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.produced_calculator', 'nan_journal.json')
+
+# Gestione dei NaN rimasti dopo il journal (senza terminale interattivo non si può chiedere):
+#   ask   → chiede all'utente (menu interattivo)
+#   zero  → tutti i NaN a 0
+#   ffill → propaga l'ultimo valore valido (0 per i NaN iniziali)
+#   fail  → errore con l'elenco dei valori mancanti
+#   keep  → lascia i NaN (i calcoli potrebbero fallire)
+# Solo le scelte fatte in modalità 'ask' vengono salvate nel journal.
+NAN_POLICIES = ('ask', 'zero', 'ffill', 'fail', 'keep')
+
+
+def hash_input_files(*paths):
+    """Hash SHA-1 del contenuto dei file (chiave del journal NaN)"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class NaNJournal:
+    """
+    Journal persistente delle risoluzioni NaN, su file JSON:
+        {hash_file: {data: {colonna: valore}}}
+    La chiave è l'hash del CSV Stock da cui provengono i NaN, quindi le
+    risoluzioni valgono solo per quell'esatto export.
+    """
+
+    def __init__(self, path=NAN_JOURNAL_PATH):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                print(f"{Fore.YELLOW}⚠️  Journal NaN illeggibile, ignorato: {path}{Style.RESET_ALL}")
+                self.data = {}
+
+    def entries(self, key):
+        """Risoluzioni registrate per un file: {data: {colonna: valore}}"""
+        return self.data.get(key, {})
+
+    def record(self, key, date, column, value):
+        """Registra (o sovrascrive) la risoluzione di una cella"""
+        self.data.setdefault(key, {}).setdefault(str(date), {})[column] = float(value)
+
+    def save(self):
+        """Scrive il journal su disco (file temporaneo + rename)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+
 class NaNHandler:
-    def __init__(self, df):
-        """Inizializza il gestore NaN con un DataFrame"""
+    def __init__(self, df, journal_key=None, journal=None):
+        """
+        Inizializza il gestore NaN con un DataFrame
+
+        Args:
+            df: DataFrame unito (modificato sul posto)
+            journal_key: hash del CSV sorgente (hash_input_files); None = journal disattivato
+            journal: NaNJournal da usare (default: journal su NAN_JOURNAL_PATH)
+        """
         self.df = df
         self.missing_values = {}
+        self.journal_key = journal_key
+        self.journal = None
+        if journal_key is not None:
+            self.journal = journal if journal is not None else NaNJournal()
+
+    def apply_journal(self):
+        """
+        Riapplica le risoluzioni salvate per questo file con un'unica
+        assegnazione vettoriale sulle righe/colonne coinvolte.
+        Riempie solo le celle ancora NaN. Ritorna il numero di celle riempite.
+        """
+        if self.journal is None or 'Time' not in self.df.columns:
+            return 0
+
+        entries = self.journal.entries(self.journal_key)
+        if not entries:
+            return 0
+
+        # Tabella correzioni: una riga per data, una colonna per colonna corretta
+        corrections = pd.DataFrame.from_dict(entries, orient='index')
+        corrections = corrections[[c for c in corrections.columns if c in self.df.columns]]
+
+        row_dates = self.df['Time'].astype(str)
+        rows = row_dates.isin(corrections.index).to_numpy()
+        if not rows.any() or corrections.empty:
+            return 0
+
+        target = self.df.loc[rows, corrections.columns]
+        aligned = corrections.reindex(row_dates[rows]).set_axis(target.index)
+        applied = int((target.isna() & aligned.notna()).to_numpy().sum())
+
+        if applied:
+            self.df.loc[rows, corrections.columns] = target.fillna(aligned)
+        return applied
+
+    def _record_resolutions(self, missing_report):
+        """Salva nel journal il valore finale delle celle che erano NaN"""
+        if self.journal is None:
+            return
+
+        recorded = 0
+        for item in missing_report:
+            value = self.df.at[item['row_idx'], item['column']]
+            if pd.notna(value):
+                try:
+                    self.journal.record(self.journal_key, item['date'], item['column'], value)
+                    recorded += 1
+                except (TypeError, ValueError):
+                    continue
+
+        if recorded:
+            self.journal.save()
+            print(f"{Fore.GREEN}✓ {recorded} risoluzioni salvate nel journal NaN{Style.RESET_ALL}")
 
     def detect_missing_values(self):
         """Rileva tutti i valori NaN nel DataFrame e ritorna un report dettagliato"""
@@ -93,12 +215,15 @@ class NaNHandler:
 
         choice = input(f"{Fore.CYAN}Scegli un'opzione (1-4): {Style.RESET_ALL}").strip()
 
-        if choice == '1':
-            return self._fill_manually(missing_report)
-        elif choice == '2':
-            return self._fill_with_default()
-        elif choice == '3':
-            return self._fill_forward()
+        if choice in ('1', '2', '3'):
+            if choice == '1':
+                self._fill_manually(missing_report)
+            elif choice == '2':
+                self._fill_with_default()
+            else:
+                self._fill_forward()
+            self._record_resolutions(missing_report)
+            return self.df
         elif choice == '4':
             print(f"\n{Fore.RED}⚠️  ATTENZIONE: Procedere senza riempire i NaN potrebbe causare errori nei calcoli!{Style.RESET_ALL}\n")
             return self.df
@@ -111,8 +236,6 @@ class NaNHandler:
         print(f"\n{Fore.CYAN}Inserimento manuale dei valori...{Style.RESET_ALL}\n")
         print(f"{Fore.YELLOW}Suggerimento: premi ENTER per saltare (il valore rimarrà NaN){Style.RESET_ALL}\n")
 
-        df_copy = self.df.copy()
-
         for i, item in enumerate(missing_report):
             if i >= 20:  # Limita a 20 richieste per evitare che diventi troppo lungo
                 print(f"\n{Fore.YELLOW}Troppi valori mancanti ({len(missing_report)}). ")
@@ -130,14 +253,14 @@ class NaNHandler:
                 try:
                     # Tenta di convertire a float
                     value_float = float(value)
-                    df_copy.at[row_idx, col] = value_float
+                    self.df.at[row_idx, col] = value_float
                     print(f"  {Fore.GREEN}✓ Valore {value_float} inserito{Style.RESET_ALL}\n")
                 except ValueError:
                     print(f"  {Fore.RED}✗ Valore non valido, saltato{Style.RESET_ALL}\n")
             else:
                 print(f"  {Fore.YELLOW}⊘ Saltato{Style.RESET_ALL}\n")
 
-        return df_copy
+        return self.df
 
     def _fill_with_default(self):
         """Riempie tutti i NaN con un valore predefinito"""
@@ -153,38 +276,71 @@ class NaNHandler:
                 print(f"{Fore.RED}Valore non valido, uso 0{Style.RESET_ALL}")
                 value = 0
 
-        df_copy = self.df.fillna(value)
+        self._fill_inplace(value)
         print(f"\n{Fore.GREEN}✓ Tutti i NaN sono stati sostituiti con {value}{Style.RESET_ALL}\n")
-        return df_copy
+        return self.df
 
     def _fill_forward(self):
         """Riempie i NaN con forward-fill (propaga ultimo valore valido)"""
-        df_copy = self.df.copy()
-
-        # Forward fill per tutte le colonne numeriche
-        for col in df_copy.columns:
-            if col != 'Time':
-                df_copy[col] = df_copy[col].ffill()
-                # Riempie eventuali NaN rimanenti (inizio dataset) con 0
-                df_copy[col] = df_copy[col].fillna(0)
+        # Forward fill su tutte le colonne (tranne Time), poi 0 per i NaN iniziali
+        self._fill_inplace(0, forward=True)
 
         print(f"\n{Fore.GREEN}✓ Forward-fill applicato a tutte le colonne{Style.RESET_ALL}")
         print(f"{Fore.YELLOW}  (I NaN rimanenti all'inizio sono stati sostituiti con 0){Style.RESET_ALL}\n")
-        return df_copy
+        return self.df
+
+    def _fill_inplace(self, value, forward=False):
+        """
+        Riempie i NaN direttamente in self.df, un blocco di colonne alla volta.
+
+        La colonna Time viene staccata e rimessa al suo posto, così ffill/fillna
+        lavorano sui blocchi numerici interi senza copiare il DataFrame né
+        ciclare sulle colonne.
+        """
+        time_pos = self.df.columns.get_loc('Time') if 'Time' in self.df.columns else None
+        time_col = self.df.pop('Time') if time_pos is not None else None
+
+        if forward:
+            self.df.ffill(inplace=True)
+        self.df.fillna(value, inplace=True)
+
+        if time_col is not None:
+            self.df.insert(time_pos, 'Time', time_col)
+
+    def process(self, policy='ask'):
+        """Processo completo: riapplica il journal, rileva, mostra report e risolve secondo policy"""
+        if policy not in NAN_POLICIES:
+            raise ValueError(f"Gestione NaN non valida: {policy} (ammesse: {', '.join(NAN_POLICIES)})")
+
+        applied = self.apply_journal()
+        if applied:
+            print(f"\n{Fore.GREEN}✓ {applied} valori NaN ripristinati dal journal{Style.RESET_ALL}")
 
-    def process(self):
-        """Processo completo: rileva, mostra report e richiede valori"""
         missing_report = self.detect_missing_values()
         has_missing = self.print_missing_report(missing_report)
 
         if not has_missing:
             return self.df
 
-        # Chiedi all'utente come gestire i valori mancanti
-        return self.request_missing_values_interactive(missing_report)
+        if policy == 'zero':
+            self._fill_inplace(0)
+            print(f"{Fore.YELLOW}⚠️  {len(missing_report)} valori NaN sostituiti con 0{Style.RESET_ALL}\n")
+        elif policy == 'ffill':
+            self._fill_inplace(0, forward=True)
+            print(f"{Fore.YELLOW}⚠️  {len(missing_report)} valori NaN riempiti con forward-fill{Style.RESET_ALL}\n")
+        elif policy == 'fail':
+            first = missing_report[0]
+            raise ValueError(f"{len(missing_report)} valori mancanti (primo: {first['date']} / {first['column']}): "
+                             f"risolvili dalla GUI o scegli una gestione NaN (zero, ffill)")
+        elif policy == 'keep':
+            print(f"{Fore.RED}⚠️  NaN lasciati invariati: i calcoli potrebbero fallire!{Style.RESET_ALL}\n")
+        else:
+            # Chiedi all'utente come gestire i valori mancanti
+            return self.request_missing_values_interactive(missing_report)
+        return self.df
 
 
-def handle_missing_values(df):
-    """Funzione di utilità per gestire i valori mancanti in un DataFrame"""
-    handler = NaNHandler(df)
-    return handler.process()
+def handle_missing_values(df, journal_key=None, policy='ask'):
+    """Funzione di utilità per gestire i valori mancanti in un DataFrame (policy: vedi NAN_POLICIES)"""
+    handler = NaNHandler(df, journal_key=journal_key)
+    return handler.process(policy=policy)
@@ -6,10 +6,14 @@ Esporta tutti i risultati senza GUI
 """
 
 import pandas as pd
+import numpy as np
+import argparse
+import pickle
 import sys
 import os
+from datetime import datetime
 from pathlib import Path
-from nan_handler import handle_missing_values
+from nan_handler import handle_missing_values, hash_input_files, NAN_POLICIES
 
 # Rilevamento sistema operativo e percorsi
 IS_WINDOWS = sys.platform.startswith('win')
@@ -28,34 +32,44 @@ else:
     CSV_CISTERNE_PATH = '/mnt/user-data/uploads/cisterne_hourly.csv'
     OUTPUT_DIR = '/mnt/user-data/outputs'
 
-# Se i CSV non esistono, prova a trovarli nella cartella corrente
-if not os.path.exists(CSV_STOCK_PATH):
-    print(f"⚠️ CSV Stock non trovato in: {CSV_STOCK_PATH}")
-    for file in os.listdir('.'):
-        if 'stock' in file.lower() and file.endswith('.csv'):
-            CSV_STOCK_PATH = os.path.join('.', file)
-            print(f"   Trovato: {CSV_STOCK_PATH}")
-            break
-        elif file == 'produced.csv':
-            CSV_STOCK_PATH = os.path.join('.', file)
-            print(f"   Trovato: {CSV_STOCK_PATH}")
-            break
-
-if not os.path.exists(CSV_PACKED_PATH):
-    print(f"⚠️ CSV Packed non trovato in: {CSV_PACKED_PATH}")
-    for file in os.listdir('.'):
-        if 'packed' in file.lower() and file.endswith('.csv'):
-            CSV_PACKED_PATH = os.path.join('.', file)
-            print(f"   Trovato: {CSV_PACKED_PATH}")
-            break
-
-if not os.path.exists(CSV_CISTERNE_PATH):
-    print(f"⚠️ CSV Cisterne non trovato in: {CSV_CISTERNE_PATH}")
-    for file in os.listdir('.'):
-        if 'cisterne' in file.lower() and file.endswith('.csv'):
-            CSV_CISTERNE_PATH = os.path.join('.', file)
-            print(f"   Trovato: {CSV_CISTERNE_PATH}")
-            break
+def find_csv_paths():
+    """
+    Percorsi dei 3 CSV: quelli predefiniti oppure, se non esistono, i primi trovati nella
+    cartella corrente. Solo da riga di comando: all'import (GUI, report PDF e i suoi processi)
+    nessuna scansione né avviso.
+    """
+    stock_path, packed_path, cisterne_path = CSV_STOCK_PATH, CSV_PACKED_PATH, CSV_CISTERNE_PATH
+
+    # Se i CSV non esistono, prova a trovarli nella cartella corrente
+    if not os.path.exists(stock_path):
+        print(f"⚠️ CSV Stock non trovato in: {stock_path}")
+        for file in os.listdir('.'):
+            if 'stock' in file.lower() and file.endswith('.csv'):
+                stock_path = os.path.join('.', file)
+                print(f"   Trovato: {stock_path}")
+                break
+            elif file == 'produced.csv':
+                stock_path = os.path.join('.', file)
+                print(f"   Trovato: {stock_path}")
+                break
+
+    if not os.path.exists(packed_path):
+        print(f"⚠️ CSV Packed non trovato in: {packed_path}")
+        for file in os.listdir('.'):
+            if 'packed' in file.lower() and file.endswith('.csv'):
+                packed_path = os.path.join('.', file)
+                print(f"   Trovato: {packed_path}")
+                break
+
+    if not os.path.exists(cisterne_path):
+        print(f"⚠️ CSV Cisterne non trovato in: {cisterne_path}")
+        for file in os.listdir('.'):
+            if 'cisterne' in file.lower() and file.endswith('.csv'):
+                cisterne_path = os.path.join('.', file)
+                print(f"   Trovato: {cisterne_path}")
+                break
+
+    return stock_path, packed_path, cisterne_path
 
 # Mapping dei gradi volumetrici standard
 MATERIAL_MAPPING = {
@@ -68,6 +82,22 @@ FST_TANKS = [111, 112, 121, 122, 131, 132, 141, 142, 151, 152, 161, 171, 172,
              211, 212, 221, 222, 231, 232, 241, 242, 243]
 RBT_TANKS = [251, 252]
 
+# Riempimento ore mancanti nei CSV orari (vedi fill_hourly_gaps)
+#   strategy: 'zero'   → ora mancante = 0
+#             'linear' → interpolazione lineare tra le ore vicine
+#             'ffill'  → mantiene l'ultimo valore letto (hold-last)
+#             'none'   → nessun riempimento, l'ora resta NaN
+#   max_gap:  lunghezza massima (ore consecutive) di un buco da riempire,
+#             None = nessun limite. I buchi più lunghi restano NaN.
+PACKED_GAP_FILL = {'strategy': 'zero', 'max_gap': None}
+CISTERNE_GAP_FILL = {'strategy': 'ffill', 'max_gap': 3}
+
+# Artefatto dei risultati scritto accanto a produced_results_batch.csv: DataFrame unito
+# (NaN già risolti), copertura oraria e risultati giornalieri, così il report PDF
+# (produced_pdf_report.py --results) non ricarica né ricalcola nulla
+RESULTS_ARTIFACT_NAME = 'produced_results_batch.pkl'
+RESULTS_ARTIFACT_FORMAT = 1
+
 def plato_to_volumetric(plato):
     if plato == 0:
         return 0
@@ -102,8 +132,258 @@ def calc_hl_std(volume_hl, plato, material):
     hl_std = (volume_hl * grado_vol) / grado_std
     return hl_std
 
+def calc_hl_std_array(volume_hl, plato, material):
+    """
+    Versione vettoriale di calc_hl_std su intere colonne (stesse regole, stessi risultati).
+    material può essere uno scalare (es. 8 per i truck) o un array della stessa lunghezza.
+    """
+    try:
+        volume_hl = np.asarray(volume_hl, dtype=float)
+        plato = np.asarray(plato, dtype=float)
+        material = np.broadcast_to(np.asarray(material, dtype=float), volume_hl.shape)
+    except (ValueError, TypeError):
+        raise ValueError("Valori non validi nelle colonne Level/Plato/Material")
+    if np.isnan(material).any():
+        raise ValueError(f"Valori non validi: material={material[np.isnan(material)][0]}")
+    material = material.astype(int)
+
+    grado_vol = ((0.0000188792 * plato + 0.003646886) * plato + 1.001077) * plato - 0.01223565
+    grado_vol[plato == 0] = 0
+    attivo = (volume_hl != 0) & (plato != 0) & (grado_vol != 0)
+
+    # Material sconosciuto: errore solo dove il valore serve davvero (come calc_hl_std)
+    sconosciuti = attivo & ~np.isin(material, list(MATERIAL_MAPPING))
+    if sconosciuti.any():
+        raise ValueError(f"Material {material[sconosciuti][0]} non trovato nel mapping")
+
+    grado_std = np.zeros(len(material))
+    for mat, grado in MATERIAL_MAPPING.items():
+        grado_std[material == mat] = grado
+    attivo &= grado_std != 0
+
+    hl_std = np.zeros(len(volume_hl))
+    hl_std[attivo] = (volume_hl[attivo] * grado_vol[attivo]) / grado_std[attivo]
+    return hl_std
+
+def save_results_artifact(path, df, coverage, results, inputs, date_from=None, date_to=None):
+    """
+    Salva l'artefatto dei risultati (pickle, file temporaneo + rename).
+    results: colonne Data, Produced, Packed, Cisterne, Stock_Iniziale, Stock_Finale, Delta_Stock
+    """
+    artifact = {
+        'format': RESULTS_ARTIFACT_FORMAT,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'inputs': inputs,
+        'date_from': date_from,
+        'date_to': date_to,
+        'df': df,
+        'coverage': coverage,
+        'results': results,
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_results_artifact(path):
+    """Legge un artefatto dei risultati (ValueError se non valido o di un'altra versione)"""
+    try:
+        with open(path, 'rb') as f:
+            artifact = pickle.load(f)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        raise ValueError(f"Artefatto risultati illeggibile: {path} ({e})")
+    if not isinstance(artifact, dict) or artifact.get('format') != RESULTS_ARTIFACT_FORMAT:
+        raise ValueError(f"Artefatto risultati non valido o di un'altra versione: {path} "
+                         f"(rigeneralo con produced_batch.py)")
+    return artifact
+
+def fill_hourly_gaps(df_hourly, time_col, value_cols, how='sum', strategy='zero', max_gap=None):
+    """
+    Riporta un CSV orario su una griglia oraria completa (00:00-23:00 di ogni giorno)
+    e riempie le ore mancanti con la strategia scelta.
+
+    Le righe con la stessa ora vengono prima collassate con `how` ('sum' per
+    Packed, 'mean' per Cisterne). Con 'mean' la griglia porta anche somma e
+    numero di letture di ogni ora ('_somma <col>', '_n <col>'; un'ora
+    sintetizzata vale una lettura): aggregate_hourly_grid divide a livello di
+    giorno, così la media giornaliera resta quella di tutte le righe del CSV
+    anche con più righe nella stessa ora, e sui giorni completi il totale non
+    cambia. Funziona su qualsiasi porzione di giorni interi del CSV, quindi
+    anche su blocchi letti a pezzi.
+
+    Returns:
+        DataFrame orario con time_col, value_cols, 'Rows' (righe del CSV
+        cadute in quell'ora, 0 se mancante) e la colonna booleana
+        'Synthesized' (True per le ore create dal riempimento)
+    """
+    if strategy not in ('zero', 'linear', 'ffill', 'none'):
+        raise ValueError(f"Strategia riempimento non valida: {strategy}")
+
+    hours = pd.to_datetime(df_hourly[time_col]).dt.floor('h')
+    grouped = df_hourly[value_cols].groupby(hours.values)
+    hourly = grouped.agg(how)
+    rows = grouped.size()
+    if how == 'mean':
+        sums = grouped.sum(min_count=1)
+        counts = grouped.count()
+
+    if len(hourly) == 0:
+        hourly.index.name = time_col
+        result = hourly.reset_index()
+        result['Rows'] = 0
+        result['Synthesized'] = False
+        return result
+
+    grid = pd.date_range(hourly.index.min().normalize(),
+                         hourly.index.max().normalize() + pd.Timedelta(hours=23),
+                         freq='h')
+    hourly = hourly.reindex(grid)
+    rows = rows.reindex(grid, fill_value=0)
+
+    # Ore assenti dal CSV (non quelle presenti con soli NaN) e lunghezza del buco a cui appartengono
+    missing = rows == 0
+    fillable = missing
+    if max_gap is not None:
+        run_id = (~missing).cumsum()
+        run_len = missing.groupby(run_id).transform('sum')
+        fillable = missing & (run_len <= max_gap)
+
+    if strategy == 'zero':
+        hourly.loc[fillable] = 0
+    elif strategy == 'linear':
+        hourly.loc[fillable] = hourly.interpolate(method='linear', limit_area='inside').loc[fillable]
+    elif strategy == 'ffill':
+        hourly.loc[fillable] = hourly.ffill().loc[fillable]
+
+    if how == 'mean':
+        sums = sums.reindex(grid)
+        counts = counts.reindex(grid, fill_value=0)
+        sums.loc[missing] = hourly.loc[missing, value_cols]
+        counts.loc[missing] = hourly.loc[missing, value_cols].notna().astype(int)
+        for col in value_cols:
+            hourly[f'_somma {col}'] = sums[col]
+            hourly[f'_n {col}'] = counts[col]
+
+    hourly['Rows'] = rows
+    hourly['Synthesized'] = missing & hourly[value_cols].notna().any(axis=1)
+    hourly.index.name = time_col
+    return hourly.reset_index()
+
+# Colonne della tabella di copertura per fonte (vedi aggregate_hourly_grid)
+COVERAGE_COLUMNS = ['Ore Presenti', 'Prima Ora', 'Ultima Ora', 'Duplicati', 'Ore Sintetiche']
+
+def aggregate_hourly_grid(df_hourly, time_col, value_cols, how):
+    """
+    Aggrega per giorno la griglia oraria di fill_hourly_gaps (colonna 'Date' già
+    presente) e, nello stesso groupby, calcola la copertura della fonte:
+    ore realmente presenti nel CSV, prima/ultima ora letta, righe duplicate
+    e ore sintetizzate dal riempimento.
+
+    Returns:
+        (daily, coverage): DataFrame con 'Date' + value_cols e 'Date' + COVERAGE_COLUMNS
+    """
+    present = df_hourly['Rows'] > 0
+    grid = df_hourly.assign(_present=present,
+                            _seen=df_hourly[time_col].where(present),
+                            _dup=(df_hourly['Rows'] - 1).clip(lower=0))
+
+    # Media pesata sulle letture (vedi fill_hourly_gaps), non media delle medie orarie
+    weighted = how == 'mean' and all(f'_n {col}' in df_hourly.columns for col in value_cols)
+    if weighted:
+        spec = {}
+        for col in value_cols:
+            spec[f'_somma {col}'] = (f'_somma {col}', 'sum')
+            spec[f'_n {col}'] = (f'_n {col}', 'sum')
+    else:
+        spec = {col: (col, how) for col in value_cols}
+    spec.update({
+        'Ore Presenti': ('_present', 'sum'),
+        'Prima Ora': ('_seen', 'min'),
+        'Ultima Ora': ('_seen', 'max'),
+        'Duplicati': ('_dup', 'sum'),
+        'Ore Sintetiche': ('Synthesized', 'sum'),
+    })
+    out = grid.groupby('Date').agg(**spec).reset_index()
+    if weighted:
+        for col in value_cols:
+            out[col] = out[f'_somma {col}'] / out[f'_n {col}'].where(out[f'_n {col}'] > 0)
+
+    return out[['Date'] + list(value_cols)], out[['Date'] + COVERAGE_COLUMNS]
+
+def build_coverage_index(dates, packed_coverage, cisterne_coverage):
+    """
+    Tabella di copertura per giorno, allineata alle righe Stock (stesso ordine).
+    Le date assenti da una fonte risultano con 0 ore presenti.
+    'Incompleto' = meno di 24 ore presenti in Packed o in Cisterne.
+    """
+    coverage = pd.DataFrame({'Date': list(dates)})
+    for source, cov in (('Packed', packed_coverage), ('Cisterne', cisterne_coverage)):
+        cov = cov.set_index('Date').add_prefix(f'{source} ')
+        coverage = coverage.join(cov, on='Date')
+        for col in ('Ore Presenti', 'Duplicati', 'Ore Sintetiche'):
+            coverage[f'{source} {col}'] = coverage[f'{source} {col}'].fillna(0).astype(int)
+
+    coverage['Incompleto'] = ((coverage['Packed Ore Presenti'] < 24) |
+                              (coverage['Cisterne Ore Presenti'] < 24))
+    return coverage
+
+def describe_incomplete_days(coverage, max_days=10):
+    """Righe di testo con i giorni incompleti (usate da GUI, PDF e batch)"""
+    if coverage is None:
+        return []
+    incomplete = coverage[coverage['Incompleto']]
+    shown = incomplete.head(max_days)
+    lines = []
+    for date, packed_hours, cisterne_hours in zip(shown['Date'], shown['Packed Ore Presenti'],
+                                                  shown['Cisterne Ore Presenti']):
+        date_str = pd.Timestamp(date).strftime('%d-%m-%Y')
+        lines.append(f"{date_str}: Packed {packed_hours}/24 h, Cisterne {cisterne_hours}/24 h")
+    if len(incomplete) > max_days:
+        lines.append(f"... e altri {len(incomplete) - max_days} giorni")
+    return lines
+
+def parse_date(value):
+    """Data da riga di comando o GUI (gg/mm/aaaa oppure aaaa-mm-gg) → Timestamp a mezzanotte, None se vuota"""
+    if value is None or str(value).strip() == '':
+        return None
+    text = str(value).strip()
+    try:
+        ts = pd.to_datetime(text, format='%d/%m/%Y' if '/' in text else '%Y-%m-%d')
+    except (ValueError, TypeError):
+        raise ValueError(f"Data non valida: '{text}' (formato gg/mm/aaaa oppure aaaa-mm-gg)")
+    return ts.normalize()
+
+def build_date_index(times):
+    """Indice datetime64 delle righe giornaliere, verificato in ordine crescente (per la ricerca binaria)"""
+    index = pd.to_datetime(pd.Series(times)).to_numpy(dtype='datetime64[ns]')
+    if len(index) > 1 and (index[1:] < index[:-1]).any():
+        raise ValueError("Le date del CSV Stock non sono in ordine crescente: impossibile filtrare per periodo")
+    return index
+
+def date_range_positions(date_index, date_from=None, date_to=None):
+    """
+    Posizioni [start, stop) delle righe nel periodo date_from..date_to (estremi inclusi, None = aperto).
+    Ricerca binaria sull'indice ordinato: nessuna scansione né copia dei dati.
+    """
+    start = 0
+    stop = len(date_index)
+    if date_from is not None:
+        start = int(date_index.searchsorted(pd.Timestamp(date_from).normalize().to_datetime64(), side='left'))
+    if date_to is not None:
+        end = pd.Timestamp(date_to).normalize() + pd.Timedelta(days=1)
+        stop = int(date_index.searchsorted(end.to_datetime64(), side='left'))
+    return start, max(start, stop)
+
+def describe_date_range(date_from, date_to):
+    """Etichetta del periodo per console e report"""
+    if date_from is None and date_to is None:
+        return "tutto il periodo"
+    start = date_from.strftime('%d/%m/%Y') if date_from is not None else "inizio"
+    end = date_to.strftime('%d/%m/%Y') if date_to is not None else "fine"
+    return f"{start} - {end}"
+
 def aggregate_packed_hourly(df_packed):
-    """Aggrega i dati Packed orari in dati giornalieri"""
+    """Aggrega i dati Packed orari in dati giornalieri (+ griglia oraria completa e copertura per giorno)"""
     # Trova la colonna temporale
     time_col = None
     possible_time_cols = ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']
@@ -127,9 +407,6 @@ def aggregate_packed_hourly(df_packed):
             f"Errore: {str(e)}"
         )
 
-    # Estrai solo la data (senza ora)
-    df_packed['Date'] = df_packed[time_col].dt.date
-
     # Trova colonne Packed
     packed_cols_map = {}
     for orig_name, target_name in [
@@ -152,17 +429,24 @@ def aggregate_packed_hourly(df_packed):
             f"Trovate: {', '.join(df_packed.columns)}"
         )
 
-    # Aggrega per giorno (somma di tutte le ore)
-    agg_dict = {col: 'sum' for col in packed_cols_map.keys()}
-    packed_daily = df_packed.groupby('Date').agg(agg_dict).reset_index()
+    # Griglia oraria completa: ore mancanti riempite e marcate 'Synthesized'
+    df_packed = fill_hourly_gaps(df_packed, time_col, list(packed_cols_map.keys()),
+                                 how='sum', **PACKED_GAP_FILL)
+
+    # Estrai solo la data (senza ora)
+    df_packed['Date'] = df_packed[time_col].dt.date
+
+    # Aggrega per giorno (somma di tutte le ore) + copertura nello stesso groupby
+    packed_daily, packed_coverage = aggregate_hourly_grid(df_packed, time_col,
+                                                          list(packed_cols_map.keys()), 'sum')
 
     # Rinomina colonne per compatibilità
     packed_daily = packed_daily.rename(columns=packed_cols_map)
 
-    return packed_daily
+    return packed_daily, df_packed, packed_coverage
 
 def aggregate_cisterne_hourly(df_cisterne):
-    """Aggrega i dati Cisterne orari in dati giornalieri (MEDIA, non somma)"""
+    """Aggrega i dati Cisterne orari in dati giornalieri (MEDIA) + griglia oraria completa e copertura"""
     # Trova la colonna temporale
     time_col = None
     possible_time_cols = ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']
@@ -186,9 +470,6 @@ def aggregate_cisterne_hourly(df_cisterne):
             f"Errore: {str(e)}"
         )
 
-    # Estrai solo la data (senza ora)
-    df_cisterne['Date'] = df_cisterne[time_col].dt.date
-
     # Trova colonne Cisterne con vari formati possibili
     cisterne_cols_map = {}
     for orig_name, target_name in [
@@ -217,14 +498,21 @@ def aggregate_cisterne_hourly(df_cisterne):
             f"Trovate: {', '.join(df_cisterne.columns)}"
         )
 
-    # Aggrega per giorno (MEDIA di tutte le ore, non somma!)
-    agg_dict = {col: 'mean' for col in cisterne_cols_map.keys()}
-    cisterne_daily = df_cisterne.groupby('Date').agg(agg_dict).reset_index()
+    # Griglia oraria completa: ore mancanti riempite e marcate 'Synthesized'
+    df_cisterne = fill_hourly_gaps(df_cisterne, time_col, list(cisterne_cols_map.keys()),
+                                   how='mean', **CISTERNE_GAP_FILL)
+
+    # Estrai solo la data (senza ora)
+    df_cisterne['Date'] = df_cisterne[time_col].dt.date
+
+    # Aggrega per giorno (MEDIA di tutte le ore, non somma!) + copertura nello stesso groupby
+    cisterne_daily, cisterne_coverage = aggregate_hourly_grid(df_cisterne, time_col,
+                                                              list(cisterne_cols_map.keys()), 'mean')
 
     # Rinomina colonne per compatibilità
     cisterne_daily = cisterne_daily.rename(columns=cisterne_cols_map)
 
-    return cisterne_daily
+    return cisterne_daily, df_cisterne, cisterne_coverage
 
 def merge_stock_packed_cisterne(df_stock, df_packed, df_cisterne):
     """Unisce i 3 DataFrame (Stock, Packed, Cisterne) per data"""
@@ -254,8 +542,15 @@ def merge_stock_packed_cisterne(df_stock, df_packed, df_cisterne):
 
     return df_merged
 
-def process_all_days(csv_stock_path, csv_packed_path, csv_cisterne_path):
-    """Processa tutti i giorni e esporta risultati (Triple CSV Mode)"""
+def process_all_days(csv_stock_path, csv_packed_path, csv_cisterne_path, date_from=None, date_to=None,
+                     nan_policy='ask'):
+    """
+    Processa tutti i giorni e esporta risultati (Triple CSV Mode)
+
+    date_from/date_to limitano i giorni elaborati (estremi inclusi); il giorno precedente
+    a date_from viene letto comunque perché serve allo Stock Iniziale del primo giorno.
+    nan_policy: gestione dei NaN non coperti dal journal (vedi NAN_POLICIES)
+    """
     print("Caricamento CSV Stock (solo tanks BBT/FST/RBT)...")
     df_stock = pd.read_csv(csv_stock_path)
 
@@ -268,26 +563,41 @@ def process_all_days(csv_stock_path, csv_packed_path, csv_cisterne_path):
     print(f"  CSV Cisterne: {len(df_cisterne)} righe orarie")
 
     print("Aggregazione dati Packed orari → giornalieri (SOMMA)...")
-    packed_daily = aggregate_packed_hourly(df_packed)
+    packed_daily, packed_hourly, packed_coverage = aggregate_packed_hourly(df_packed)
     print(f"  Aggregati in {len(packed_daily)} giorni")
+    print(f"  Ore sintetizzate ({PACKED_GAP_FILL['strategy']}): {int(packed_hourly['Synthesized'].sum())}")
 
     print("Aggregazione dati Cisterne orari → giornalieri (MEDIA)...")
-    cisterne_daily = aggregate_cisterne_hourly(df_cisterne)
+    cisterne_daily, cisterne_hourly, cisterne_coverage = aggregate_cisterne_hourly(df_cisterne)
     print(f"  Aggregati in {len(cisterne_daily)} giorni")
+    print(f"  Ore sintetizzate ({CISTERNE_GAP_FILL['strategy']}): {int(cisterne_hourly['Synthesized'].sum())}")
 
     print("Merge dei 3 DataFrame (Stock + Packed + Cisterne)...")
     df = merge_stock_packed_cisterne(df_stock, packed_daily, cisterne_daily)
     print(f"  DataFrame finale: {len(df)} righe\n")
 
-    # Gestione interattiva dei valori NaN
-    df = handle_missing_values(df)
+    # Copertura oraria per giorno (dalle tabelle già aggregate, nessuna nuova scansione)
+    coverage = build_coverage_index(df_stock['Date'], packed_coverage, cisterne_coverage)
+
+    # Periodo richiesto: ricerca binaria sulle date, + il giorno precedente per lo Stock Iniziale
+    start, stop = date_range_positions(build_date_index(df['Time']), date_from, date_to)
+    if start == stop:
+        raise ValueError(f"Nessun giorno nel periodo {describe_date_range(date_from, date_to)}")
+    lo = max(start - 1, 0)
+    first = start - lo  # 1 se il giorno precedente è presente (solo per lo Stock Iniziale)
+    df = df.iloc[lo:stop].reset_index(drop=True)
+    coverage = coverage.iloc[start:stop].reset_index(drop=True)
+
+    # Gestione dei valori NaN (interattiva salvo nan_policy)
+    df = handle_missing_values(df, journal_key=hash_input_files(csv_stock_path), policy=nan_policy)
 
     results = []
 
     print("Elaborazione in corso...")
-    print(f"Totale giorni: {len(df)}\n")
+    print(f"Periodo: {describe_date_range(date_from, date_to)}")
+    print(f"Totale giorni: {len(df) - first}\n")
     
-    for idx in range(len(df)):
+    for idx in range(first, len(df)):
         row = df.iloc[idx]
         
         # PACKED
@@ -427,7 +737,7 @@ def process_all_days(csv_stock_path, csv_packed_path, csv_cisterne_path):
         
         results.append(result_dict)
         
-        print(f"  [{idx+1:2d}] {row['Time']} → Produced: {produced:10.2f} hl")
+        print(f"  [{idx - first + 1:2d}] {row['Time']} → Produced: {produced:10.2f} hl")
     
     # Esporta CSV
     df_results = pd.DataFrame(results)
@@ -443,6 +753,24 @@ def process_all_days(csv_stock_path, csv_packed_path, csv_cisterne_path):
         print(f"  XLSX: {output_xlsx}")
     except:
         print(f"\n✓ CSV esportato: {output_path}")
+
+    # Artefatto per il report PDF (nessun ricalcolo): stesse colonne dei risultati della GUI
+    artifact_path = os.path.join(OUTPUT_DIR, RESULTS_ARTIFACT_NAME)
+    results_report = pd.DataFrame({
+        'Data': pd.to_datetime(df_results['Data']),
+        'Produced': df_results['Produced'],
+        'Packed': df_results['Packed Total'],
+        'Cisterne': df_results['Cisterne Total'],
+        'Stock_Iniziale': df_results['Stock Iniziale'],
+        'Stock_Finale': df_results['Stock Finale'],
+        'Delta_Stock': df_results['Delta Stock'],
+    })
+    save_results_artifact(artifact_path, df, coverage, results_report,
+                          inputs={'stock': os.path.abspath(csv_stock_path),
+                                  'packed': os.path.abspath(csv_packed_path),
+                                  'cisterne': os.path.abspath(csv_cisterne_path)},
+                          date_from=date_from, date_to=date_to)
+    print(f"  Artefatto per il report PDF: {artifact_path}")
     
     # Statistiche
     print(f"\n{'='*60}")
@@ -457,9 +785,24 @@ def process_all_days(csv_stock_path, csv_packed_path, csv_cisterne_path):
     print(f"Cisterne totale:         {df_results['Cisterne Total'].sum():.2f} hl")
     print(f"Stock iniziale (day 1):  {df_results['Stock Iniziale'].iloc[0]:.2f} hl std")
     print(f"Stock finale (day 31):   {df_results['Stock Finale'].iloc[-1]:.2f} hl std")
+    print(f"Giorni incompleti:       {int(coverage['Incompleto'].sum())}")
+    for line in describe_incomplete_days(coverage):
+        print(f"  ⚠️ {line}")
     print(f"{'='*60}\n")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Produced Calculator - elaborazione batch (Triple CSV)")
+    parser.add_argument('--from', dest='date_from', type=parse_date, default=None, metavar='DATA',
+                        help="primo giorno da elaborare (gg/mm/aaaa oppure aaaa-mm-gg)")
+    parser.add_argument('--to', dest='date_to', type=parse_date, default=None, metavar='DATA',
+                        help="ultimo giorno da elaborare, incluso (gg/mm/aaaa oppure aaaa-mm-gg)")
+    parser.add_argument('--nan', dest='nan_policy', choices=NAN_POLICIES,
+                        default='ask' if sys.stdin.isatty() else 'fail',
+                        help="NaN non coperti dal journal: ask (chiede), zero, ffill, fail (errore), keep "
+                             "(default: ask da terminale, fail altrimenti)")
+    args = parser.parse_args()
+    CSV_STOCK_PATH, CSV_PACKED_PATH, CSV_CISTERNE_PATH = find_csv_paths()
+
     print("="*60)
     print("PRODUCED CALCULATOR - Triple CSV Mode")
     print("="*60)
@@ -487,7 +830,8 @@ if __name__ == '__main__':
     print(f"✓ CSV Cisterne: {os.path.basename(CSV_CISTERNE_PATH)}\n")
 
     try:
-        process_all_days(CSV_STOCK_PATH, CSV_PACKED_PATH, CSV_CISTERNE_PATH)
+        process_all_days(CSV_STOCK_PATH, CSV_PACKED_PATH, CSV_CISTERNE_PATH,
+                         date_from=args.date_from, date_to=args.date_to, nan_policy=args.nan_policy)
     except Exception as e:
         print(f"\n❌ Errore: {e}")
         import traceback
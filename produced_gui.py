@@ -5,29 +5,222 @@ PRODUCED CALCULATOR - GUI Application
 Interfaccia grafica completa per il calcolo Produced
 """
 
+import time
+
+# Tempo di avvio: da qui fino alla prima finestra disegnata (vedi report_startup_time)
+_STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
+import tkinter.font as tkfont
+import io
+import multiprocessing
 import os
 import sys
+import pickle
+import queue
+import threading
+from datetime import datetime
 from pathlib import Path
 
-# Matplotlib per grafici
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
-
-# Import moduli esistenti
-from nan_handler import NaNHandler
-from produced_batch import calc_hl_std, plato_to_volumetric, MATERIAL_MAPPING, BBT_TANKS, FST_TANKS, RBT_TANKS
+# Moduli pesanti (pandas, numpy, matplotlib, produced_batch): importati in un thread
+# in background mentre il tab Carica Dati è già usabile → load_heavy_modules()
+_heavy_modules_ready = threading.Event()
+_heavy_modules_lock = threading.Lock()
+_heavy_modules_thread = None
+_heavy_modules_error = None
+_heavy_modules_seconds = None
+
+
+def file_fingerprint(path):
+    """Impronta veloce di un file (dimensione + data modifica): cambia se il file viene riscritto"""
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def read_appended_lines(path, offset):
+    """Byte aggiunti a un file da offset in poi, fino all'ultima riga completa → (byte, nuovo offset)"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    return data[:end], offset + end
+
+
+def load_heavy_modules():
+    """Importa i moduli pesanti e li pubblica come globali del modulo"""
+    global pd, np, matplotlib, mdates, Figure, FigureCanvasTkAgg, NavigationToolbar2Tk
+    global NaNHandler, hash_input_files
+    global calc_hl_std, plato_to_volumetric, fill_hourly_gaps, aggregate_hourly_grid
+    global build_coverage_index, describe_incomplete_days, MATERIAL_MAPPING
+    global parse_date, build_date_index, date_range_positions
+    global BBT_TANKS, FST_TANKS, RBT_TANKS, PACKED_GAP_FILL, CISTERNE_GAP_FILL
+    global _heavy_modules_error, _heavy_modules_seconds
+
+    t0 = time.perf_counter()
+    try:
+        import pandas as pd
+        import numpy as np
+
+        # Matplotlib per grafici
+        import matplotlib
+        # I grafici della GUI usano FigureCanvasTkAgg direttamente; pyplot serve solo al report PDF,
+        # che gira nel worker thread e non deve creare finestre Tk → backend non interattivo
+        matplotlib.use('Agg')
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+        import matplotlib.dates as mdates
+
+        # Import moduli esistenti
+        from nan_handler import NaNHandler, hash_input_files
+        from produced_batch import (calc_hl_std, plato_to_volumetric, fill_hourly_gaps, aggregate_hourly_grid,
+                                    build_coverage_index, describe_incomplete_days, MATERIAL_MAPPING,
+                                    parse_date, build_date_index, date_range_positions,
+                                    BBT_TANKS, FST_TANKS, RBT_TANKS, PACKED_GAP_FILL, CISTERNE_GAP_FILL)
+    except Exception as e:
+        _heavy_modules_error = e
+    finally:
+        _heavy_modules_seconds = time.perf_counter() - t0
+        _heavy_modules_ready.set()
+
+
+def start_heavy_modules_import():
+    """Avvia (una sola volta) l'import in background dei moduli pesanti"""
+    global _heavy_modules_thread
+    with _heavy_modules_lock:
+        if _heavy_modules_thread is None:
+            _heavy_modules_thread = threading.Thread(target=load_heavy_modules,
+                                                     name="import moduli", daemon=True)
+            _heavy_modules_thread.start()
+
+
+def ensure_heavy_modules():
+    """Attende la fine dell'import in background (lo avvia se non ancora partito)"""
+    start_heavy_modules_import()
+    _heavy_modules_ready.wait()
+    if _heavy_modules_error is not None:
+        raise _heavy_modules_error
 
 # Rilevamento sistema operativo
 IS_WINDOWS = sys.platform.startswith('win')
 IS_LINUX = sys.platform.startswith('linux')
 
+# Intervallo di lettura della coda del worker thread (ms)
+TASK_POLL_MS = 50
+
+# Sessione salvata all'uscita e proposta al riavvio (intestazione + dati, due pickle in sequenza)
+SESSION_PATH = os.path.join(os.path.expanduser('~'), '.produced_calculator', 'session.pkl')
+SESSION_FORMAT = 2  # 2: anche il log delle modifiche what-if
+
+# Modalità live: secondi tra due controlli dei CSV, ms tra due letture della coda nel thread Tk
+LIVE_POLL_S = 5
+LIVE_QUEUE_MS = 500
+
+# Dataset calcolati tenuti in memoria per il confronto (il meno usato di recente esce per primo)
+DATASET_CACHE_MAX = 4
+
+# Tabella risultati virtuale: colonna visualizzata → colonna di results_df
+RESULTS_TABLE_COLUMNS = {
+    'Data': 'Data',
+    'Produced': 'Produced',
+    'Packed': 'Packed',
+    'Cisterne': 'Cisterne',
+    'Stock Iniziale': 'Stock_Iniziale',
+    'Stock Finale': 'Stock_Finale',
+    'Delta Stock': 'Delta_Stock',
+}
+RESULTS_TABLE_ROW_HEIGHT = 20  # px, ultima risorsa se stile e font non danno l'altezza riga
+RESULTS_TABLE_MARGIN_ROWS = 1  # righe extra oltre quelle visibili (riga parziale in fondo)
+
+# Analisi giornaliera: giorni mostrati per pagina nel tab e blocchi testo tenuti in cache
+ANALYSIS_PAGE_DAYS = 7
+ANALYSIS_CACHE_MAX = 5000
+
+# Larghezza minima (px) di una barra/marker: oltre questa densità si passa a medie settimanali
+CHART_MIN_BAR_PX = 3
+
+# Colore del riquadro tooltip per tipo di grafico
+CHART_TOOLTIP_COLORS = {
+    'produced_daily': 'yellow',
+    'produced_weekly': 'lightgreen',
+    'components_stacked': 'lightblue',
+    'packed_detail': 'lightyellow',
+}
+
+
+def weekly_means(x, *series):
+    """
+    Medie settimanali (lunedì-domenica) di serie giornaliere.
+
+    Args:
+        x: date come numeri matplotlib (date2num), ordinate
+        *series: serie giornaliere allineate a x
+    Returns:
+        (centri delle settimane, giorni per settimana, [medie per serie])
+    """
+    days = np.floor(x)
+    # Giorno 0 (1970-01-01) è un giovedì → il lunedì ha (giorno + 3) % 7 == 0
+    week_start = days - (days + 3) % 7
+    starts, inverse, counts = np.unique(week_start, return_inverse=True, return_counts=True)
+    means = [np.bincount(inverse, weights=values, minlength=len(starts)) / counts for values in series]
+    return starts + 3, counts, means
+
+
+def minmax_indices(x, max_points, *series):
+    """
+    Downsampling min/max: divide x in intervalli uguali e per ciascuno tiene gli
+    indici del minimo e del massimo di ogni serie (i picchi restano visibili),
+    più il primo e l'ultimo punto. Al massimo ~max_points indici, ordinati.
+    """
+    n = len(x)
+    n_buckets = max_points // (2 * max(1, len(series)))
+    if n_buckets <= 0 or n <= max_points:
+        return np.arange(n)
+
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)
+    bucket = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, n_buckets - 1)
+
+    keep = [np.array([0, n - 1])]
+    for values in series:
+        # Ordina per (bucket, valore): primo di ogni gruppo = minimo, ultimo = massimo
+        order = np.lexsort((values, bucket))
+        boundaries = np.flatnonzero(np.diff(bucket[order])) + 1
+        first = np.r_[0, boundaries]
+        last = np.r_[boundaries - 1, n - 1]
+        keep.append(order[first])
+        keep.append(order[last])
+
+    return np.unique(np.concatenate(keep))
+
+
+def compare_results(results_a, results_b):
+    """
+    Confronto giorno per giorno di due periodi (es. stesso mese di due anni, due stabilimenti):
+    righe allineate per posizione (giorno 1, 2, ...), il periodo più corto è completato con NaN.
+    Returns:
+        DataFrame con Giorno, Data A/B, Produced A/B e le differenze B - A
+    """
+    a = results_a.reset_index(drop=True)
+    b = results_b.reset_index(drop=True)
+    table = pd.DataFrame({
+        'Data A': a['Data'],
+        'Data B': b['Data'],
+        'Produced A': a['Produced'],
+        'Produced B': b['Produced'],
+    })
+    table['Δ Produced'] = table['Produced B'] - table['Produced A']
+    table['Δ %'] = table['Δ Produced'] / table['Produced A'].where(table['Produced A'] != 0) * 100
+    table['Δ Packed'] = b['Packed'] - a['Packed']
+    table['Δ Cisterne'] = b['Cisterne'] - a['Cisterne']
+    table['Δ Stock'] = b['Delta_Stock'] - a['Delta_Stock']
+    table.insert(0, 'Giorno', np.arange(1, len(table) + 1))
+    return table
+
+
+class TaskCancelled(Exception):
+    """Operazione in background annullata dall'utente"""
+
+
 class ProducedGUI:
     def __init__(self, root):
         """Inizializza l'interfaccia grafica"""
@@ -42,14 +235,63 @@ class ProducedGUI:
         self.csv_path = None
         self.packed_csv_path = None  # Path CSV Packed
         self.cisterne_csv_path = None  # Path CSV Cisterne
-        self.results_df = None
+        self.results_df = None  # Risultati del periodo selezionato (slice di results_all)
+        self.results_all = None  # Risultati di tutti i giorni caricati
+        self.date_from = None  # Filtro periodo (Timestamp, estremi inclusi; None = aperto)
+        self.date_to = None
+        self._date_index = None  # Date di results_all come datetime64 ordinato (ricerca binaria)
+        self._view_range = None  # Posizioni [start, stop) del periodo in results_all / df / coverage
         self.data_warning = None  # Warning per dati incompleti
+        self.coverage = None  # Copertura oraria Packed/Cisterne per giorno
+        self.coverage_warning = None  # Warning per giorni con ore mancanti
+        self.nan_journal_key = None  # Hash del CSV Stock (chiave journal NaN)
+        self.input_fingerprints = None  # Impronte dei 3 CSV letti (base della modalità live)
+        self._results_version = 0  # Incrementato ad ogni nuovo results_df (grafici da aggiornare)
+
+        # Analisi giornaliera: blocchi testo per giorno (chiave = valori del giorno e del precedente)
+        self._analysis_blocks = {}
+        self._analysis_records = None  # (versione risultati, righe results_df come dict)
+        self._analysis_start = 0  # Primo giorno della pagina mostrata nel tab
+        self._analysis_combo_version = None  # Versione risultati dell'elenco giorni nel menu
+
+        # Dataset calcolati in memoria: chiave (path + impronte dei 3 CSV) → riferimenti a df e risultati
+        self.datasets = {}
+        self.active_dataset = None
+
+        # Modifiche what-if: (posizione in df, colonna, valore precedente) per "Annulla modifiche"
+        self._what_if_log = []
+
+        # Operazioni lunghe in background: worker thread + coda letta con root.after
+        self._task_queue = None
+        self._task_thread = None
+        self._task_cancel = threading.Event()
+        self._task_handlers = None
+
+        # Modalità live: thread che controlla i 3 CSV e legge solo le righe aggiunte
+        self.live_var = tk.BooleanVar(value=False)
+        self._live_thread = None
+        self._live_stop = None
+        self._live_queue = None
+
+        # Grafico selezionato (creato qui: ripristinato dalla sessione anche a tab non ancora aperto)
+        self.chart_var = tk.StringVar(value='produced_daily')
+
+        # Opzioni report PDF (create qui: servono anche prima di aprire il tab PDF)
+        self.pdf_include_charts = tk.BooleanVar(value=True)
+        self.pdf_include_tanks = tk.BooleanVar(value=True)
+        self.pdf_include_weekly = tk.BooleanVar(value=True)
+        self.pdf_tank_overview = tk.BooleanVar(value=False)
+        self.pdf_tank_detail = tk.StringVar(value='')
 
-        # Crea interfaccia
+        # Crea interfaccia (solo il tab Carica Dati, gli altri al primo click)
         self.create_menu_bar()
+        self.create_date_filter_bar()
         self.create_main_interface()
         self.create_status_bar()
 
+        # pandas/matplotlib/produced_batch arrivano in background
+        start_heavy_modules_import()
+
     def create_menu_bar(self):
         """Crea la barra dei menu"""
         menubar = tk.Menu(self.root)
@@ -63,13 +305,15 @@ class ProducedGUI:
         file_menu.add_command(label="Esporta Risultati CSV...", command=self.export_csv)
         file_menu.add_command(label="Esporta Risultati Excel...", command=self.export_excel)
         file_menu.add_separator()
-        file_menu.add_command(label="Esci", command=self.root.quit, accelerator="Ctrl+Q")
+        file_menu.add_command(label="Esci", command=self.on_close, accelerator="Ctrl+Q")
 
         # Menu Strumenti
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Strumenti", menu=tools_menu)
         tools_menu.add_command(label="Ricalcola Tutto", command=self.recalculate_all)
         tools_menu.add_command(label="Test Formule", command=self.show_formula_test)
+        tools_menu.add_checkbutton(label="Modalità Live (aggiorna dai file)", variable=self.live_var,
+                                   command=self.toggle_live_mode)
         tools_menu.add_separator()
         tools_menu.add_command(label="Gestisci NaN", command=self.manage_nan)
 
@@ -81,43 +325,124 @@ class ProducedGUI:
 
         # Keyboard shortcuts
         self.root.bind('<Control-o>', lambda e: self.load_csv())
-        self.root.bind('<Control-q>', lambda e: self.root.quit())
+        self.root.bind('<Control-q>', lambda e: self.on_close())
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
 
-    def create_main_interface(self):
-        """Crea l'interfaccia principale con tab"""
-        # Notebook (tabs)
-        self.notebook = ttk.Notebook(self.root)
-        self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
+    def create_date_filter_bar(self):
+        """Barra periodo globale: limita dashboard, grafici, analisi, export e PDF"""
+        bar = ttk.Frame(self.root, padding=(10, 5, 10, 0))
+        bar.pack(fill='x')
 
-        # Tab 1: Carica Dati
-        self.tab_load = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_load, text="📂 Carica Dati")
-        self.create_load_tab()
+        ttk.Label(bar, text="📅 Periodo dal:").pack(side='left')
+        self.date_from_var = tk.StringVar()
+        from_entry = ttk.Entry(bar, textvariable=self.date_from_var, width=12)
+        from_entry.pack(side='left', padx=5)
 
-        # Tab 2: Dashboard
-        self.tab_dashboard = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_dashboard, text="📊 Dashboard")
-        self.create_dashboard_tab()
+        ttk.Label(bar, text="al:").pack(side='left')
+        self.date_to_var = tk.StringVar()
+        to_entry = ttk.Entry(bar, textvariable=self.date_to_var, width=12)
+        to_entry.pack(side='left', padx=5)
 
-        # Tab 3: Analisi Giornaliera
-        self.tab_analysis = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_analysis, text="🔍 Analisi Giornaliera")
-        self.create_analysis_tab()
+        for entry in (from_entry, to_entry):
+            entry.bind('<Return>', self.apply_date_filter)
 
-        # Tab 4: Grafici
-        self.tab_charts = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_charts, text="📈 Grafici")
-        self.create_charts_tab()
+        ttk.Button(bar, text="Applica", command=self.apply_date_filter).pack(side='left', padx=5)
+        ttk.Button(bar, text="Tutto il periodo", command=self.reset_date_filter).pack(side='left')
 
-        # Tab 5: Report PDF
-        self.tab_pdf = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_pdf, text="📄 Report PDF")
-        self.create_pdf_tab()
+        self.date_filter_label = ttk.Label(bar, text="(gg/mm/aaaa, vuoto = senza limite)",
+                                           foreground='gray')
+        self.date_filter_label.pack(side='left', padx=10)
 
-        # Tab 6: Impostazioni
-        self.tab_settings = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_settings, text="⚙️ Impostazioni")
-        self.create_settings_tab()
+        # Dataset già calcolati: si passa dall'uno all'altro senza ricaricare
+        self.dataset_combo = ttk.Combobox(bar, state='readonly', width=45)
+        self.dataset_combo.pack(side='right')
+        self.dataset_combo.bind('<<ComboboxSelected>>', self._on_dataset_selected)
+        ttk.Label(bar, text="🗂️ Dataset:").pack(side='right', padx=5)
+
+    def create_main_interface(self):
+        """Crea l'interfaccia principale con tab (contenuto costruito al primo utilizzo)"""
+        # Notebook (tabs)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
+
+        tabs = [
+            ('load', "📂 Carica Dati", self.create_load_tab),
+            ('dashboard', "📊 Dashboard", self.create_dashboard_tab),
+            ('analysis', "🔍 Analisi Giornaliera", self.create_analysis_tab),
+            ('charts', "📈 Grafici", self.create_charts_tab),
+            ('compare', "⚖️ Confronto", self.create_compare_tab),
+            ('pdf', "📄 Report PDF", self.create_pdf_tab),
+            ('settings', "⚙️ Impostazioni", self.create_settings_tab),
+        ]
+
+        # Frame vuoti subito (tab cliccabili), contenuto al primo <<NotebookTabChanged>>
+        self._tab_builders = {}
+        self._tab_keys = {}
+        self._built_tabs = set()
+        for key, text, builder in tabs:
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=text)
+            setattr(self, f'tab_{key}', frame)
+            self._tab_builders[key] = builder
+            self._tab_keys[str(frame)] = key
+
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        self.ensure_tab('load')
+
+    def ensure_tab(self, key):
+        """Costruisce il tab se non esiste ancora e lo allinea allo stato corrente"""
+        if key in self._built_tabs:
+            return False
+
+        # Solo il tab Carica Dati nasce prima dei moduli pesanti: gli altri li usano già in costruzione
+        if key != 'load':
+            ensure_heavy_modules()
+        self._built_tabs.add(key)
+        self._tab_builders[key]()
+
+        # Dati già presenti: il tab appena creato li mostra subito
+        if self.results_df is not None:
+            if key == 'dashboard':
+                self.update_dashboard()
+            elif key == 'charts':
+                self.update_chart()
+            elif key == 'analysis':
+                self._refresh_analysis_text()
+            elif key == 'compare':
+                self.update_comparison()
+        return True
+
+    def tab_built(self, key):
+        """True se il contenuto del tab è già stato costruito"""
+        return key in self._built_tabs
+
+    def _on_tab_changed(self, event):
+        """Primo click su un tab → costruzione del contenuto"""
+        key = self._tab_keys.get(str(self.notebook.select()))
+        if key is not None and not self.tab_built(key):
+            self.set_status("Preparazione tab...", show_progress=True)
+            self.ensure_tab(key)
+            self.set_status("Pronto")
+
+    def report_startup_time(self):
+        """Tempo alla prima finestra (e import in background) su console e barra di stato"""
+        elapsed = time.perf_counter() - _STARTUP_T0
+        print(f"⏱️ Finestra pronta in {elapsed:.2f} s")
+        self.set_status(f"Pronto (avvio in {elapsed:.2f} s)")
+
+        def report_imports():
+            if not _heavy_modules_ready.is_set():
+                self.root.after(100, report_imports)
+                return
+            if _heavy_modules_error is not None:
+                print(f"❌ Errore import moduli: {_heavy_modules_error}")
+                self.set_status("Errore caricamento librerie (vedi console)")
+                return
+            total = time.perf_counter() - _STARTUP_T0
+            print(f"⏱️ Librerie caricate in background in {_heavy_modules_seconds:.2f} s "
+                  f"(tutto pronto dopo {total:.2f} s)")
+
+        report_imports()
 
     def create_load_tab(self):
         """Crea il tab per caricare i dati"""
@@ -202,6 +527,10 @@ class ProducedGUI:
                               command=self.clear_data)
         clear_btn.pack(side='left', padx=5)
 
+        live_check = ttk.Checkbutton(action_frame, text="🔴 Live: aggiorna automaticamente",
+                                     variable=self.live_var, command=self.toggle_live_mode)
+        live_check.pack(side='right', padx=5)
+
     def create_dashboard_tab(self):
         """Crea il tab dashboard con risultati"""
         # Frame principale
@@ -232,7 +561,8 @@ class ProducedGUI:
             ('Produced Totale (hl)', 'total_produced'),
             ('Produced Medio (hl/giorno)', 'avg_produced'),
             ('Packed Totale (hl)', 'total_packed'),
-            ('Cisterne Totale (hl)', 'total_cisterne')
+            ('Cisterne Totale (hl)', 'total_cisterne'),
+            ('Giorni Incompleti (ore mancanti)', 'incomplete_days')
         ]
 
         for i, (label, key) in enumerate(stats):
@@ -242,25 +572,90 @@ class ProducedGUI:
                                              font=('Arial', 10))
             self.stat_labels[key].grid(row=i, column=1, sticky='w', padx=5, pady=2)
 
+        # Modifica what-if: una cella del DataFrame unito → ricalcolo del solo giorno e del successivo
+        edit_frame = ttk.LabelFrame(main_frame, text="✏️ Modifica What-If (doppio click su una riga)",
+                                    padding="10")
+        edit_frame.pack(fill='x', pady=5)
+
+        ttk.Label(edit_frame, text="Giorno:").pack(side='left')
+        self.edit_day_var = tk.StringVar()
+        self.edit_day_combo = ttk.Combobox(edit_frame, textvariable=self.edit_day_var,
+                                           state='readonly', width=12)
+        self.edit_day_combo.pack(side='left', padx=5)
+
+        ttk.Label(edit_frame, text="Colonna:").pack(side='left')
+        self.edit_column_var = tk.StringVar()
+        self.edit_column_combo = ttk.Combobox(edit_frame, textvariable=self.edit_column_var,
+                                              state='readonly', width=26)
+        self.edit_column_combo.pack(side='left', padx=5)
+
+        for combo in (self.edit_day_combo, self.edit_column_combo):
+            combo.bind('<<ComboboxSelected>>', lambda e: self._show_what_if_current())
+
+        self.edit_current_label = ttk.Label(edit_frame, text="Attuale: --", width=18)
+        self.edit_current_label.pack(side='left', padx=5)
+
+        ttk.Label(edit_frame, text="Nuovo:").pack(side='left')
+        self.edit_value_var = tk.StringVar()
+        value_entry = ttk.Entry(edit_frame, textvariable=self.edit_value_var, width=10)
+        value_entry.pack(side='left', padx=5)
+        value_entry.bind('<Return>', lambda e: self.apply_what_if_edit())
+
+        ttk.Button(edit_frame, text="Applica",
+                   command=self.apply_what_if_edit).pack(side='left', padx=5)
+        ttk.Button(edit_frame, text="Annulla modifiche",
+                   command=self.undo_what_if_edits).pack(side='left', padx=5)
+
+        self.edit_log_label = ttk.Label(edit_frame, text="", foreground='gray')
+        self.edit_log_label.pack(side='left', padx=10)
+
         # Tabella risultati
         table_frame = ttk.LabelFrame(main_frame, text="Risultati Dettagliati", padding="10")
         table_frame.pack(fill='both', expand=True, pady=5)
 
-        # Treeview per tabella
-        columns = ('Data', 'Produced', 'Packed', 'Cisterne', 'Stock Iniziale', 'Stock Finale', 'Delta Stock')
-        self.results_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=15)
+        # Treeview "virtuale": un pool fisso di righe (quelle visibili) riempite al volo
+        # con i giorni della finestra corrente → costo indipendente dal numero di giorni
+        columns = tuple(RESULTS_TABLE_COLUMNS)
+        self.results_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=15,
+                                         selectmode='browse')
 
         for col in columns:
-            self.results_tree.heading(col, text=col)
+            self.results_tree.heading(col, text=col,
+                                      command=lambda c=col: self._sort_results_table(c))
             self.results_tree.column(col, width=120, anchor='center')
 
+        # Tag per primo giorno con warning e giorni con ore mancanti
+        self.results_tree.tag_configure('warning', background='#ffcccc')
+        self.results_tree.tag_configure('incomplete', background='#fff3cd')
+
         self.results_tree.pack(side='left', fill='both', expand=True)
 
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient='vertical',
-                                 command=self.results_tree.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.results_tree.config(yscrollcommand=scrollbar.set)
+        # Scrollbar gestita a mano: la posizione è l'offset nella tabella, non nel Treeview
+        self.results_scrollbar = ttk.Scrollbar(table_frame, orient='vertical',
+                                               command=self._scroll_results_table)
+        self.results_scrollbar.pack(side='right', fill='y')
+
+        self.results_tree.bind('<Configure>', self._resize_results_table)
+        self.results_tree.bind('<MouseWheel>', self._wheel_results_table)
+        self.results_tree.bind('<Button-4>', self._wheel_results_table)
+        self.results_tree.bind('<Button-5>', self._wheel_results_table)
+        # Tastiera: la selezione segue il giorno e la finestra scorre ai bordi del pool
+        self.results_tree.bind('<Up>', lambda e: self._move_results_selection(-1))
+        self.results_tree.bind('<Down>', lambda e: self._move_results_selection(1))
+        self.results_tree.bind('<Prior>', lambda e: self._move_results_selection(-1, 'pages'))
+        self.results_tree.bind('<Next>', lambda e: self._move_results_selection(1, 'pages'))
+        self.results_tree.bind('<<TreeviewSelect>>', self._on_results_select)
+        self.results_tree.bind('<Double-1>', self._on_results_double_click)
+
+        self._table_pool = []  # iid delle righe del Treeview (riutilizzate)
+        self._table_arrays = None  # colonna visualizzata → array numpy
+        self._table_tags = None  # tag per riga (posizione in results_df)
+        self._table_order = None  # permutazione delle righe (ordinamento corrente)
+        self._table_sort = None  # (colonna, discendente)
+        self._table_argsort_cache = {}  # colonna → argsort crescente
+        self._table_offset = 0  # prima riga visibile (posizione in _table_order)
+        self._results_tree_height = 0  # px, ultimo <Configure> del Treeview
+        self._table_selected = None  # giorno selezionato (posizione in results_df), non la riga del pool
 
     def create_analysis_tab(self):
         """Crea il tab per l'analisi giornaliera dettagliata"""
@@ -290,6 +685,25 @@ class ProducedGUI:
         ttk.Button(controls_frame, text="💾 Esporta Report TXT",
                   command=self.export_daily_analysis).pack(side='left', padx=5)
 
+        ttk.Button(controls_frame, text="✏️ Modifica Giorno",
+                  command=lambda: self.open_what_if(self._analysis_start)).pack(side='left', padx=5)
+
+        # Navigazione: nel tab si vede una pagina di ANALYSIS_PAGE_DAYS giorni alla volta
+        ttk.Button(controls_frame, text="▶", width=3,
+                  command=lambda: self._page_analysis(1)).pack(side='right', padx=2)
+        ttk.Button(controls_frame, text="◀", width=3,
+                  command=lambda: self._page_analysis(-1)).pack(side='right', padx=2)
+
+        self.analysis_day_var = tk.StringVar()
+        self.analysis_day_combo = ttk.Combobox(controls_frame, textvariable=self.analysis_day_var,
+                                               state='readonly', width=14)
+        self.analysis_day_combo.pack(side='right', padx=5)
+        self.analysis_day_combo.bind('<<ComboboxSelected>>', self._on_analysis_day_selected)
+        ttk.Label(controls_frame, text="Dal giorno:").pack(side='right')
+
+        self.analysis_page_label = ttk.Label(controls_frame, text="", foreground='gray')
+        self.analysis_page_label.pack(side='right', padx=10)
+
         # Area testo con scrollbar
         text_frame = ttk.LabelFrame(main_frame, text="Report Giornaliero", padding="10")
         text_frame.pack(fill='both', expand=True, pady=5)
@@ -318,6 +732,8 @@ class ProducedGUI:
 
     def create_charts_tab(self):
         """Crea il tab per i grafici"""
+        ensure_heavy_modules()  # matplotlib / FigureCanvasTkAgg
+
         main_frame = ttk.Frame(self.tab_charts, padding="10")
         main_frame.pack(fill='both', expand=True)
 
@@ -329,7 +745,6 @@ class ProducedGUI:
         chart_select_frame = ttk.LabelFrame(main_frame, text="Seleziona Grafico", padding="10")
         chart_select_frame.pack(fill='x', pady=5)
 
-        self.chart_var = tk.StringVar(value='produced_daily')
         chart_types = [
             ('Produced Giornaliero', 'produced_daily'),
             ('Produced Settimanale', 'produced_weekly'),
@@ -358,14 +773,93 @@ class ProducedGUI:
         self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
         self.toolbar.update()
 
-        # Messaggio iniziale
-        ax = self.figure.add_subplot(111)
-        ax.text(0.5, 0.5, 'Carica dati per visualizzare i grafici',
-               ha='center', va='center', fontsize=14, color='gray')
-        ax.set_xticks([])
-        ax.set_yticks([])
+        # Assi persistenti: uno per tipo di grafico, creati al primo uso e poi solo aggiornati
+        self._charts = {}  # tipo grafico → stato (assi, artist, annotazione, handler)
+        self._chart_plotters = {
+            'produced_daily': self._plot_produced_daily,
+            'produced_weekly': self._plot_produced_weekly,
+            'components_stacked': self._plot_components_stacked,
+            'packed_detail': self._plot_packed_detail,
+            'stock_evolution': self._plot_stock_evolution,
+        }
+        # Grafici con vista ridotta (downsampling) ricalcolata ad ogni zoom/pan
+        self._chart_views = {
+            'produced_daily': self._view_produced_daily,
+            'components_stacked': self._view_components_stacked,
+            'stock_evolution': self._view_stock_evolution,
+        }
+        # Correzioni sul posto dopo una modifica what-if (gli altri grafici vengono ridisegnati)
+        self._chart_patchers = {
+            'produced_daily': self._patch_produced_daily,
+            'produced_weekly': self._patch_produced_weekly,
+            'components_stacked': self._patch_components_stacked,
+            'stock_evolution': self._patch_stock_evolution,
+        }
+        self._active_chart = None
+
+        # Tooltip con blitting: sfondo salvato ad ogni draw completo, poi si ridisegna solo l'annotazione
+        self._chart_background = None
+        self.canvas.mpl_connect('draw_event', self._on_chart_draw)
+
+        # Messaggio iniziale (assi dedicati, riusati anche per i messaggi di errore)
+        self._chart_message_ax = self.figure.add_subplot(111, label='message')
+        self._chart_message = self._chart_message_ax.text(
+            0.5, 0.5, 'Carica dati per visualizzare i grafici',
+            ha='center', va='center', fontsize=14, color='gray')
+        self._chart_message_ax.set_xticks([])
+        self._chart_message_ax.set_yticks([])
         self.canvas.draw()
 
+    def create_compare_tab(self):
+        """Crea il tab di confronto tra il dataset attivo e un altro dataset già calcolato"""
+        ensure_heavy_modules()  # Figure / FigureCanvasTkAgg (import in background all'avvio)
+        main_frame = ttk.Frame(self.tab_compare, padding="10")
+        main_frame.pack(fill='both', expand=True)
+
+        select_frame = ttk.Frame(main_frame)
+        select_frame.pack(fill='x', pady=5)
+
+        self.compare_a_label = ttk.Label(select_frame, text="A (attivo): --", font=('Arial', 10, 'bold'))
+        self.compare_a_label.pack(side='left', padx=5)
+
+        ttk.Label(select_frame, text="confrontato con B:").pack(side='left', padx=(20, 5))
+        self.compare_combo = ttk.Combobox(select_frame, state='readonly', width=50)
+        self.compare_combo.pack(side='left', padx=5)
+        self.compare_combo.bind('<<ComboboxSelected>>', lambda e: self.update_comparison())
+
+        self.compare_summary_label = ttk.Label(main_frame, text="", font=('Arial', 10))
+        self.compare_summary_label.pack(fill='x', pady=5)
+
+        # Sovrapposizione Produced A/B + barre della differenza
+        chart_frame = ttk.Frame(main_frame)
+        chart_frame.pack(fill='both', expand=True)
+        self.compare_figure = Figure(figsize=(10, 4), dpi=100)
+        self.compare_canvas = FigureCanvasTkAgg(self.compare_figure, master=chart_frame)
+        self.compare_canvas.get_tk_widget().pack(fill='both', expand=True)
+        self._compare_ax, self._compare_diff_ax = self.compare_figure.subplots(2, 1, sharex=True,
+                                                                              height_ratios=[2, 1])
+        # Margini fissi: niente tight_layout ad ogni cambio di dataset
+        self.compare_figure.subplots_adjust(left=0.08, right=0.98, top=0.95, bottom=0.12, hspace=0.08)
+
+        # Colonne differenza
+        table_frame = ttk.LabelFrame(main_frame, text="Differenze giorno per giorno (B - A)", padding="5")
+        table_frame.pack(fill='both', expand=True, pady=5)
+
+        columns = ('Giorno', 'Data A', 'Data B', 'Produced A', 'Produced B',
+                   'Δ Produced', 'Δ %', 'Δ Packed', 'Δ Cisterne', 'Δ Stock')
+        self.compare_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=8)
+        for col in columns:
+            self.compare_tree.heading(col, text=col)
+            self.compare_tree.column(col, width=95, anchor='center')
+        self.compare_tree.tag_configure('worse', background='#ffcccc')
+        self.compare_tree.pack(side='left', fill='both', expand=True)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.compare_tree.yview)
+        scrollbar.pack(side='right', fill='y')
+        self.compare_tree.config(yscrollcommand=scrollbar.set)
+
+        self._compare_keys = []  # chiavi dei dataset nel menu B
+
     def create_pdf_tab(self):
         """Crea il tab per generare PDF"""
         main_frame = ttk.Frame(self.tab_pdf, padding="10")
@@ -379,16 +873,20 @@ class ProducedGUI:
         options_frame = ttk.LabelFrame(main_frame, text="Opzioni Report", padding="10")
         options_frame.pack(fill='x', pady=10)
 
-        self.pdf_include_charts = tk.BooleanVar(value=True)
-        self.pdf_include_tanks = tk.BooleanVar(value=True)
-        self.pdf_include_weekly = tk.BooleanVar(value=True)
-
         ttk.Checkbutton(options_frame, text="Includi grafici principali",
                        variable=self.pdf_include_charts).pack(anchor='w', pady=2)
         ttk.Checkbutton(options_frame, text="Includi dettagli tank",
                        variable=self.pdf_include_tanks).pack(anchor='w', pady=2)
         ttk.Checkbutton(options_frame, text="Includi analisi settimanali",
                        variable=self.pdf_include_weekly).pack(anchor='w', pady=2)
+        ttk.Checkbutton(options_frame, text="Panoramica tank (sparkline, pagina completa solo per i tank anomali)",
+                       variable=self.pdf_tank_overview).pack(anchor='w', pady=2)
+
+        detail_frame = ttk.Frame(options_frame)
+        detail_frame.pack(anchor='w', pady=2)
+        ttk.Label(detail_frame, text="Tank sempre in dettaglio:").pack(side='left')
+        ttk.Entry(detail_frame, textvariable=self.pdf_tank_detail, width=30).pack(side='left', padx=5)
+        ttk.Label(detail_frame, text="(es. BBT 111, FST 122)", foreground='gray').pack(side='left')
 
         # Bottone genera
         generate_btn = ttk.Button(main_frame, text="Genera Report PDF",
@@ -406,6 +904,8 @@ class ProducedGUI:
 
     def create_settings_tab(self):
         """Crea il tab impostazioni"""
+        ensure_heavy_modules()  # MATERIAL_MAPPING da produced_batch
+
         main_frame = ttk.Frame(self.tab_settings, padding="10")
         main_frame.pack(fill='both', expand=True)
 
@@ -444,12 +944,17 @@ class ProducedGUI:
         self.progress = ttk.Progressbar(self.status_bar, mode='indeterminate',
                                        length=200)
 
+        # Visibile solo mentre un'operazione è in corso
+        self.cancel_btn = ttk.Button(self.status_bar, text="Annulla",
+                                     command=self.cancel_task)
+
     # ============== METODI DI UTILITÀ ==============
 
     def set_status(self, message, show_progress=False):
         """Imposta il messaggio nella barra di stato"""
         self.status_label.config(text=message)
         if show_progress:
+            self.progress.config(mode='indeterminate')
             self.progress.pack(side='right', padx=5)
             self.progress.start()
         else:
@@ -464,6 +969,116 @@ class ProducedGUI:
         self.info_text.insert('1.0', text)
         self.info_text.config(state='disabled')
 
+    # ============== ESECUZIONE IN BACKGROUND ==============
+
+    def is_busy(self):
+        """True se un'operazione in background è in corso"""
+        return self._task_thread is not None
+
+    def run_task(self, title, work, on_done, on_error=None, on_progress=None):
+        """
+        Esegue work(progress) in un worker thread mantenendo la finestra reattiva.
+
+        work non deve toccare i widget: riporta l'avanzamento con
+        progress(messaggio, passo, totale), che solleva TaskCancelled se l'utente
+        ha premuto Annulla. on_done(risultato), on_error(eccezione) e
+        on_progress(messaggio) vengono chiamati nel thread Tk tramite la coda.
+        """
+        if self.is_busy():
+            messagebox.showwarning("Attenzione",
+                                 "Un'operazione è già in corso.\n"
+                                 "Attendi il termine oppure premi Annulla.")
+            return False
+
+        task_queue = queue.Queue()
+        cancel = self._task_cancel
+        cancel.clear()
+
+        def progress(message, step=None, total=None):
+            if cancel.is_set():
+                raise TaskCancelled()
+            task_queue.put(('progress', message, step, total))
+
+        def worker():
+            try:
+                ensure_heavy_modules()
+                result = work(progress)
+            except TaskCancelled:
+                task_queue.put(('cancelled', None))
+            except Exception as e:
+                task_queue.put(('error', e))
+            else:
+                task_queue.put(('done', result))
+
+        self._task_queue = task_queue
+        self._task_handlers = (title, on_done, on_error, on_progress)
+        self._task_thread = threading.Thread(target=worker, name=f"task: {title}", daemon=True)
+
+        self.set_status(f"{title}...", show_progress=True)
+        self.cancel_btn.config(state='normal')
+        self.cancel_btn.pack(side='right', padx=5)
+
+        self._task_thread.start()
+        self.root.after(TASK_POLL_MS, self._poll_task_queue)
+        return True
+
+    def cancel_task(self):
+        """Richiede l'annullamento (effettivo al prossimo passo del worker)"""
+        if self.is_busy():
+            self._task_cancel.set()
+            self.cancel_btn.config(state='disabled')
+            self.status_label.config(text="Annullamento in corso...")
+
+    def _poll_task_queue(self):
+        """Svuota la coda del worker: avanzamento e risultato finale (thread Tk)"""
+        title, on_done, on_error, on_progress = self._task_handlers
+
+        while True:
+            try:
+                kind, *payload = self._task_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'progress':
+                message, step, total = payload
+                if not self._task_cancel.is_set():
+                    self._set_task_progress(message, step, total)
+                if on_progress:
+                    on_progress(message)
+                continue
+
+            # Operazione terminata: libera la barra di stato prima delle callback
+            self._task_thread = None
+            self._task_queue = None
+            self.cancel_btn.pack_forget()
+            self.set_status("Pronto")
+
+            if kind == 'done':
+                on_done(payload[0])
+            elif kind == 'cancelled':
+                self.set_status(f"{title}: operazione annullata")
+            elif on_error:
+                on_error(payload[0])
+            else:
+                self.set_status(f"Errore: {title}")
+                messagebox.showerror("Errore", f"{title}:\n{str(payload[0])}")
+            return
+
+        self.root.after(TASK_POLL_MS, self._poll_task_queue)
+
+    def _set_task_progress(self, message, step=None, total=None):
+        """Barra di stato: determinata se il totale è noto, altrimenti indeterminata"""
+        self.status_label.config(text=message)
+        self.progress.pack(side='right', padx=5)
+        if total:
+            if str(self.progress.cget('mode')) != 'determinate':
+                self.progress.stop()
+                self.progress.config(mode='determinate')
+            self.progress.config(maximum=total, value=step or 0)
+        elif str(self.progress.cget('mode')) != 'indeterminate':
+            self.progress.config(mode='indeterminate')
+            self.progress.start()
+
     # ============== FUNZIONI PRINCIPALI ==============
 
     def browse_csv(self):
@@ -503,7 +1118,7 @@ class ProducedGUI:
             self.load_and_analyze()
 
     def load_and_analyze(self):
-        """Carica i CSV e analizza i dati"""
+        """Carica i CSV e analizza i dati (in background)"""
         # Verifica che TUTTI i file siano selezionati
         if not self.csv_path:
             messagebox.showwarning("Attenzione", "Seleziona il file CSV Stock (giornaliero)")
@@ -521,100 +1136,1013 @@ class ProducedGUI:
                                  "Il file Cisterne è OBBLIGATORIO per calcolare il Produced!")
             return
 
+        paths = (self.csv_path, self.packed_csv_path, self.cisterne_csv_path)
+
+        # Stessi file, invariati, già calcolati (e senza modifiche what-if): si riprende il dataset in memoria
         try:
-            self.set_status("Caricamento CSV in corso...", show_progress=True)
-
-            # === CARICA CSV 1: STOCK TANKS (giornaliero) ===
-            self.df = pd.read_csv(self.csv_path)
-
-            # === CARICA CSV 2: PACKED (orario) ===
-            self.df_packed = pd.read_csv(self.packed_csv_path)
-
-            # === CARICA CSV 3: CISTERNE (orario) ===
-            self.df_cisterne = pd.read_csv(self.cisterne_csv_path)
-
-            # === AGGREGA PACKED ORARIO → GIORNALIERO ===
-            self.set_status("Aggregazione dati Packed orari...", show_progress=True)
-            packed_daily = self._aggregate_packed_hourly()
-
-            # === AGGREGA CISTERNE ORARIO → GIORNALIERO ===
-            self.set_status("Aggregazione dati Cisterne orari...", show_progress=True)
-            cisterne_daily = self._aggregate_cisterne_hourly()
-
-            # === MERGE DEI TRE DATAFRAME ===
-            self.set_status("Unione dati Stock, Packed e Cisterne...", show_progress=True)
-            self.df = self._merge_stock_packed_cisterne(self.df, packed_daily, cisterne_daily)
-
-            # Analizza NaN (su DataFrame unito)
-            handler = NaNHandler(self.df)
-            missing_report = handler.detect_missing_values()
-
-            # Mostra info
-            info = f"✅ CSV Stock Tanks: {os.path.basename(self.csv_path)}\n"
-            info += f"   Righe: {len(self.df)}\n\n"
-            info += f"✅ CSV Packed (orario): {os.path.basename(self.packed_csv_path)}\n"
-            info += f"   Righe orarie: {len(self.df_packed)}\n"
-            info += f"   Giorni aggregati: {len(packed_daily)}\n\n"
-            info += f"✅ CSV Cisterne (orario): {os.path.basename(self.cisterne_csv_path)}\n"
-            info += f"   Righe orarie: {len(self.df_cisterne)}\n"
-            info += f"   Giorni aggregati: {len(cisterne_daily)}\n\n"
-
-            if missing_report:
-                info += f"⚠️ ATTENZIONE: Rilevati {len(missing_report)} valori NaN!\n\n"
-                info += "Giorni con NaN:\n"
-                by_date = {}
-                for item in missing_report:
-                    date = item['date']
-                    if date not in by_date:
-                        by_date[date] = []
-                    by_date[date].append(item['column'])
-
-                for date, cols in list(by_date.items())[:10]:
-                    info += f"  {date}: {len(cols)} colonne\n"
-
-                if len(by_date) > 10:
-                    info += f"  ... e altri {len(by_date) - 10} giorni\n"
-
-                info += "\nUsa Menu → Strumenti → Gestisci NaN per risolverli"
+            key = self._dataset_key(paths, [file_fingerprint(path) for path in paths])
+        except OSError:
+            key = None
+        entry = self.datasets.get(key)
+        if entry is not None and not entry['what_if_log'] and not self.is_busy():
+            self.switch_dataset(key)
+            self.set_status(f"Dataset già calcolato, ripreso dalla memoria: {len(entry['results'])} giorni")
+            return
+
+        self.run_task("Caricamento CSV",
+                      lambda progress: self._compute_load(*paths, progress),
+                      self._apply_load,
+                      on_error=self._load_failed)
+
+    def _compute_load(self, csv_path, packed_csv_path, cisterne_csv_path, progress, sources=None):
+        """
+        Lettura, aggregazione, merge e analisi NaN (worker thread: nessun widget Tk).
+        sources: contenuto già letto dei 3 CSV (modalità live), altrimenti letti dai path.
+        """
+        steps = 6
+        notices = []
+        paths = (csv_path, packed_csv_path, cisterne_csv_path)
+        fingerprints = [file_fingerprint(path) for path in paths]
+        stock_src, packed_src, cisterne_src = sources or paths
+
+        # === CARICA CSV 1: STOCK TANKS (giornaliero) ===
+        progress("Caricamento CSV Stock...", 0, steps)
+        df_stock = pd.read_csv(stock_src)
+        journal_key = hash_input_files(csv_path)
+
+        # === CARICA CSV 2-3: PACKED E CISTERNE (orari) ===
+        progress("Caricamento CSV Packed e Cisterne...", 1, steps)
+        df_packed = pd.read_csv(packed_src)
+        df_cisterne = pd.read_csv(cisterne_src)
+        packed_rows = len(df_packed)
+        cisterne_rows = len(df_cisterne)
+
+        # === AGGREGA PACKED ORARIO → GIORNALIERO ===
+        progress("Aggregazione dati Packed orari...", 2, steps)
+        packed_daily, df_packed, packed_coverage = self._aggregate_packed_hourly(df_packed, notices)
+
+        # === AGGREGA CISTERNE ORARIO → GIORNALIERO ===
+        progress("Aggregazione dati Cisterne orari...", 3, steps)
+        cisterne_daily, df_cisterne, cisterne_coverage = self._aggregate_cisterne_hourly(df_cisterne, notices)
+
+        # === MERGE DEI TRE DATAFRAME ===
+        progress("Unione dati Stock, Packed e Cisterne...", 4, steps)
+        df = self._merge_stock_packed_cisterne(df_stock, packed_daily, cisterne_daily)
+
+        # Copertura oraria per giorno (allineata alle righe di df)
+        coverage = build_coverage_index(df_stock['Date'], packed_coverage, cisterne_coverage)
+
+        # Riapplica le risoluzioni NaN salvate, poi analizza quelle rimaste
+        progress("Analisi valori NaN...", 5, steps)
+        handler = NaNHandler(df, journal_key=journal_key)
+        journal_applied = handler.apply_journal()
+        missing_report = handler.detect_missing_values()
+
+        return {
+            'paths': paths,
+            'fingerprints': fingerprints,
+            'df': df,
+            'df_packed': df_packed,
+            'df_cisterne': df_cisterne,
+            'coverage': coverage,
+            'journal_key': journal_key,
+            'journal_applied': journal_applied,
+            'missing_report': missing_report,
+            'packed_rows': packed_rows,
+            'cisterne_rows': cisterne_rows,
+            'packed_days': len(packed_daily),
+            'cisterne_days': len(cisterne_daily),
+            'notices': notices,
+        }
+
+    def _apply_load(self, data, notify=True):
+        """
+        Applica il risultato del caricamento allo stato e ai widget (thread Tk).
+        notify=False (ricarica in modalità live): avvisi nella barra di stato, nessun popup.
+        """
+        self.csv_path, self.packed_csv_path, self.cisterne_csv_path = data['paths']
+        self.input_fingerprints = data['fingerprints']
+        self.df = data['df']
+        self.df_packed = data['df_packed']
+        self.df_cisterne = data['df_cisterne']
+        self._what_if_log = []
+        self.coverage = data['coverage']
+        self.nan_journal_key = data['journal_key']
+        missing_report = data['missing_report']
+
+        for notice in data['notices']:
+            if notify:
+                messagebox.showwarning("Attenzione", notice)
             else:
-                info += "✓ Nessun valore NaN rilevato\n"
-                info += "\nDati pronti per l'elaborazione!"
+                print(f"⚠️ {notice}")
+
+        # Mostra info
+        info = f"✅ CSV Stock Tanks: {os.path.basename(self.csv_path)}\n"
+        info += f"   Righe: {len(self.df)}\n\n"
+        info += f"✅ CSV Packed (orario): {os.path.basename(self.packed_csv_path)}\n"
+        info += f"   Righe orarie: {data['packed_rows']}\n"
+        info += f"   Ore sintetizzate ({PACKED_GAP_FILL['strategy']}): {int(self.df_packed['Synthesized'].sum())}\n"
+        info += f"   Giorni aggregati: {data['packed_days']}\n\n"
+        info += f"✅ CSV Cisterne (orario): {os.path.basename(self.cisterne_csv_path)}\n"
+        info += f"   Righe orarie: {data['cisterne_rows']}\n"
+        info += f"   Ore sintetizzate ({CISTERNE_GAP_FILL['strategy']}): {int(self.df_cisterne['Synthesized'].sum())}\n"
+        info += f"   Giorni aggregati: {data['cisterne_days']}\n\n"
+
+        incomplete_lines = describe_incomplete_days(self.coverage)
+        if incomplete_lines:
+            info += f"⚠️ Giorni con ore mancanti: {int(self.coverage['Incompleto'].sum())}\n"
+            for line in incomplete_lines:
+                info += f"  {line}\n"
+            info += "\n"
+
+        if data['journal_applied']:
+            info += f"✓ {data['journal_applied']} valori NaN ripristinati dal journal\n\n"
+
+        if missing_report:
+            info += f"⚠️ ATTENZIONE: Rilevati {len(missing_report)} valori NaN!\n\n"
+            info += "Giorni con NaN:\n"
+            by_date = {}
+            for item in missing_report:
+                date = item['date']
+                if date not in by_date:
+                    by_date[date] = []
+                by_date[date].append(item['column'])
+
+            for date, cols in list(by_date.items())[:10]:
+                info += f"  {date}: {len(cols)} colonne\n"
+
+            if len(by_date) > 10:
+                info += f"  ... e altri {len(by_date) - 10} giorni\n"
+
+            info += "\nUsa Menu → Strumenti → Gestisci NaN per risolverli"
+        else:
+            info += "✓ Nessun valore NaN rilevato\n"
+            info += "\nDati pronti per l'elaborazione!"
+
+        self.update_info_text(info)
+        self.set_status(f"CSV caricato: {len(self.df)} righe")
+
+        # Caricamento manuale con modalità live attiva: il controllo riparte dai file appena letti
+        if notify and self.live_var.get():
+            self.start_live_mode()
+
+        # Se non ci sono NaN, calcola automaticamente
+        if not missing_report:
+            self.recalculate_all(notify=notify)
+        elif not notify:
+            self.set_status(f"⚠️ Live: {len(missing_report)} valori NaN → Strumenti → Gestisci NaN")
+
+    def _load_failed(self, error):
+        """Errore nel worker di caricamento (thread Tk)"""
+        self.set_status("Errore durante il caricamento")
+        messagebox.showerror("Errore", f"Errore durante il caricamento:\n{str(error)}")
+
+    # ============== MODIFICHE WHAT-IF ==============
+
+    def _editable_columns(self):
+        """Colonne del DataFrame unito modificabili in what-if (tank, Packed, Cisterne)"""
+        columns = []
+        for tank_num in BBT_TANKS:
+            columns += [f'BBT{tank_num} Level', f'BBT {tank_num} Average Plato', f'BBT{tank_num} Material']
+        for tank_num in FST_TANKS:
+            columns += [f'FST{tank_num} Level ', f'FST {tank_num} Average Plato', f'FST{tank_num} Material']
+        columns += ['Packed OW1', 'Packed RGB', 'Packed OW2', 'Packed KEG',
+                    'Truck1 Level', 'Truck1 Average Plato', 'Truck2 Level', 'Truck2 Average Plato']
+        return [col for col in columns if col in self.df.columns]
+
+    def _refresh_what_if_panel(self):
+        """Giorni del periodo e colonne modificabili nei menu del pannello what-if"""
+        if not self.tab_built('dashboard') or self.results_df is None or self.df is None:
+            return
+        days = list(pd.to_datetime(self.results_df['Data']).dt.strftime('%d/%m/%Y'))
+        self.edit_day_combo.config(values=days)
+        if self.edit_day_var.get() not in days and days:
+            self.edit_day_combo.current(0)
+
+        columns = self._editable_columns()
+        self.edit_column_combo.config(values=columns)
+        if self.edit_column_var.get() not in columns and columns:
+            self.edit_column_combo.current(0)
+
+        self._show_what_if_current()
+        self.edit_log_label.config(text=f"{len(self._what_if_log)} modifiche" if self._what_if_log else "")
+
+    def _what_if_target(self):
+        """(posizione in df, colonna) selezionate nel pannello, None se incomplete"""
+        day = self.edit_day_combo.current()
+        column = self.edit_column_var.get()
+        if day < 0 or not column or self._view_range is None:
+            return None
+        return self._view_range[0] + day, column
+
+    def _show_what_if_current(self):
+        """Mostra il valore attuale della cella selezionata"""
+        target = self._what_if_target()
+        if target is None or self.df is None:
+            self.edit_current_label.config(text="Attuale: --")
+            return
+        pos, column = target
+        self.edit_current_label.config(text=f"Attuale: {self.df[column].iat[pos]}")
 
-            self.update_info_text(info)
-            self.set_status(f"CSV caricato: {len(self.df)} righe")
+    def open_what_if(self, view_pos):
+        """Apre il pannello what-if del Dashboard sul giorno indicato (posizione nel periodo)"""
+        if self.results_df is None or self.df is None:
+            messagebox.showwarning("Attenzione", "Carica prima i dati e calcola Produced")
+            return
+        self.notebook.select(self.tab_dashboard)
+        self.ensure_tab('dashboard')
+        if 0 <= view_pos < len(self.results_df):
+            self.edit_day_combo.current(view_pos)
+        self._show_what_if_current()
+
+    def _on_results_double_click(self, event):
+        """Doppio click su una riga della tabella → giorno selezionato nel pannello what-if"""
+        iid = self.results_tree.identify_row(event.y)
+        if not iid or self._table_order is None or iid not in self._table_pool:
+            return
+        pos = self._table_offset + self._table_pool.index(iid)
+        if pos < len(self._table_order):
+            self.open_what_if(int(self._table_order[pos]))
 
-            # Se non ci sono NaN, calcola automaticamente
-            if not missing_report:
-                self.recalculate_all()
+    def apply_what_if_edit(self):
+        """Pulsante Applica: valida il nuovo valore e ricalcola solo i giorni interessati"""
+        if self.results_all is None or self.df is None:
+            messagebox.showwarning("Attenzione", "Carica prima i dati e calcola Produced")
+            return
+        if self.is_busy():
+            messagebox.showwarning("Attenzione", "Attendi il termine dell'operazione in corso")
+            return
 
+        target = self._what_if_target()
+        if target is None:
+            return
+        pos, column = target
+
+        text = self.edit_value_var.get().strip().replace(',', '.')
+        try:
+            value = float(text)
+        except ValueError:
+            messagebox.showerror("Errore", f"Valore non numerico: '{text}'")
+            return
+        if column.endswith('Material'):
+            if not value.is_integer():
+                messagebox.showerror("Errore", "Il Material deve essere un numero intero")
+                return
+            if int(value) not in MATERIAL_MAPPING:
+                messagebox.showerror("Errore", f"Material {int(value)} non presente nel mapping "
+                                               f"(grado volumetrico sconosciuto)")
+                return
+
+        try:
+            old = self.set_what_if_value(pos, column, value)
         except Exception as e:
-            self.set_status("Errore durante il caricamento")
-            messagebox.showerror("Errore", f"Errore durante il caricamento:\n{str(e)}")
+            messagebox.showerror("Errore", f"Valore non applicabile:\n{str(e)}")
+            return
+        self._what_if_log.append((pos, column, old))
+        self.edit_value_var.set("")
+        self._after_what_if(f"✏️ {column.strip()} del {self.edit_day_var.get()}: {old} → {value:g}")
+
+    def undo_what_if_edits(self):
+        """Ripristina i valori originali di tutte le modifiche what-if (in ordine inverso)"""
+        if not self._what_if_log or self.is_busy():
+            return
+        while self._what_if_log:
+            pos, column, old = self._what_if_log.pop()
+            self.set_what_if_value(pos, column, old)
+        self._after_what_if("Modifiche what-if annullate")
+
+    def set_what_if_value(self, pos, column, value):
+        """
+        Scrive una cella del DataFrame unito e aggiorna solo ciò che ne dipende: il giorno stesso
+        e lo Stock Iniziale del giorno successivo (risultati, tabella, grafici, analisi).
+        Ritorna il valore precedente. Se il ricalcolo fallisce la cella torna com'era
+        (df e results_all restano coerenti) e l'errore viene rilanciato.
+        """
+        old = self._set_df_value(pos, column, value)
+        try:
+            self._recompute_days([pos])
+        except Exception:
+            self._set_df_value(pos, column, old)
+            self._recompute_days([pos])
+            raise
+        return old
+
+    def _set_df_value(self, pos, column, value):
+        """Scrive una cella del DataFrame unito (colonna intera convertita a float se serve), ritorna il valore precedente"""
+        col_loc = self.df.columns.get_loc(column)
+        old = self.df.iat[pos, col_loc]
+        if pd.api.types.is_integer_dtype(self.df[column].dtype):
+            if float(value).is_integer():
+                value = int(value)
+            else:
+                self.df[column] = self.df[column].astype(float)
+        self.df.iat[pos, col_loc] = value
+        return old
+
+    def _recompute_days(self, positions, patch=True):
+        """
+        Ricalcola i giorni indicati (posizioni in df) e lo Stock Iniziale del giorno dopo,
+        scrivendo in results_all sul posto. Con patch=True corregge anche le viste aperte.
+        """
+        results = self.results_all
+        loc = {col: results.columns.get_loc(col)
+               for col in ('Produced', 'Packed', 'Cisterne', 'Stock_Iniziale', 'Stock_Finale', 'Delta_Stock')}
+
+        updates = {}
+        for pos in sorted(positions):
+            if pos >= len(results):
+                continue  # giorno non ancora calcolato (live: NaN in attesa)
+            row = self.df.iloc[pos]
+            packed_total, cisterne_total = self._day_components(row)
+            stock_finale = self._stock_total(row)
+            updates.setdefault(pos, {}).update(
+                {'Packed': packed_total, 'Cisterne': cisterne_total, 'Stock_Finale': stock_finale})
+            if pos + 1 < len(results):
+                updates.setdefault(pos + 1, {})['Stock_Iniziale'] = stock_finale
+
+        produced_before = {}
+        for p, values in updates.items():
+            produced_before[p] = results.iat[p, loc['Produced']]
+            for col, val in values.items():
+                results.iat[p, loc[col]] = val
+            delta_stock = results.iat[p, loc['Stock_Finale']] - results.iat[p, loc['Stock_Iniziale']]
+            results.iat[p, loc['Delta_Stock']] = delta_stock
+            results.iat[p, loc['Produced']] = (results.iat[p, loc['Packed']] +
+                                               results.iat[p, loc['Cisterne']] / 2 + delta_stock / 2)
+
+        # Stesso periodo, nessun cambio di versione: le viste vengono corrette sul posto
+        start, stop = self._view_range
+        self.results_df = results.iloc[start:stop]
+        if patch:
+            changed = {p - start: results.iat[p, loc['Produced']] - before
+                       for p, before in produced_before.items() if start <= p < stop}
+            self._patch_views(changed)
+
+    def _patch_views(self, changed):
+        """Aggiorna tabella, statistiche, analisi e grafici per i giorni modificati {posizione: ΔProduced}"""
+        positions = sorted(changed)
+
+        # Analisi: righe in cache corrette, blocchi dei giorni toccati rigenerati (chiave = valori)
+        cached = self._analysis_records
+        if cached is not None and cached[0] == self._results_version:
+            for i in positions:
+                cached[1][i] = self.results_df.iloc[i].to_dict()
+        self._refresh_analysis_text()
+
+        if self.tab_built('dashboard') and self._table_arrays is not None:
+            self._update_dashboard_stats()
+            for col, src in RESULTS_TABLE_COLUMNS.items():
+                if src == 'Data':
+                    continue
+                array = self._table_arrays[col]
+                if not array.flags.writeable:
+                    array = self._table_arrays[col] = array.copy()
+                for i in positions:
+                    array[i] = self.results_df[src].iat[i]
+            # Argsort delle colonne numeriche non più valido
+            self._table_argsort_cache = {}
+            if self._table_sort is not None:
+                self._table_order = self._results_table_order()
+            self._render_results_table()
+
+        if self.tab_built('charts'):
+            self._patch_charts(changed)
+
+    def _after_what_if(self, message):
+        """Stato e pannello dopo una modifica (o l'annullamento)"""
+        if self.tab_built('dashboard'):
+            self._show_what_if_current()
+            self.edit_log_label.config(text=f"{len(self._what_if_log)} modifiche" if self._what_if_log else "")
+        self.set_status(message)
+
+    # ============== SESSIONE ==============
+
+    def save_session(self):
+        """Salva paths (con impronte), DataFrame unito, risultati e grafico scelto per il prossimo avvio"""
+        if self.df is None or not all((self.csv_path, self.packed_csv_path, self.cisterne_csv_path)):
+            return False
+
+        paths = (self.csv_path, self.packed_csv_path, self.cisterne_csv_path)
+        header = {
+            'format': SESSION_FORMAT,
+            'saved_at': datetime.now().strftime('%d/%m/%Y %H:%M'),
+            'paths': paths,
+            'fingerprints': [file_fingerprint(path) for path in paths],
+            'days': len(self.df),
+        }
+        payload = {
+            'df': self.df,
+            'coverage': self.coverage,
+            'journal_key': self.nan_journal_key,
+            'results': self.results_all,
+            'chart': self.chart_var.get(),
+            'date_range': (self.date_from, self.date_to),
+            'info': self.info_text.get('1.0', 'end-1c'),
+            # df/results contengono le modifiche what-if: si salva anche il log (valori originali)
+            'what_if_log': list(self._what_if_log),
+        }
+
+        os.makedirs(os.path.dirname(SESSION_PATH), exist_ok=True)
+        tmp_path = SESSION_PATH + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, SESSION_PATH)
+        return True
+
+    def on_close(self):
+        """Chiusura finestra (menu, Ctrl+Q, pulsante X): salva la sessione ed esce"""
+        self.stop_live_mode()
+        if self.is_busy():
+            self.cancel_task()
+        try:
+            if self.save_session():
+                print(f"💾 Sessione salvata: {SESSION_PATH}")
+        except Exception as e:
+            print(f"⚠️ Sessione non salvata: {e}")
+        self.root.destroy()
+
+    def offer_session_restore(self):
+        """All'avvio: propone di riaprire l'ultima sessione (solo intestazione letta qui, dati nel worker)"""
+        if self.df is not None or not os.path.exists(SESSION_PATH):
+            return
+
+        try:
+            with open(SESSION_PATH, 'rb') as f:
+                header = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Sessione salvata non leggibile: {e}")
+            return
+        if not isinstance(header, dict) or header.get('format') != SESSION_FORMAT:
+            return
 
-    def _aggregate_packed_hourly(self):
-        """Aggrega i dati Packed orari in dati giornalieri"""
+        names = "\n".join(f"  • {os.path.basename(path)}" for path in header['paths'])
+        if not messagebox.askyesno("Sessione precedente",
+                                   f"Riaprire l'ultima sessione ({header['days']} giorni, "
+                                   f"salvata il {header['saved_at']})?\n\n{names}"):
+            return
+
+        missing = [path for path in header['paths'] if not os.path.exists(path)]
+        if missing:
+            messagebox.showwarning("Attenzione", "File della sessione non più presenti:\n" +
+                                   "\n".join(missing))
+            return
+
+        self._set_input_paths(header['paths'])
+
+        # File modificati dopo il salvataggio → caricamento completo
+        changed = [path for path, fingerprint in zip(header['paths'], header['fingerprints'])
+                   if file_fingerprint(path) != tuple(fingerprint)]
+        if changed:
+            print(f"🔄 File modificati dopo il salvataggio: {', '.join(map(os.path.basename, changed))}")
+            self.load_and_analyze()
+            return
+
+        def work(progress):
+            progress("Lettura sessione salvata...")
+            with open(SESSION_PATH, 'rb') as f:
+                pickle.load(f)  # intestazione, già letta
+                payload = pickle.load(f)
+            payload['fingerprints'] = [tuple(fingerprint) for fingerprint in header['fingerprints']]
+            return payload
+
+        self.run_task("Ripristino sessione", work, self._apply_session,
+                      on_error=self._restore_session_failed)
+
+    def _set_input_paths(self, paths):
+        """Imposta i 3 CSV selezionati (stato e campi del tab Carica Dati)"""
+        self.csv_path, self.packed_csv_path, self.cisterne_csv_path = paths
+        self.csv_path_var.set(self.csv_path)
+        self.packed_csv_path_var.set(self.packed_csv_path)
+        self.cisterne_csv_path_var.set(self.cisterne_csv_path)
+
+    def _apply_session(self, payload):
+        """Ripristina lo stato salvato senza rileggere né ricalcolare (thread Tk)"""
+        self.df = payload['df']
+        self.df_packed = None  # Griglie orarie non salvate: servono solo al caricamento
+        self.df_cisterne = None
+        self._what_if_log = []
+        self.coverage = payload['coverage']
+        self.nan_journal_key = payload['journal_key']
+        self.input_fingerprints = payload['fingerprints']
+        self.update_info_text(payload['info'])
+        self.chart_var.set(payload['chart'])
+
+        self.date_from, self.date_to = payload['date_range']
+        self.date_from_var.set(self.date_from.strftime('%d/%m/%Y') if self.date_from is not None else "")
+        self.date_to_var.set(self.date_to.strftime('%d/%m/%Y') if self.date_to is not None else "")
+
+        if payload['results'] is not None:
+            self._apply_results(payload['results'], notify=False)
+            # Dopo _apply_results (che aggiorna le viste): modifiche what-if ancora annullabili
+            self._what_if_log = list(payload['what_if_log'])
+            edits = f", {len(self._what_if_log)} modifiche what-if" if self._what_if_log else ""
+            if self._what_if_log and self.tab_built('dashboard'):
+                self.edit_log_label.config(text=f"{len(self._what_if_log)} modifiche")
+            self.set_status(f"Sessione ripristinata: {len(self.results_all)} giorni{edits}")
+        else:
+            self.set_status(f"Sessione ripristinata: {len(self.df)} righe (risultati da calcolare)")
+
+    def _restore_session_failed(self, error):
+        """Sessione illeggibile (versione pandas diversa, file corrotto...) → caricamento completo"""
+        print(f"⚠️ Ripristino sessione fallito ({error}): caricamento completo dei CSV")
+        self.load_and_analyze()
+
+    # ============== DATASET MULTIPLI E CONFRONTO ==============
+
+    def _dataset_key(self, paths, fingerprints):
+        """Chiave di un dataset: i 3 path con le loro impronte (stessi file invariati → stessi risultati)"""
+        return tuple((path, tuple(fingerprint)) for path, fingerprint in zip(paths, fingerprints))
+
+    def _remember_dataset(self):
+        """Registra (o aggiorna) il dataset attivo nella cache: solo riferimenti, nessuna copia"""
+        if self.results_all is None or self.input_fingerprints is None:
+            return
+
+        paths = (self.csv_path, self.packed_csv_path, self.cisterne_csv_path)
+        key = self._dataset_key(paths, self.input_fingerprints)
+        self.datasets.pop(key, None)  # in fondo = usato più di recente
+        self.datasets[key] = {
+            'paths': paths,
+            'fingerprints': list(self.input_fingerprints),
+            'df': self.df,
+            'df_packed': self.df_packed,
+            'df_cisterne': self.df_cisterne,
+            'coverage': self.coverage,
+            'journal_key': self.nan_journal_key,
+            'results': self.results_all,
+            'date_index': self._date_index,
+            'date_range': (self.date_from, self.date_to),
+            'what_if_log': self._what_if_log,
+            'info': self.info_text.get('1.0', 'end-1c'),
+        }
+        self.active_dataset = key
+
+        # Oltre il limite esce il dataset usato meno di recente (mai quello attivo, che è l'ultimo)
+        while len(self.datasets) > DATASET_CACHE_MAX:
+            del self.datasets[next(iter(self.datasets))]
+
+        self._refresh_dataset_combo()
+
+    def _dataset_label(self, key):
+        """Etichetta nel menu: CSV Stock e primo/ultimo giorno"""
+        entry = self.datasets[key]
+        index = entry['date_index']
+        label = os.path.basename(entry['paths'][0])
+        if len(index):
+            first = pd.Timestamp(index[0]).strftime('%d/%m/%Y')
+            last = pd.Timestamp(index[-1]).strftime('%d/%m/%Y')
+            label += f" ({first} - {last})"
+        return label
+
+    def _dataset_results(self, key):
+        """Risultati del periodo di un dataset (per quello attivo: la vista corrente)"""
+        if key == self.active_dataset:
+            return self.results_df
+        entry = self.datasets[key]
+        start, stop = date_range_positions(entry['date_index'], *entry['date_range'])
+        return entry['results'].iloc[start:stop]
+
+    def _refresh_dataset_combo(self):
+        """Elenco dei dataset in memoria nella barra del periodo (e nel tab Confronto)"""
+        keys = list(self.datasets)
+        self.dataset_combo.config(values=[f"{i + 1}. {self._dataset_label(key)}" for i, key in enumerate(keys)])
+        if self.active_dataset in self.datasets:
+            self.dataset_combo.current(keys.index(self.active_dataset))
+        else:
+            self.dataset_combo.set("")
+
+    def _on_dataset_selected(self, event=None):
+        """Scelta di un altro dataset dal menu della barra del periodo"""
+        keys = list(self.datasets)
+        index = self.dataset_combo.current()
+        if 0 <= index < len(keys):
+            self.switch_dataset(keys[index])
+
+    def switch_dataset(self, key):
+        """
+        Rende attivo un dataset già calcolato: si scambiano solo i riferimenti
+        (df, copertura, risultati, indice date), nessuna lettura né ricalcolo.
+        """
+        if key == self.active_dataset:
+            return
+        if self.is_busy():
+            messagebox.showwarning("Attenzione", "Attendi il termine dell'operazione in corso")
+            self._refresh_dataset_combo()
+            return
+
+        # Periodo e modifiche del dataset lasciato restano nella sua voce
+        self._remember_dataset()
+        entry = self.datasets.pop(key)
+        self.datasets[key] = entry
+
+        # La modalità live segue i file del dataset attivo
+        if self.live_var.get():
+            self.stop_live_mode()
+            self.live_var.set(False)
+
+        self._set_input_paths(entry['paths'])
+        self.input_fingerprints = entry['fingerprints']
+        self.df = entry['df']
+        self.df_packed = entry['df_packed']
+        self.df_cisterne = entry['df_cisterne']
+        self.coverage = entry['coverage']
+        self.nan_journal_key = entry['journal_key']
+        self._what_if_log = entry['what_if_log']
+        self.update_info_text(entry['info'])
+
+        self.results_all = entry['results']
+        self._date_index = entry['date_index']
+        self.date_from, self.date_to = entry['date_range']
+        self.date_from_var.set(self.date_from.strftime('%d/%m/%Y') if self.date_from is not None else "")
+        self.date_to_var.set(self.date_to.strftime('%d/%m/%Y') if self.date_to is not None else "")
+        self.active_dataset = key
+
+        self._set_results_view()
+        self._refresh_dataset_combo()
+        self._refresh_views()
+        self.set_status(f"Dataset attivo: {self._dataset_label(key)}")
+
+    def update_comparison(self):
+        """Confronto dataset attivo (A) / dataset scelto (B) dai risultati in cache: grafico e tabella"""
+        if not self.tab_built('compare'):
+            return
+
+        others = [key for key in self.datasets if key != self.active_dataset]
+        previous = None
+        if self._compare_keys and 0 <= self.compare_combo.current() < len(self._compare_keys):
+            previous = self._compare_keys[self.compare_combo.current()]
+        self._compare_keys = others
+        self.compare_combo.config(values=[self._dataset_label(key) for key in others])
+
+        ax, diff_ax = self._compare_ax, self._compare_diff_ax
+        ax.clear()
+        diff_ax.clear()
+        self.compare_tree.delete(*self.compare_tree.get_children())
+
+        if self.active_dataset not in self.datasets or not others:
+            self.compare_a_label.config(text="A (attivo): --")
+            self.compare_combo.set("")
+            self.compare_summary_label.config(
+                text="Carica almeno due dataset (Carica e Analizza con altri CSV) per confrontarli")
+            self.compare_canvas.draw_idle()
+            return
+
+        key_b = previous if previous in others else others[-1]
+        self.compare_combo.current(others.index(key_b))
+        self.compare_a_label.config(text=f"A (attivo): {self._dataset_label(self.active_dataset)}")
+
+        table = compare_results(self._dataset_results(self.active_dataset), self._dataset_results(key_b))
+        total_a = table['Produced A'].sum()
+        total_b = table['Produced B'].sum()
+        delta_perc = f" ({(total_b - total_a) / total_a * 100:+.1f}%)" if total_a else ""
+        self.compare_summary_label.config(
+            text=f"Produced totale  A: {total_a:,.2f} hl  |  B: {total_b:,.2f} hl  |  "
+                 f"Δ: {total_b - total_a:+,.2f} hl{delta_perc}")
+
+        # Grafico: sovrapposizione per giorno del periodo + differenza B - A
+        days = table['Giorno'].to_numpy()
+        ax.plot(days, table['Produced A'], marker='o', markersize=3, linewidth=1.5,
+                color='#2E86AB', label='A')
+        ax.plot(days, table['Produced B'], marker='o', markersize=3, linewidth=1.5,
+                color='#F18F01', label='B')
+        ax.set_ylabel('Produced (hl)')
+        ax.legend(loc='upper right')
+        ax.grid(True, alpha=0.3)
+
+        delta = table['Δ Produced'].to_numpy(dtype=float)
+        diff_ax.bar(days, np.nan_to_num(delta), color=np.where(delta < 0, '#E63946', '#06A77D'), alpha=0.8)
+        diff_ax.axhline(0, color='black', linewidth=0.8)
+        diff_ax.set_ylabel('Δ B - A (hl)')
+        diff_ax.set_xlabel('Giorno del periodo')
+        diff_ax.grid(True, alpha=0.3)
+        self.compare_canvas.draw_idle()
+
+        # Tabella: una riga per giorno, in rosso i giorni in cui B produce meno di A
+        def fmt(value, spec):
+            return format(value, spec) if pd.notna(value) else "--"
+
+        for row in table.itertuples(index=False):
+            self.compare_tree.insert('', 'end', tags=('worse',) if row[5] < 0 else (), values=(
+                row[0],
+                str(row[1])[:10] if pd.notna(row[1]) else "--",
+                str(row[2])[:10] if pd.notna(row[2]) else "--",
+                fmt(row[3], '.2f'), fmt(row[4], '.2f'), fmt(row[5], '+.2f'), fmt(row[6], '+.1f'),
+                fmt(row[7], '+.2f'), fmt(row[8], '+.2f'), fmt(row[9], '+.2f'),
+            ))
+
+    # ============== MODALITÀ LIVE ==============
+
+    def toggle_live_mode(self):
+        """Attiva/disattiva l'aggiornamento automatico dai 3 CSV (menu Strumenti e tab Carica Dati)"""
+        if not self.live_var.get():
+            self.stop_live_mode()
+            self.set_status("Modalità live disattivata")
+            return
+
+        if self.df is None or self.input_fingerprints is None:
+            self.live_var.set(False)
+            messagebox.showwarning("Attenzione", "Carica e analizza i file CSV prima di attivare la modalità live")
+            return
+
+        self.start_live_mode()
+
+    def start_live_mode(self):
+        """Avvia (o riavvia) il thread che controlla i CSV caricati"""
+        self.stop_live_mode()
+        paths = (self.csv_path, self.packed_csv_path, self.cisterne_csv_path)
+        live_queue = queue.Queue()
+        stop = threading.Event()
+
+        self._live_queue = live_queue
+        self._live_stop = stop
+        self._live_thread = threading.Thread(
+            target=self._live_worker,
+            args=(paths, list(self.input_fingerprints), self.nan_journal_key, stop, live_queue),
+            name="live", daemon=True)
+        self._live_thread.start()
+
+        self.set_status(f"🔴 Live attivo: controllo dei file ogni {LIVE_POLL_S} s")
+        self.root.after(LIVE_QUEUE_MS, self._poll_live_queue, live_queue)
+
+    def stop_live_mode(self):
+        """Ferma il thread live (termina al prossimo controllo, la sua coda viene ignorata)"""
+        if self._live_stop is not None:
+            self._live_stop.set()
+        self._live_thread = None
+        self._live_stop = None
+        self._live_queue = None
+
+    def _live_worker(self, paths, fingerprints, journal_key, stop, live_queue):
+        """
+        Thread live: ogni LIVE_POLL_S secondi confronta dimensione e data dei CSV e prepara
+        l'aggiornamento con le sole righe aggiunte (nessun widget Tk: tutto passa dalla coda).
+        fingerprints = impronte dei file da cui provengono i dati mostrati nella GUI.
+        """
+        ensure_heavy_modules()
+        state = None
+        while not stop.is_set():
+            try:
+                if state is None:
+                    state, contents = self._live_open(paths)
+                    if state['fingerprints'] != fingerprints:
+                        # File cambiati dopo il caricamento: non si sa cosa è nuovo → ricarica completa
+                        data = self._compute_load(*paths, lambda *args: None,
+                                                  sources=[io.BytesIO(content) for content in contents])
+                        data['fingerprints'] = state['fingerprints']
+                        journal_key = data['journal_key']
+                        live_queue.put(('reload', data))
+                else:
+                    update = self._live_poll(state, paths, journal_key)
+                    if update == 'rewritten':
+                        state = None
+                        continue
+                    if update is not None:
+                        live_queue.put(('update', update))
+                fingerprints = state['fingerprints']
+            except Exception as e:
+                # File a metà scrittura, CSV illeggibile...: al prossimo giro si riparte da capo
+                state = None
+                live_queue.put(('error', e))
+            stop.wait(LIVE_POLL_S)
+
+    def _live_open(self, paths):
+        """Legge i 3 CSV per intero: offset di lettura, intestazioni e righe orarie grezze (thread live)"""
+        fingerprints = [file_fingerprint(path) for path in paths]
+        contents, offsets, headers = [], [], []
+        for path in paths:
+            data, offset = read_appended_lines(path, 0)
+            contents.append(data)
+            offsets.append(offset)
+            headers.append(data[:data.find(b'\n') + 1])
+
+        state = {'fingerprints': fingerprints, 'offsets': offsets, 'headers': headers}
+        notices = []
+        for key, content, aggregate in (('packed', contents[1], self._aggregate_packed_hourly),
+                                        ('cisterne', contents[2], self._aggregate_cisterne_hourly)):
+            raw = pd.read_csv(io.BytesIO(content))
+            daily, _, coverage = aggregate(raw.copy(), notices)
+            state[key] = {'raw': raw, 'times': self._hourly_times(raw), 'daily': daily, 'coverage': coverage}
+        return state, contents
+
+    def _live_poll(self, state, paths, journal_key):
+        """
+        Un controllo dei CSV (thread live). None se invariati, 'rewritten' se un file non è
+        cresciuto per aggiunta in coda, altrimenti l'aggiornamento da applicare nel thread Tk.
+        """
+        current = [file_fingerprint(path) for path in paths]
+        if current == state['fingerprints']:
+            return None
+
+        for path, (size, _), offset, header in zip(paths, current, state['offsets'], state['headers']):
+            with open(path, 'rb') as f:
+                same_header = f.read(len(header)) == header
+            if size < offset or not same_header:
+                return 'rewritten'
+
+        frames = []
+        for i, path in enumerate(paths):
+            data, state['offsets'][i] = read_appended_lines(path, state['offsets'][i])
+            frames.append(pd.read_csv(io.BytesIO(state['headers'][i] + data)) if data else None)
+        state['fingerprints'] = current
+        stock_new, packed_new, cisterne_new = frames
+
+        notices = []
+        days = set()
+        if packed_new is not None and len(packed_new):
+            days |= self._live_extend_hourly(state['packed'], packed_new, self._aggregate_packed_hourly, notices)
+        if cisterne_new is not None and len(cisterne_new):
+            days |= self._live_extend_hourly(state['cisterne'], cisterne_new, self._aggregate_cisterne_hourly,
+                                             notices)
+        if stock_new is None and not days:
+            return None
+
+        packed, cisterne = state['packed'], state['cisterne']
+        update = {
+            'packed_daily': packed['daily'][packed['daily']['Date'].isin(days)],
+            'cisterne_daily': cisterne['daily'][cisterne['daily']['Date'].isin(days)],
+            'coverage': build_coverage_index(sorted(days), packed['coverage'], cisterne['coverage']),
+            'new_stock': None,
+            'notices': notices,
+        }
+
+        if stock_new is not None and len(stock_new):
+            new_stock = self._merge_stock_packed_cisterne(stock_new, packed['daily'], cisterne['daily'])
+            handler = NaNHandler(new_stock, journal_key=journal_key)
+            handler.apply_journal()
+            update['new_stock'] = new_stock
+            update['new_coverage'] = build_coverage_index(stock_new['Date'], packed['coverage'],
+                                                          cisterne['coverage'])
+        return update
+
+    def _live_extend_hourly(self, source, new_rows, aggregate, notices):
+        """
+        Aggiunge righe orarie a una fonte (Packed o Cisterne) e ri-aggrega solo i giorni toccati.
+        Si parte dal giorno precedente al primo giorno nuovo, così il riempimento dei buchi a
+        cavallo della mezzanotte (ffill/linear) vede le stesse ore del caricamento completo.
+        Ritorna le date (datetime.date) ricalcolate.
+        """
+        new_times = self._hourly_times(new_rows)
+        source['raw'] = pd.concat([source['raw'], new_rows], ignore_index=True)
+        source['times'] = np.concatenate([source['times'], new_times])
+
+        first_day = pd.Timestamp(new_times.min()).normalize()
+        context = (first_day - pd.Timedelta(days=1)).to_datetime64()
+        window = source['raw'][source['times'] >= context]
+
+        daily, _, coverage = aggregate(window.copy(), notices)
+        keep_daily = daily['Date'] >= first_day.date()
+        keep_coverage = coverage['Date'] >= first_day.date()
+
+        old_daily, old_coverage = source['daily'], source['coverage']
+        source['daily'] = pd.concat([old_daily[old_daily['Date'] < first_day.date()], daily[keep_daily]],
+                                    ignore_index=True)
+        source['coverage'] = pd.concat([old_coverage[old_coverage['Date'] < first_day.date()],
+                                        coverage[keep_coverage]], ignore_index=True)
+        return set(daily.loc[keep_daily, 'Date'])
+
+    def _hourly_times(self, frame):
+        """Timestamp delle righe di un CSV orario come datetime64 (stessa colonna scelta dall'aggregazione)"""
+        for col in ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']:
+            if col in frame.columns:
+                break
+        else:
+            col = frame.columns[0]
+        return pd.to_datetime(frame[col]).to_numpy(dtype='datetime64[ns]')
+
+    def _poll_live_queue(self, live_queue):
+        """Applica gli aggiornamenti del thread live (thread Tk); rimandati se un'operazione è in corso"""
+        if live_queue is not self._live_queue:
+            return  # modalità live fermata o riavviata
+
+        while not self.is_busy():
+            try:
+                kind, payload = live_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if kind == 'update':
+                    self._apply_live_update(payload)
+                elif kind == 'reload':
+                    print("🔄 Live: file riscritti, ricarica completa")
+                    self._apply_load(payload, notify=False)
+                else:
+                    self.set_status(f"⚠️ Live: {payload}")
+            except Exception as e:
+                print(f"⚠️ Live: aggiornamento non applicato ({e})")
+                self.set_status(f"⚠️ Live: aggiornamento non applicato ({e})")
+
+        self.root.after(LIVE_QUEUE_MS, self._poll_live_queue, live_queue)
+
+    def _apply_live_update(self, update):
+        """
+        Applica le righe aggiunte ai CSV (thread Tk): i giorni già presenti vengono corretti sul
+        posto, quelli nuovi calcolati partendo dall'ultimo Stock Finale e accodati.
+        Nessun popup: avvisi e NaN finiscono nella barra di stato.
+        """
+        n_results = len(self.results_all) if self.results_all is not None else 0
+        aligned = self.results_all is not None and n_results == len(self.df)
+        df_index = self._date_index if aligned else build_date_index(self.df['Time'])
+
+        # Giorni esistenti con nuove ore Packed/Cisterne
+        changed = set()
+        for frame in (update['packed_daily'], update['cisterne_daily']):
+            columns = [col for col in frame.columns if col != 'Date' and col in self.df.columns]
+            for record in frame.to_dict('records'):
+                start, stop = date_range_positions(df_index, record['Date'], record['Date'])
+                for pos in range(start, stop):
+                    for col in columns:
+                        value = record[col]
+                        self._set_df_value(pos, col, 0 if pd.isna(value) else value)
+                    changed.add(pos)
+
+        coverage = update['coverage'].set_index('Date')
+        if changed and self.coverage is not None and len(self.coverage) == len(self.df):
+            for pos in changed:
+                date = self.coverage['Date'].iat[pos]
+                if date in coverage.index:
+                    for col in coverage.columns:
+                        self.coverage.iat[pos, self.coverage.columns.get_loc(col)] = coverage.at[date, col]
+
+        # Giorni nuovi (le righe già presenti, es. riga letta a metà al caricamento, vengono ignorate)
+        new_df = update['new_stock']
+        new_results = None
+        if new_df is not None:
+            times = build_date_index(new_df['Time'])
+            keep = times > df_index[-1] if len(df_index) else np.ones(len(times), dtype=bool)
+            new_df = new_df[keep].reset_index(drop=True)
+            new_coverage = update['new_coverage'][keep].reset_index(drop=True)
+
+            # Calcolo fino al primo giorno non calcolabile (NaN): da lì in poi le righe restano
+            # in df senza risultati, in attesa di Strumenti → Gestisci NaN (che ricalcola tutto)
+            if aligned:
+                days = []
+                stock_precedente = self.results_all['Stock_Finale'].iat[-1]
+                for i in range(len(new_df)):
+                    try:
+                        day = self._compute_results(new_df.iloc[i:i + 1], lambda *args: None,
+                                                    stock_precedente=stock_precedente)
+                    except ValueError:
+                        break
+                    if pd.isna(day['Produced'].iat[0]):
+                        break
+                    days.append(day)
+                    stock_precedente = day['Stock_Finale'].iat[0]
+                if days:
+                    new_results = pd.concat(days, ignore_index=True)
+                    new_index = times[keep][:len(days)]
+
+            if len(new_df):
+                self.df = pd.concat([self.df, new_df], ignore_index=True)
+                if self.coverage is not None:
+                    self.coverage = pd.concat([self.coverage, new_coverage], ignore_index=True)
+
+        if changed and self.results_all is not None:
+            self._recompute_days(changed, patch=new_results is None)
+
+        if new_results is not None:
+            self.results_all = pd.concat([self.results_all, new_results], ignore_index=True)
+            self._date_index = np.concatenate([self._date_index, new_index])
+            self._set_results_view()
+            self._remember_dataset()
+            self._refresh_views()
+
+        pending = len(self.df) - (len(self.results_all) if self.results_all is not None else 0)
+        message = f"🔴 Live {datetime.now().strftime('%H:%M:%S')}: "
+        message += f"{len(new_results) if new_results is not None else 0} giorni nuovi, "
+        message += f"{len(changed)} giorni aggiornati"
+        if pending > 0:
+            message += f" — ⚠️ {pending} giorni con NaN da risolvere (Strumenti → Gestisci NaN)"
+        for notice in update['notices']:
+            print(f"⚠️ {notice}")
+        self.set_status(message)
+
+    def _aggregate_packed_hourly(self, df_packed, notices):
+        """
+        Aggrega i dati Packed orari in dati giornalieri (+ griglia oraria e copertura per giorno).
+        Gira nel worker thread: gli avvisi vanno in notices, mostrati poi dal thread Tk.
+        """
         # Trova la colonna temporale (può chiamarsi Timestamp, Time, DateTime, etc.)
         time_col = None
         possible_time_cols = ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']
 
         for col in possible_time_cols:
-            if col in self.df_packed.columns:
+            if col in df_packed.columns:
                 time_col = col
                 break
 
         if time_col is None:
             # Usa la prima colonna se non trova nulla
-            time_col = self.df_packed.columns[0]
-            messagebox.showwarning(
-                "Attenzione",
+            time_col = df_packed.columns[0]
+            notices.append(
                 f"Colonna temporale non trovata nel CSV Packed.\n"
                 f"Uso prima colonna: {time_col}\n\n"
-                f"Colonne trovate: {', '.join(self.df_packed.columns)}"
+                f"Colonne trovate: {', '.join(df_packed.columns)}"
             )
 
         # Converti timestamp a datetime
         try:
-            self.df_packed[time_col] = pd.to_datetime(self.df_packed[time_col])
+            df_packed[time_col] = pd.to_datetime(df_packed[time_col])
         except Exception as e:
             raise ValueError(
                 f"❌ Errore conversione timestamp nella colonna '{time_col}'!\n\n"
@@ -623,9 +2151,6 @@ class ProducedGUI:
                 f"Errore: {str(e)}"
             )
 
-        # Estrai solo la data (senza ora)
-        self.df_packed['Date'] = self.df_packed[time_col].dt.date
-
         # Trova colonne Packed (possono avere nomi diversi)
         packed_cols_map = {}
         for orig_name, target_name in [
@@ -638,7 +2163,7 @@ class ProducedGUI:
             ('OW2', 'Packed OW2'),
             ('KEG', 'Packed KEG')
         ]:
-            if orig_name in self.df_packed.columns:
+            if orig_name in df_packed.columns:
                 packed_cols_map[orig_name] = target_name
 
         if not packed_cols_map:
@@ -646,42 +2171,51 @@ class ProducedGUI:
                 f"❌ Colonne Packed non trovate nel CSV!\n\n"
                 f"Colonne richieste: Packed_OW1, Packed_RGB, Packed_OW2, Packed_KEG\n"
                 f"(oppure: OW1, RGB, OW2, KEG)\n\n"
-                f"Colonne trovate nel CSV: {', '.join(self.df_packed.columns)}\n\n"
+                f"Colonne trovate nel CSV: {', '.join(df_packed.columns)}\n\n"
                 f"Verifica il formato del CSV Packed."
             )
 
-        # Aggrega per giorno (somma di tutte le ore)
-        agg_dict = {col: 'sum' for col in packed_cols_map.keys()}
-        packed_daily = self.df_packed.groupby('Date').agg(agg_dict).reset_index()
+        # Griglia oraria completa: ore mancanti riempite e marcate 'Synthesized'
+        df_packed = fill_hourly_gaps(df_packed, time_col, list(packed_cols_map.keys()),
+                                          how='sum', **PACKED_GAP_FILL)
+
+        # Estrai solo la data (senza ora)
+        df_packed['Date'] = df_packed[time_col].dt.date
+
+        # Aggrega per giorno (somma di tutte le ore) + copertura nello stesso groupby
+        packed_daily, packed_coverage = aggregate_hourly_grid(df_packed, time_col,
+                                                              list(packed_cols_map.keys()), 'sum')
 
         # Rinomina colonne per compatibilità
         packed_daily = packed_daily.rename(columns=packed_cols_map)
 
-        return packed_daily
+        return packed_daily, df_packed, packed_coverage
 
-    def _aggregate_cisterne_hourly(self):
-        """Aggrega i dati Cisterne orari in dati giornalieri"""
+    def _aggregate_cisterne_hourly(self, df_cisterne, notices):
+        """
+        Aggrega i dati Cisterne orari in dati giornalieri (+ griglia oraria e copertura per giorno).
+        Gira nel worker thread: gli avvisi vanno in notices, mostrati poi dal thread Tk.
+        """
         # Trova la colonna temporale
         time_col = None
         possible_time_cols = ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']
 
         for col in possible_time_cols:
-            if col in self.df_cisterne.columns:
+            if col in df_cisterne.columns:
                 time_col = col
                 break
 
         if time_col is None:
-            time_col = self.df_cisterne.columns[0]
-            messagebox.showwarning(
-                "Attenzione",
+            time_col = df_cisterne.columns[0]
+            notices.append(
                 f"Colonna temporale non trovata nel CSV Cisterne.\n"
                 f"Uso prima colonna: {time_col}\n\n"
-                f"Colonne trovate: {', '.join(self.df_cisterne.columns)}"
+                f"Colonne trovate: {', '.join(df_cisterne.columns)}"
             )
 
         # Converti timestamp a datetime
         try:
-            self.df_cisterne[time_col] = pd.to_datetime(self.df_cisterne[time_col])
+            df_cisterne[time_col] = pd.to_datetime(df_cisterne[time_col])
         except Exception as e:
             raise ValueError(
                 f"❌ Errore conversione timestamp nella colonna '{time_col}'!\n\n"
@@ -690,9 +2224,6 @@ class ProducedGUI:
                 f"Errore: {str(e)}"
             )
 
-        # Estrai solo la data (senza ora)
-        self.df_cisterne['Date'] = self.df_cisterne[time_col].dt.date
-
         # Trova colonne Cisterne (Truck1 e Truck2 con Level e Plato)
         cisterne_cols_map = {}
         for orig_name, target_name in [
@@ -711,25 +2242,32 @@ class ProducedGUI:
             ('Truck2 Plato', 'Truck2 Average Plato'),
             ('Truck2 Average Plato', 'Truck2 Average Plato'),
         ]:
-            if orig_name in self.df_cisterne.columns:
+            if orig_name in df_cisterne.columns:
                 cisterne_cols_map[orig_name] = target_name
 
         if not cisterne_cols_map:
             raise ValueError(
                 f"❌ Colonne Cisterne non trovate nel CSV!\n\n"
                 f"Colonne richieste: Truck1_Level, Truck1_Plato, Truck2_Level, Truck2_Plato\n"
-                f"Colonne trovate nel CSV: {', '.join(self.df_cisterne.columns)}\n\n"
+                f"Colonne trovate nel CSV: {', '.join(df_cisterne.columns)}\n\n"
                 f"Verifica il formato del CSV Cisterne."
             )
 
-        # Aggrega per giorno (media per Level e Plato)
-        agg_dict = {col: 'mean' for col in cisterne_cols_map.keys()}
-        cisterne_daily = self.df_cisterne.groupby('Date').agg(agg_dict).reset_index()
+        # Griglia oraria completa: ore mancanti riempite e marcate 'Synthesized'
+        df_cisterne = fill_hourly_gaps(df_cisterne, time_col, list(cisterne_cols_map.keys()),
+                                            how='mean', **CISTERNE_GAP_FILL)
+
+        # Estrai solo la data (senza ora)
+        df_cisterne['Date'] = df_cisterne[time_col].dt.date
+
+        # Aggrega per giorno (media per Level e Plato) + copertura nello stesso groupby
+        cisterne_daily, cisterne_coverage = aggregate_hourly_grid(df_cisterne, time_col,
+                                                                  list(cisterne_cols_map.keys()), 'mean')
 
         # Rinomina colonne per compatibilità
         cisterne_daily = cisterne_daily.rename(columns=cisterne_cols_map)
 
-        return cisterne_daily
+        return cisterne_daily, df_cisterne, cisterne_coverage
 
     def _merge_stock_packed_cisterne(self, df_stock, df_packed, df_cisterne):
         """Unisce i 3 DataFrame (Stock, Packed, Cisterne) per data"""
@@ -784,7 +2322,11 @@ class ProducedGUI:
             messagebox.showwarning("Attenzione", "Carica prima i file CSV")
             return
 
-        handler = NaNHandler(self.df)
+        if self.is_busy():
+            messagebox.showwarning("Attenzione", "Attendi il termine dell'operazione in corso")
+            return
+
+        handler = NaNHandler(self.df, journal_key=self.nan_journal_key)
         self.df = handler.process()
 
         # Aggiorna info
@@ -793,132 +2335,235 @@ class ProducedGUI:
         # Ricalcola
         self.recalculate_all()
 
-    def recalculate_all(self):
-        """Ricalcola tutti i risultati"""
+    def recalculate_all(self, notify=True):
+        """Ricalcola tutti i risultati (in background)"""
         if self.df is None:
             return
 
+        df = self.df
+        self.run_task("Calcolo risultati",
+                      lambda progress: self._compute_results(df, progress),
+                      lambda results_df: self._apply_results(results_df, notify=notify),
+                      on_error=self._recalculate_failed)
+
+    def _compute_results(self, df, progress, stock_precedente=None):
+        """
+        Calcolo Produced giorno per giorno (worker thread: nessun widget Tk).
+        stock_precedente: Stock Finale del giorno prima della prima riga (giorni aggiunti in live).
+        """
+        results = []
+        n_days = len(df)
+
+        for idx in range(n_days):
+            if idx % 10 == 0:
+                progress(f"Calcolo risultati: giorno {idx + 1}/{n_days}", idx, n_days)
+
+            row = df.iloc[idx]
+
+            # PACKED e CISTERNE
+            packed_total, cisterne_total = self._day_components(row)
+
+            # STOCK INIZIALE = stock finale del giorno precedente (0 per il primo giorno)
+            stock_iniziale = stock_precedente if stock_precedente is not None else 0
+
+            # STOCK FINALE
+            stock_finale = self._stock_total(row)
+            stock_precedente = stock_finale
+
+            # PRODUCED
+            delta_stock = stock_finale - stock_iniziale
+            produced = packed_total + (cisterne_total / 2) + (delta_stock / 2)
+
+            results.append({
+                'Data': row['Time'],
+                'Produced': produced,
+                'Packed': packed_total,
+                'Cisterne': cisterne_total,
+                'Stock_Iniziale': stock_iniziale,
+                'Stock_Finale': stock_finale,
+                'Delta_Stock': delta_stock
+            })
+
+        return pd.DataFrame(results)
+
+    def _day_components(self, row):
+        """Packed totale e Cisterne (hl std) di una riga del DataFrame unito"""
+        # PACKED
+        packed_ow1 = float(row['Packed OW1'])
+        packed_rgb = float(row['Packed RGB'])
+        packed_ow2 = float(row['Packed OW2'])
+        packed_keg = float(row['Packed KEG'])
+        packed_total = packed_ow1 + packed_rgb + packed_ow2 + packed_keg
+
+        # CISTERNE
+        truck1_plato = float(row['Truck1 Average Plato'])
+        truck1_level = float(row['Truck1 Level'])
+        truck1_hl_std = calc_hl_std(truck1_level, truck1_plato, 8)
+
+        truck2_plato = float(row['Truck2 Average Plato'])
+        truck2_level = float(row['Truck2 Level'])
+        truck2_hl_std = calc_hl_std(truck2_level, truck2_plato, 8)
+
+        return packed_total, truck1_hl_std + truck2_hl_std
+
+    def _stock_total(self, row):
+        """Stock (hl std) di BBT + FST in una riga: Stock Finale del giorno, Stock Iniziale del successivo"""
+        stock = 0
+        for tank_num in BBT_TANKS:
+            plato_col = f'BBT {tank_num} Average Plato'
+            level_col = f'BBT{tank_num} Level'
+            material_col = f'BBT{tank_num} Material'
+            if all(col in row.index for col in [plato_col, level_col, material_col]):
+                stock += calc_hl_std(row[level_col],
+                                     row[plato_col],
+                                     row[material_col])
+
+        for tank_num in FST_TANKS:
+            plato_col = f'FST {tank_num} Average Plato'
+            level_col = f'FST{tank_num} Level '
+            material_col = f'FST{tank_num} Material'
+            if all(col in row.index for col in [plato_col, level_col, material_col]):
+                stock += calc_hl_std(row[level_col],
+                                     row[plato_col],
+                                     row[material_col])
+        return stock
+
+    def _apply_results(self, results_df, notify=True):
+        """Salva i risultati e aggiorna dashboard, grafici e analisi (thread Tk)"""
+        self.results_all = results_df
+        self._date_index = build_date_index(results_df['Data'])
+
+        # Periodo non più presente nei nuovi dati → tutti i giorni
+        start, stop = date_range_positions(self._date_index, self.date_from, self.date_to)
+        if start == stop:
+            self.date_from = self.date_to = None
+            self.date_from_var.set("")
+            self.date_to_var.set("")
+
+        self._set_results_view()
+        self._remember_dataset()
+        self._refresh_views()
+
+        self.set_status(f"Calcolo completato: {len(self.results_all)} giorni elaborati")
+        if not notify:
+            return
+
+        # Messaggio successo con eventuale warning
+        success_msg = f"Calcolo completato!\n{len(self.results_all)} giorni elaborati"
+        if len(self.results_df) != len(self.results_all):
+            success_msg += f" ({len(self.results_df)} nel periodo selezionato)"
+        if self.data_warning or self.coverage_warning:
+            warnings = "\n\n".join(w for w in (self.data_warning, self.coverage_warning) if w)
+            success_msg += f"\n\n⚠️ ATTENZIONE:\n{warnings}"
+            messagebox.showwarning("Completato con avvisi", success_msg)
+        else:
+            messagebox.showinfo("Successo", success_msg)
+
+    def _set_results_view(self):
+        """results_df = periodo selezionato di results_all (slice con ricerca binaria, nessun ricalcolo)"""
+        start, stop = date_range_positions(self._date_index, self.date_from, self.date_to)
+        self._view_range = (start, stop)
+        self.results_df = self.results_all.iloc[start:stop]
+        self._results_version += 1
+        self._analysis_start = 0
+        self._update_date_filter_label()
+
+    def _refresh_views(self):
+        """Ridisegna dashboard, grafico e analisi sul periodo corrente (thread Tk)"""
+        # Controlla completezza dati
+        self._check_data_completeness()
+
+        # Aggiorna dashboard
+        self.update_dashboard()
+
+        # Aggiorna grafico
+        self.update_chart()
+
+        # Aggiorna analisi giornaliera (automatico, silenzioso)
+        self._refresh_analysis_text()
+
+        # Confronto con gli altri dataset (periodo del dataset attivo cambiato)
+        if self.tab_built('compare'):
+            self.update_comparison()
+
+    def _view_slice(self, frame):
+        """Righe di un DataFrame allineato a results_all (df unito, coverage) nel periodo corrente"""
+        if frame is None or self._view_range is None or len(frame) != len(self.results_all):
+            return frame
+        start, stop = self._view_range
+        return frame.iloc[start:stop]
+
+    def apply_date_filter(self, event=None):
+        """Applica il periodo inserito nella barra (dal/al) a tutte le viste"""
+        # Il periodo sostituisce results_df: un worker in corso (es. export) lo sta leggendo
+        if self.is_busy():
+            messagebox.showwarning("Attenzione", "Attendi il termine dell'operazione in corso")
+            return
+        ensure_heavy_modules()  # parse_date / date_range_positions da produced_batch
         try:
-            self.set_status("Calcolo risultati in corso...", show_progress=True)
-
-            results = []
-
-            for idx in range(len(self.df)):
-                row = self.df.iloc[idx]
-
-                # PACKED
-                packed_ow1 = float(row['Packed OW1'])
-                packed_rgb = float(row['Packed RGB'])
-                packed_ow2 = float(row['Packed OW2'])
-                packed_keg = float(row['Packed KEG'])
-                packed_total = packed_ow1 + packed_rgb + packed_ow2 + packed_keg
-
-                # CISTERNE
-                truck1_plato = float(row['Truck1 Average Plato'])
-                truck1_level = float(row['Truck1 Level'])
-                truck1_hl_std = calc_hl_std(truck1_level, truck1_plato, 8)
-
-                truck2_plato = float(row['Truck2 Average Plato'])
-                truck2_level = float(row['Truck2 Level'])
-                truck2_hl_std = calc_hl_std(truck2_level, truck2_plato, 8)
-
-                cisterne_total = truck1_hl_std + truck2_hl_std
-
-                # STOCK INIZIALE
-                stock_iniziale = 0
-                if idx > 0:
-                    prev_row = self.df.iloc[idx - 1]
-                    for tank_num in BBT_TANKS:
-                        plato_col = f'BBT {tank_num} Average Plato'
-                        level_col = f'BBT{tank_num} Level'
-                        material_col = f'BBT{tank_num} Material'
-                        if all(col in prev_row.index for col in [plato_col, level_col, material_col]):
-                            stock_iniziale += calc_hl_std(prev_row[level_col],
-                                                          prev_row[plato_col],
-                                                          prev_row[material_col])
-
-                    for tank_num in FST_TANKS:
-                        plato_col = f'FST {tank_num} Average Plato'
-                        level_col = f'FST{tank_num} Level '
-                        material_col = f'FST{tank_num} Material'
-                        if all(col in prev_row.index for col in [plato_col, level_col, material_col]):
-                            stock_iniziale += calc_hl_std(prev_row[level_col],
-                                                          prev_row[plato_col],
-                                                          prev_row[material_col])
-
-                # STOCK FINALE
-                stock_finale = 0
-                for tank_num in BBT_TANKS:
-                    plato_col = f'BBT {tank_num} Average Plato'
-                    level_col = f'BBT{tank_num} Level'
-                    material_col = f'BBT{tank_num} Material'
-                    if all(col in row.index for col in [plato_col, level_col, material_col]):
-                        stock_finale += calc_hl_std(row[level_col],
-                                                    row[plato_col],
-                                                    row[material_col])
-
-                for tank_num in FST_TANKS:
-                    plato_col = f'FST {tank_num} Average Plato'
-                    level_col = f'FST{tank_num} Level '
-                    material_col = f'FST{tank_num} Material'
-                    if all(col in row.index for col in [plato_col, level_col, material_col]):
-                        stock_finale += calc_hl_std(row[level_col],
-                                                    row[plato_col],
-                                                    row[material_col])
-
-                # PRODUCED
-                delta_stock = stock_finale - stock_iniziale
-                produced = packed_total + (cisterne_total / 2) + (delta_stock / 2)
-
-                results.append({
-                    'Data': row['Time'],
-                    'Produced': produced,
-                    'Packed': packed_total,
-                    'Cisterne': cisterne_total,
-                    'Stock_Iniziale': stock_iniziale,
-                    'Stock_Finale': stock_finale,
-                    'Delta_Stock': delta_stock
-                })
-
-            # Salva risultati
-            self.results_df = pd.DataFrame(results)
-
-            # Controlla completezza dati
-            self._check_data_completeness()
-
-            # Aggiorna dashboard
-            self.update_dashboard()
-
-            # Aggiorna grafico
-            self.update_chart()
+            date_from = parse_date(self.date_from_var.get())
+            date_to = parse_date(self.date_to_var.get())
+        except ValueError as e:
+            messagebox.showerror("Errore", str(e))
+            return
 
-            # Aggiorna analisi giornaliera (automatico, silenzioso)
-            if hasattr(self, 'analysis_text'):
-                try:
-                    report_text = self.generate_daily_analysis_report()
-                    self.analysis_text.delete('1.0', tk.END)
-                    self.analysis_text.insert('1.0', report_text)
-                except Exception as e:
-                    print(f"⚠️ Errore aggiornamento analisi: {e}")
+        if date_from is not None and date_to is not None and date_from > date_to:
+            messagebox.showerror("Errore", "La data iniziale è successiva alla data finale")
+            return
 
-            self.set_status(f"Calcolo completato: {len(results)} giorni elaborati")
+        if self.results_all is not None:
+            start, stop = date_range_positions(self._date_index, date_from, date_to)
+            if start == stop:
+                messagebox.showwarning("Attenzione", "Nessun giorno nel periodo selezionato")
+                return
 
-            # Messaggio successo con eventuale warning
-            success_msg = f"Calcolo completato!\n{len(results)} giorni elaborati"
-            if self.data_warning:
-                success_msg += f"\n\n⚠️ ATTENZIONE:\n{self.data_warning}"
-                messagebox.showwarning("Completato con avvisi", success_msg)
-            else:
-                messagebox.showinfo("Successo", success_msg)
+        self.date_from, self.date_to = date_from, date_to
+        if self.results_all is None:
+            self._update_date_filter_label()
+            return
 
-        except Exception as e:
-            self.set_status("Errore durante il calcolo")
-            messagebox.showerror("Errore", f"Errore durante il calcolo:\n{str(e)}")
+        self._set_results_view()
+        self._refresh_views()
+        self.set_status(f"Periodo: {len(self.results_df)} di {len(self.results_all)} giorni")
+
+    def reset_date_filter(self):
+        """Rimuove il filtro periodo (tutti i giorni)"""
+        if self.is_busy():
+            messagebox.showwarning("Attenzione", "Attendi il termine dell'operazione in corso")
+            return
+        self.date_from_var.set("")
+        self.date_to_var.set("")
+        self.apply_date_filter()
+
+    def _update_date_filter_label(self):
+        """Riepilogo del periodo attivo accanto ai campi dal/al"""
+        if self.results_df is None or len(self.results_df) == 0:
+            text = "(gg/mm/aaaa, vuoto = senza limite)"
+        else:
+            first = pd.Timestamp(self._date_index[self._view_range[0]]).strftime('%d/%m/%Y')
+            last = pd.Timestamp(self._date_index[self._view_range[1] - 1]).strftime('%d/%m/%Y')
+            text = f"{len(self.results_df)} di {len(self.results_all)} giorni ({first} - {last})"
+        self.date_filter_label.config(text=text)
+
+    def _recalculate_failed(self, error):
+        """Errore nel worker di calcolo (thread Tk)"""
+        self.set_status("Errore durante il calcolo")
+        messagebox.showerror("Errore", f"Errore durante il calcolo:\n{str(error)}")
 
     def _check_data_completeness(self):
         """Controlla se i dati sono completi o se manca lo stock iniziale del primo giorno"""
         self.data_warning = None
 
+        # Giorni con ore Packed/Cisterne mancanti (dalla copertura calcolata in aggregazione)
+        self.coverage_warning = None
+        coverage = self._view_slice(self.coverage)
+        incomplete_lines = describe_incomplete_days(coverage)
+        if incomplete_lines:
+            self.coverage_warning = (
+                f"{int(coverage['Incompleto'].sum())} giorni con ore Packed/Cisterne mancanti "
+                f"(valori giornalieri parziali):\n" + "\n".join(incomplete_lines)
+            )
+
         if self.results_df is None or len(self.results_df) == 0:
             return
 
@@ -945,17 +2590,28 @@ class ProducedGUI:
 
     def update_dashboard(self):
         """Aggiorna il dashboard con i risultati"""
-        if self.results_df is None:
+        if self.results_df is None or not self.tab_built('dashboard'):
             return
 
         # Mostra/nascondi warning
-        if self.data_warning:
-            self.warning_label.config(text=self.data_warning)
+        warnings = [w for w in (self.data_warning, self.coverage_warning) if w]
+        if warnings:
+            self.warning_label.config(text="\n\n".join(warnings))
             self.warning_frame.pack(fill='x', pady=5, before=self.warning_frame.master.winfo_children()[2])
         else:
             self.warning_frame.pack_forget()
 
         # Aggiorna statistiche
+        self._update_dashboard_stats()
+
+        # Tabella virtuale: solo array + righe visibili, nessun insert per giorno
+        self._set_results_table(self.results_df)
+
+        # Modifica what-if: giorni del periodo e colonne modificabili
+        self._refresh_what_if_panel()
+
+    def _update_dashboard_stats(self):
+        """Statistiche generali del periodo (somme/medie vettoriali)"""
         self.stat_labels['days'].config(text=str(len(self.results_df)))
         self.stat_labels['total_produced'].config(
             text=f"{self.results_df['Produced'].sum():.2f}")
@@ -965,30 +2621,232 @@ class ProducedGUI:
             text=f"{self.results_df['Packed'].sum():.2f}")
         self.stat_labels['total_cisterne'].config(
             text=f"{self.results_df['Cisterne'].sum():.2f}")
+        self.stat_labels['incomplete_days'].config(
+            text=str(int(self._view_slice(self.coverage)['Incompleto'].sum())) if self.coverage is not None else "--")
+
+    # ============== TABELLA RISULTATI VIRTUALE ==============
+
+    def _set_results_table(self, results_df):
+        """Carica i risultati come array (nessuna formattazione) e ridisegna le righe visibili"""
+        # Selezione mantenuta per data: le posizioni cambiano con il periodo/dataset
+        selected_date = None
+        if self._table_selected is not None and self._table_arrays is not None:
+            selected_date = self._table_arrays['Data'][self._table_selected]
+        self._table_selected = None
+        self._table_argsort_cache = {}
+        self._table_offset = 0
+
+        if results_df is None or len(results_df) == 0:
+            self._table_arrays = None
+            self._table_tags = None
+            self._table_order = None
+        else:
+            self._table_arrays = {col: results_df[src].to_numpy()
+                                  for col, src in RESULTS_TABLE_COLUMNS.items()}
+
+            # Tag per riga: primo giorno con warning, giorni con ore mancanti
+            tags = np.full(len(results_df), '', dtype=object)
+            coverage = self._view_slice(self.coverage)
+            if coverage is not None and len(coverage) == len(results_df):
+                tags[coverage['Incompleto'].to_numpy(dtype=bool)] = 'incomplete'
+            if self.data_warning:
+                tags[0] = 'warning'
+            self._table_tags = tags
+
+            self._table_order = self._results_table_order()
+
+            if selected_date is not None:
+                matches = np.flatnonzero(self._table_arrays['Data'] == selected_date)
+                if len(matches):
+                    self._table_selected = int(matches[0])
+
+        self._render_results_table()
+
+    def _results_table_order(self):
+        """Permutazione delle righe per l'ordinamento corrente (argsort in cache per colonna)"""
+        n_rows = len(self._table_tags)
+        if self._table_sort is None:
+            return np.arange(n_rows)
+
+        col, descending = self._table_sort
+        order = self._table_argsort_cache.get(col)
+        if order is None:
+            values = self._table_arrays[col]
+            if col == 'Data':
+                values = pd.to_datetime(values, errors='coerce').to_numpy()
+            order = np.argsort(values, kind='stable')
+            self._table_argsort_cache[col] = order
+
+        return order[::-1] if descending else order
+
+    def _sort_results_table(self, col):
+        """Click su intestazione: ordina per colonna (secondo click inverte)"""
+        if self._table_sort is not None and self._table_sort[0] == col:
+            self._table_sort = (col, not self._table_sort[1])
+        else:
+            self._table_sort = (col, False)
+
+        for name in RESULTS_TABLE_COLUMNS:
+            arrow = ''
+            if name == col:
+                arrow = ' ▼' if self._table_sort[1] else ' ▲'
+            self.results_tree.heading(name, text=name + arrow)
+
+        if self._table_arrays is not None:
+            self._table_order = self._results_table_order()
+            self._table_offset = 0
+        self._render_results_table()
+
+    def _format_results_row(self, idx):
+        """Valori formattati di una riga (solo per le righe visibili)"""
+        tag = self._table_tags[idx]
+        values = []
+        for col, array in self._table_arrays.items():
+            value = array[idx]
+            if col == 'Data':
+                values.append(f"⚠️ {value}" if tag == 'warning' else value)
+            else:
+                values.append(f"{value:.2f}")
+        return values, ((tag,) if tag else ())
+
+    def _visible_results_rows(self):
+        """Numero di righe intere visibili nel Treeview"""
+        return max(1, len(self._table_pool) - RESULTS_TABLE_MARGIN_ROWS)
+
+    def _render_results_table(self):
+        """Riempie il pool di righe con la finestra [offset, offset + visibili)"""
+        total = 0 if self._table_order is None else len(self._table_order)
+        visible = self._visible_results_rows()
+        self._table_offset = max(0, min(self._table_offset, total - visible))
+
+        for i, iid in enumerate(self._table_pool):
+            pos = self._table_offset + i
+            if pos < total:
+                values, tags = self._format_results_row(self._table_order[pos])
+                self.results_tree.item(iid, values=values, tags=tags)
+            else:
+                self.results_tree.item(iid, values=(), tags=())
+
+        # Evidenzia la riga del pool che mostra il giorno selezionato (se è nella finestra)
+        selected_iid = None
+        if self._table_selected is not None and total:
+            window = self._table_order[self._table_offset:self._table_offset + visible]
+            slots = np.flatnonzero(window == self._table_selected)
+            if len(slots):
+                selected_iid = self._table_pool[int(slots[0])]
+        if selected_iid is None:
+            if self.results_tree.selection():
+                self.results_tree.selection_remove(self.results_tree.selection())
+        elif self.results_tree.selection() != (selected_iid,):
+            self.results_tree.selection_set(selected_iid)
+            self.results_tree.focus(selected_iid)
+
+        if total:
+            self.results_scrollbar.set(self._table_offset / total,
+                                       min(1.0, (self._table_offset + visible) / total))
+        else:
+            self.results_scrollbar.set(0.0, 1.0)
+
+    def _results_row_metrics(self):
+        """
+        (altezza riga, altezza intestazione) del Treeview in pixel. Misurate sulla prima riga
+        del pool quando è disegnata (scala DPI e font di Windows), altrimenti dallo stile
+        ('rowheight') o dal font di default.
+        """
+        if self._table_pool:
+            bbox = self.results_tree.bbox(self._table_pool[0])
+            if bbox and bbox[3] > 0:
+                return bbox[3], bbox[1]
 
-        # Pulisci tabella
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-
-        # Configura tag per primo giorno con warning
-        self.results_tree.tag_configure('warning', background='#ffcccc')
-
-        # Popola tabella
-        for idx, row in self.results_df.iterrows():
-            # Marca primo giorno se c'è warning
-            tags = ()
-            if idx == 0 and self.data_warning:
-                tags = ('warning',)
-
-            self.results_tree.insert('', 'end', values=(
-                f"⚠️ {row['Data']}" if (idx == 0 and self.data_warning) else row['Data'],
-                f"{row['Produced']:.2f}",
-                f"{row['Packed']:.2f}",
-                f"{row['Cisterne']:.2f}",
-                f"{row['Stock_Iniziale']:.2f}",
-                f"{row['Stock_Finale']:.2f}",
-                f"{row['Delta_Stock']:.2f}"
-            ), tags=tags)
+        try:
+            row_height = int(float(ttk.Style(self.results_tree).lookup('Treeview', 'rowheight') or 0))
+        except (tk.TclError, ValueError):
+            row_height = 0
+        if row_height <= 0:
+            try:
+                row_height = tkfont.nametofont('TkDefaultFont', root=self.results_tree).metrics('linespace') + 2
+            except tk.TclError:
+                row_height = RESULTS_TABLE_ROW_HEIGHT
+        return row_height, row_height + 5
+
+    def _resize_results_table(self, event):
+        """Adatta il pool di righe all'altezza del Treeview"""
+        self._results_tree_height = event.height
+        self._fit_results_pool()
+        # Prima del disegno le righe non hanno ancora un bbox: si riadatta con la misura reale
+        self.results_tree.after_idle(self._fit_results_pool)
+
+    def _fit_results_pool(self):
+        """Pool di righe = righe intere che entrano nel Treeview (+ margine per la riga parziale)"""
+        row_height, header = self._results_row_metrics()
+        needed = max(1, (self._results_tree_height - header) // row_height) + RESULTS_TABLE_MARGIN_ROWS
+
+        while len(self._table_pool) < needed:
+            self._table_pool.append(self.results_tree.insert('', 'end', values=()))
+        while len(self._table_pool) > needed:
+            self.results_tree.delete(self._table_pool.pop())
+
+        self._render_results_table()
+
+    def _scroll_results_table(self, action, amount, unit=None):
+        """Comando della scrollbar: 'moveto' frazione oppure 'scroll' n units/pages"""
+        if self._table_order is None:
+            return 'break'
+
+        total = len(self._table_order)
+        visible = self._visible_results_rows()
+        if action == 'moveto':
+            self._table_offset = int(round(float(amount) * total))
+        elif action == 'scroll':
+            step = visible if unit == 'pages' else 1
+            self._table_offset += int(amount) * step
+
+        self._render_results_table()
+        return 'break'
+
+    def _on_results_select(self, event=None):
+        """Click su una riga: memorizza il giorno (posizione in results_df), non la riga del pool"""
+        selection = self.results_tree.selection()
+        if not selection or self._table_order is None or selection[0] not in self._table_pool:
+            return
+        pos = self._table_offset + self._table_pool.index(selection[0])
+        if pos < len(self._table_order):
+            self._table_selected = int(self._table_order[pos])
+        else:
+            self._table_selected = None  # riga vuota in fondo al pool
+            self.results_tree.selection_remove(selection)
+
+    def _move_results_selection(self, amount, unit='units'):
+        """Frecce e Pag su/giù: sposta la selezione di giorno in giorno, scorrendo la finestra ai bordi"""
+        if self._table_order is None:
+            return 'break'
+
+        total = len(self._table_order)
+        visible = self._visible_results_rows()
+        step = amount * (visible if unit == 'pages' else 1)
+        if self._table_selected is None:
+            if unit == 'pages':
+                return self._scroll_results_table('scroll', amount, 'pages')
+            pos = self._table_offset  # nessuna selezione: parte dalla prima riga visibile
+        else:
+            current = np.flatnonzero(self._table_order == self._table_selected)
+            pos = max(0, min(int(current[0]) + step, total - 1)) if len(current) else self._table_offset
+
+        if pos < self._table_offset:
+            self._table_offset = pos
+        elif pos >= self._table_offset + visible:
+            self._table_offset = pos - visible + 1
+        self._table_selected = int(self._table_order[pos])
+        self._render_results_table()
+        return 'break'
+
+    def _wheel_results_table(self, event):
+        """Rotella del mouse (Windows/macOS: delta, Linux: Button-4/5)"""
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            direction = -1
+        else:
+            direction = 1
+        return self._scroll_results_table('scroll', direction * 3, 'units')
 
     def update_daily_analysis(self):
         """Aggiorna l'analisi giornaliera nel tab (chiamata manuale dal pulsante)"""
@@ -997,12 +2855,8 @@ class ProducedGUI:
             return
 
         try:
-            # Genera il report
-            report_text = self.generate_daily_analysis_report()
-
-            # Mostra nel text widget
-            self.analysis_text.delete('1.0', tk.END)
-            self.analysis_text.insert('1.0', report_text)
+            # Mostra la pagina corrente (solo i giorni visibili vengono generati)
+            self._render_analysis_page()
 
             messagebox.showinfo("Completato", f"Analisi generata per {len(self.results_df)} giorni")
         except Exception as e:
@@ -1010,147 +2864,238 @@ class ProducedGUI:
 
     def generate_daily_analysis_report(self):
         """Genera il testo del report di analisi giornaliera"""
+        return "\n".join(self.iter_daily_analysis_blocks())
+
+    def iter_daily_analysis_blocks(self, start=0, stop=None, snapshot=None):
+        """
+        Blocchi di testo del report: intestazione, un blocco per giorno in [start, stop), riepilogo.
+        Uniti con "\\n" danno il report completo; l'export li scrive uno alla volta.
+        snapshot: (righe come dict, results_df) presi nel thread Tk, per l'export nel worker:
+        i blocchi vengono generati da lì, senza leggere results_df né toccare le cache condivise.
+        """
+        if snapshot is None:
+            records, results = self._get_analysis_records(), self.results_df
+        else:
+            records, results = snapshot
+        stop = len(records) if stop is None else min(stop, len(records))
+
+        yield "\n".join([
+            "="*100,
+            " " * 30 + "ANALISI GIORNALIERA DETTAGLIATA - PRODUCED",
+            "="*100,
+            "",
+        ])
+
+        for i in range(max(start, 0), stop):
+            if snapshot is None:
+                yield self._analysis_day_block(records, i)
+            else:
+                yield self._render_analysis_day(records[i], records[i - 1] if i > 0 else None)
+
+        yield self._analysis_summary_block(results)
+
+    def _get_analysis_records(self):
+        """Righe di results_df come dict (ricalcolate solo quando cambiano i risultati)"""
+        cached = self._analysis_records
+        if cached is None or cached[0] != self._results_version:
+            cached = (self._results_version, self.results_df.to_dict('records'))
+            self._analysis_records = cached
+        return cached[1]
+
+    def _analysis_day_block(self, records, i):
+        """Blocco del giorno i, dalla cache se i valori del giorno (e del precedente) non sono cambiati"""
+        row = records[i]
+        prev_row = records[i - 1] if i > 0 else None
+        key = (tuple(row.items()), tuple(prev_row.items()) if prev_row is not None else None)
+
+        block = self._analysis_blocks.get(key)
+        if block is None:
+            block = self._render_analysis_day(row, prev_row)
+            if len(self._analysis_blocks) >= ANALYSIS_CACHE_MAX:
+                self._analysis_blocks.clear()
+            self._analysis_blocks[key] = block
+        return block
+
+    def _render_analysis_day(self, row, prev_row):
+        """Testo di un giorno: breakdown componenti e variazione rispetto al giorno precedente"""
         lines = []
-        lines.append("="*100)
-        lines.append(" " * 30 + "ANALISI GIORNALIERA DETTAGLIATA - PRODUCED")
-        lines.append("="*100)
-        lines.append("")
 
-        # Per ogni giorno
-        for idx, row in self.results_df.iterrows():
-            date_str = pd.to_datetime(row['Data']).strftime('%d/%m/%Y (%A)')
+        date_str = pd.to_datetime(row['Data']).strftime('%d/%m/%Y (%A)')
 
-            lines.append("-" * 100)
-            lines.append(f"📅 {date_str}")
-            lines.append("-" * 100)
+        lines.append("-" * 100)
+        lines.append(f"📅 {date_str}")
+        lines.append("-" * 100)
 
-            # Produced totale
-            produced = row['Produced']
-            lines.append(f"")
-            lines.append(f"🍺 PRODUCED TOTALE: {produced:,.2f} hl")
-            lines.append(f"")
+        # Produced totale
+        produced = row['Produced']
+        lines.append(f"")
+        lines.append(f"🍺 PRODUCED TOTALE: {produced:,.2f} hl")
+        lines.append(f"")
 
-            # Helper per calcolare percentuali (evita divisione per zero)
-            def calc_perc(value, total):
-                return (value / total * 100) if total != 0 else 0.0
+        # Helper per calcolare percentuali (evita divisione per zero)
+        def calc_perc(value, total):
+            return (value / total * 100) if total != 0 else 0.0
+
+        # === BREAKDOWN COMPONENTI ===
+        lines.append("┌─ BREAKDOWN COMPONENTI ─────────────────────────────────────────────────────┐")
+        lines.append("│")
+
+        # PACKED
+        packed_ow1 = row.get('Packed_OW1', row.get('Packed OW1', 0))
+        packed_rgb = row.get('Packed_RGB', row.get('Packed RGB', 0))
+        packed_ow2 = row.get('Packed_OW2', row.get('Packed OW2', 0))
+        packed_keg = row.get('Packed_KEG', row.get('Packed KEG', 0))
+        packed_total = row['Packed']
+
+        lines.append(f"│ 📦 PACKED (imbottigliato/confezionato)")
+        lines.append(f"│    OW1:     {packed_ow1:10,.2f} hl")
+        lines.append(f"│    RGB:     {packed_rgb:10,.2f} hl")
+        lines.append(f"│    OW2:     {packed_ow2:10,.2f} hl")
+        lines.append(f"│    KEG:     {packed_keg:10,.2f} hl")
+        lines.append(f"│    ────────────────────────")
+        lines.append(f"│    TOTALE:  {packed_total:10,.2f} hl  ({calc_perc(packed_total, produced):5.1f}%)")
+        lines.append(f"│")
+
+        # CISTERNE
+        truck1_hl = row.get('Truck1_hl_std', 0)
+        truck2_hl = row.get('Truck2_hl_std', 0)
+        cisterne_total = row['Cisterne']
+        cisterne_contrib = cisterne_total / 2
+
+        lines.append(f"│ 🚛 CISTERNE / 2  (contributo al Produced)")
+        lines.append(f"│    Truck1:    {truck1_hl:10,.2f} hl std")
+        lines.append(f"│    Truck2:    {truck2_hl:10,.2f} hl std")
+        lines.append(f"│    ────────────────────────")
+        lines.append(f"│    Totale:    {cisterne_total:10,.2f} hl std")
+        lines.append(f"│    /2:        {cisterne_contrib:10,.2f} hl  ({calc_perc(cisterne_contrib, produced):5.1f}%)")
+        lines.append(f"│")
+
+        # DELTA STOCK
+        stock_iniz = row['Stock_Iniziale']
+        stock_fin = row['Stock_Finale']
+        delta_stock = row['Delta_Stock']
+        delta_contrib = delta_stock / 2
+
+        stock_trend = "↗️ AUMENTATO" if delta_stock > 0 else ("↘️ DIMINUITO" if delta_stock < 0 else "➡️ INVARIATO")
+
+        lines.append(f"│ 📊 DELTA STOCK / 2  (variazione magazzino)")
+        lines.append(f"│    Stock Iniziale:  {stock_iniz:10,.2f} hl std")
+        lines.append(f"│    Stock Finale:    {stock_fin:10,.2f} hl std")
+        lines.append(f"│    ────────────────────────")
+        lines.append(f"│    Delta:           {delta_stock:10,.2f} hl std  {stock_trend}")
+        lines.append(f"│    /2:              {delta_contrib:10,.2f} hl  ({calc_perc(abs(delta_contrib), produced):5.1f}%)")
+        lines.append(f"│")
+        lines.append(f"└────────────────────────────────────────────────────────────────────────────┘")
+        lines.append(f"")
 
-            # === BREAKDOWN COMPONENTI ===
-            lines.append("┌─ BREAKDOWN COMPONENTI ─────────────────────────────────────────────────────┐")
-            lines.append("│")
+        # === VARIAZIONI RISPETTO AL GIORNO PRECEDENTE ===
+        if prev_row is not None:
+            prev_produced = prev_row['Produced']
+            var_produced = produced - prev_produced
+            var_perc = (var_produced / prev_produced * 100) if prev_produced != 0 else 0
 
-            # PACKED
-            packed_ow1 = row.get('Packed_OW1', row.get('Packed OW1', 0))
-            packed_rgb = row.get('Packed_RGB', row.get('Packed RGB', 0))
-            packed_ow2 = row.get('Packed_OW2', row.get('Packed OW2', 0))
-            packed_keg = row.get('Packed_KEG', row.get('Packed KEG', 0))
-            packed_total = row['Packed']
-
-            lines.append(f"│ 📦 PACKED (imbottigliato/confezionato)")
-            lines.append(f"│    OW1:     {packed_ow1:10,.2f} hl")
-            lines.append(f"│    RGB:     {packed_rgb:10,.2f} hl")
-            lines.append(f"│    OW2:     {packed_ow2:10,.2f} hl")
-            lines.append(f"│    KEG:     {packed_keg:10,.2f} hl")
-            lines.append(f"│    ────────────────────────")
-            lines.append(f"│    TOTALE:  {packed_total:10,.2f} hl  ({calc_perc(packed_total, produced):5.1f}%)")
-            lines.append(f"│")
+            var_trend = "📈 AUMENTO" if var_produced > 0 else ("📉 DIMINUZIONE" if var_produced < 0 else "➡️ STABILE")
 
-            # CISTERNE
-            truck1_hl = row.get('Truck1_hl_std', 0)
-            truck2_hl = row.get('Truck2_hl_std', 0)
-            cisterne_total = row['Cisterne']
-            cisterne_contrib = cisterne_total / 2
-
-            lines.append(f"│ 🚛 CISTERNE / 2  (contributo al Produced)")
-            lines.append(f"│    Truck1:    {truck1_hl:10,.2f} hl std")
-            lines.append(f"│    Truck2:    {truck2_hl:10,.2f} hl std")
-            lines.append(f"│    ────────────────────────")
-            lines.append(f"│    Totale:    {cisterne_total:10,.2f} hl std")
-            lines.append(f"│    /2:        {cisterne_contrib:10,.2f} hl  ({calc_perc(cisterne_contrib, produced):5.1f}%)")
+            lines.append("┌─ VARIAZIONE vs GIORNO PRECEDENTE ──────────────────────────────────────────┐")
+            lines.append("│")
+            lines.append(f"│ {var_trend}")
+            lines.append(f"│")
+            lines.append(f"│ Produced oggi:      {produced:10,.2f} hl")
+            lines.append(f"│ Produced ieri:      {prev_produced:10,.2f} hl")
+            lines.append(f"│ Variazione:         {var_produced:+10,.2f} hl  ({var_perc:+.1f}%)")
             lines.append(f"│")
 
-            # DELTA STOCK
-            stock_iniz = row['Stock_Iniziale']
-            stock_fin = row['Stock_Finale']
-            delta_stock = row['Delta_Stock']
-            delta_contrib = delta_stock / 2
-
-            stock_trend = "↗️ AUMENTATO" if delta_stock > 0 else ("↘️ DIMINUITO" if delta_stock < 0 else "➡️ INVARIATO")
+            # Variazioni componenti
+            var_packed = row['Packed'] - prev_row['Packed']
+            var_cisterne = row['Cisterne'] - prev_row['Cisterne']
+            var_delta_stock = row['Delta_Stock'] - prev_row['Delta_Stock']
 
-            lines.append(f"│ 📊 DELTA STOCK / 2  (variazione magazzino)")
-            lines.append(f"│    Stock Iniziale:  {stock_iniz:10,.2f} hl std")
-            lines.append(f"│    Stock Finale:    {stock_fin:10,.2f} hl std")
-            lines.append(f"│    ────────────────────────")
-            lines.append(f"│    Delta:           {delta_stock:10,.2f} hl std  {stock_trend}")
-            lines.append(f"│    /2:              {delta_contrib:10,.2f} hl  ({calc_perc(abs(delta_contrib), produced):5.1f}%)")
+            lines.append(f"│ Dettaglio variazioni:")
+            lines.append(f"│   Packed:           {var_packed:+10,.2f} hl")
+            lines.append(f"│   Cisterne:         {var_cisterne:+10,.2f} hl")
+            lines.append(f"│   Delta Stock:      {var_delta_stock:+10,.2f} hl")
             lines.append(f"│")
             lines.append(f"└────────────────────────────────────────────────────────────────────────────┘")
             lines.append(f"")
 
-            # === VARIAZIONI RISPETTO AL GIORNO PRECEDENTE ===
-            if idx > 0:
-                prev_row = self.results_df.iloc[idx - 1]
-                prev_produced = prev_row['Produced']
-                var_produced = produced - prev_produced
-                var_perc = (var_produced / prev_produced * 100) if prev_produced != 0 else 0
-
-                var_trend = "📈 AUMENTO" if var_produced > 0 else ("📉 DIMINUZIONE" if var_produced < 0 else "➡️ STABILE")
-
-                lines.append("┌─ VARIAZIONE vs GIORNO PRECEDENTE ──────────────────────────────────────────┐")
-                lines.append("│")
-                lines.append(f"│ {var_trend}")
-                lines.append(f"│")
-                lines.append(f"│ Produced oggi:      {produced:10,.2f} hl")
-                lines.append(f"│ Produced ieri:      {prev_produced:10,.2f} hl")
-                lines.append(f"│ Variazione:         {var_produced:+10,.2f} hl  ({var_perc:+.1f}%)")
-                lines.append(f"│")
-
-                # Variazioni componenti
-                var_packed = row['Packed'] - prev_row['Packed']
-                var_cisterne = row['Cisterne'] - prev_row['Cisterne']
-                var_delta_stock = row['Delta_Stock'] - prev_row['Delta_Stock']
-
-                lines.append(f"│ Dettaglio variazioni:")
-                lines.append(f"│   Packed:           {var_packed:+10,.2f} hl")
-                lines.append(f"│   Cisterne:         {var_cisterne:+10,.2f} hl")
-                lines.append(f"│   Delta Stock:      {var_delta_stock:+10,.2f} hl")
-                lines.append(f"│")
-                lines.append(f"└────────────────────────────────────────────────────────────────────────────┘")
-                lines.append(f"")
-
-            lines.append("")
+        lines.append("")
+
+        return "\n".join(lines)
+
+    def _analysis_summary_block(self, results):
+        """Riepilogo del periodo (sempre sull'intero results_df passato)"""
+        lines = []
 
         # RIEPILOGO FINALE
         lines.append("="*100)
         lines.append(" " * 35 + "RIEPILOGO PERIODO")
         lines.append("="*100)
         lines.append(f"")
-        lines.append(f"Giorni analizzati:         {len(self.results_df)}")
-        lines.append(f"Produced TOTALE:           {self.results_df['Produced'].sum():,.2f} hl")
-        lines.append(f"Produced MEDIO:            {self.results_df['Produced'].mean():,.2f} hl/giorno")
-        lines.append(f"Produced MIN:              {self.results_df['Produced'].min():,.2f} hl  ({pd.to_datetime(self.results_df.loc[self.results_df['Produced'].idxmin(), 'Data']).strftime('%d/%m/%Y')})")
-        lines.append(f"Produced MAX:              {self.results_df['Produced'].max():,.2f} hl  ({pd.to_datetime(self.results_df.loc[self.results_df['Produced'].idxmax(), 'Data']).strftime('%d/%m/%Y')})")
+        lines.append(f"Giorni analizzati:         {len(results)}")
+        lines.append(f"Produced TOTALE:           {results['Produced'].sum():,.2f} hl")
+        lines.append(f"Produced MEDIO:            {results['Produced'].mean():,.2f} hl/giorno")
+        lines.append(f"Produced MIN:              {results['Produced'].min():,.2f} hl  ({pd.to_datetime(results.loc[results['Produced'].idxmin(), 'Data']).strftime('%d/%m/%Y')})")
+        lines.append(f"Produced MAX:              {results['Produced'].max():,.2f} hl  ({pd.to_datetime(results.loc[results['Produced'].idxmax(), 'Data']).strftime('%d/%m/%Y')})")
         lines.append(f"")
-        lines.append(f"Packed TOTALE:             {self.results_df['Packed'].sum():,.2f} hl")
-        lines.append(f"Cisterne TOTALE:           {self.results_df['Cisterne'].sum():,.2f} hl")
-        lines.append(f"Stock Iniziale (1° gg):    {self.results_df.iloc[0]['Stock_Iniziale']:,.2f} hl")
-        lines.append(f"Stock Finale (ultimo gg):  {self.results_df.iloc[-1]['Stock_Finale']:,.2f} hl")
+        lines.append(f"Packed TOTALE:             {results['Packed'].sum():,.2f} hl")
+        lines.append(f"Cisterne TOTALE:           {results['Cisterne'].sum():,.2f} hl")
+        lines.append(f"Stock Iniziale (1° gg):    {results.iloc[0]['Stock_Iniziale']:,.2f} hl")
+        lines.append(f"Stock Finale (ultimo gg):  {results.iloc[-1]['Stock_Finale']:,.2f} hl")
         lines.append(f"")
         lines.append("="*100)
 
         return "\n".join(lines)
 
+    def _render_analysis_page(self):
+        """Mostra nel tab solo la pagina di giorni corrente (più intestazione e riepilogo)"""
+        if not self.tab_built('analysis'):
+            return
+
+        self.analysis_text.delete('1.0', tk.END)
+        if self.results_df is None:
+            self.analysis_day_combo.config(values=[])
+            self.analysis_day_var.set("")
+            self.analysis_page_label.config(text="")
+            return
+
+        records = self._get_analysis_records()
+        n_days = len(records)
+        self._analysis_start = min(max(self._analysis_start, 0), max(n_days - 1, 0))
+        start = self._analysis_start
+        stop = min(start + ANALYSIS_PAGE_DAYS, n_days)
+
+        self.analysis_text.insert('1.0', "\n".join(self.iter_daily_analysis_blocks(start, stop)))
+
+        # Elenco giorni aggiornato solo quando cambiano i risultati
+        if self._analysis_combo_version != self._results_version:
+            self._analysis_combo_version = self._results_version
+            self.analysis_day_combo.config(
+                values=[pd.to_datetime(r['Data']).strftime('%d/%m/%Y') for r in records])
+        if n_days:
+            self.analysis_day_combo.current(start)
+        self.analysis_page_label.config(text=f"Giorni {start + 1}-{stop} di {n_days}")
+
+    def _page_analysis(self, direction):
+        """Pagina precedente/successiva dell'analisi giornaliera"""
+        if self.results_df is None:
+            return
+        self._analysis_start += direction * ANALYSIS_PAGE_DAYS
+        self._render_analysis_page()
+
+    def _on_analysis_day_selected(self, event=None):
+        """Giorno scelto nel menu → pagina che parte da quel giorno"""
+        if self.results_df is None:
+            return
+        self._analysis_start = self.analysis_day_combo.current()
+        self._render_analysis_page()
+
     def export_daily_analysis(self):
         """Esporta l'analisi giornaliera in un file TXT"""
         if self.results_df is None:
             messagebox.showwarning("Attenzione", "Carica prima i dati e calcola Produced")
             return
 
-        # Genera report
-        report_text = self.generate_daily_analysis_report()
-
-        # Dialog salvataggio
-        from tkinter import filedialog
-        import os
+        from datetime import datetime
 
         # Nome file suggerito
         today = datetime.now().strftime('%Y-%m-%d')
@@ -1170,38 +3115,88 @@ class ProducedGUI:
         )
 
         if filepath:
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(report_text)
+            # Snapshot nel thread Tk: il worker non legge results_df né le cache dell'analisi
+            snapshot = (list(self._get_analysis_records()), self.results_df.copy())
 
-                messagebox.showinfo("Completato",
-                                  f"Analisi esportata con successo!\n\n{filepath}")
-            except Exception as e:
-                messagebox.showerror("Errore",
-                                   f"Errore durante l'esportazione:\n{str(e)}")
+            def work(progress):
+                # Blocchi scritti uno alla volta (worker thread): il report non è mai tutto in memoria
+                n_days = len(snapshot[1])
+                name = os.path.basename(filepath)
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    for i, block in enumerate(self.iter_daily_analysis_blocks(snapshot=snapshot)):
+                        if i:
+                            f.write("\n")
+                        f.write(block)
+                        if i % 50 == 0:
+                            progress(f"Scrittura {name}: giorno {min(i, n_days)}/{n_days}", i, n_days + 2)
+                return filepath
+
+            self.run_task("Esportazione analisi", work,
+                          lambda path: self._export_done(f"Analisi esportata con successo!\n\n{path}",
+                                                         title="Completato"),
+                          on_error=lambda e: messagebox.showerror(
+                              "Errore", f"Errore durante l'esportazione:\n{str(e)}"))
+
+    def _refresh_analysis_text(self):
+        """Riscrive la pagina dell'analisi giornaliera (solo se il tab è già costruito)"""
+        if not self.tab_built('analysis'):
+            return
+        try:
+            self._render_analysis_page()
+        except Exception as e:
+            print(f"⚠️ Errore aggiornamento analisi: {e}")
 
     def clear_data(self):
         """Pulisce i dati caricati"""
+        if self.is_busy():
+            messagebox.showwarning("Attenzione", "Attendi il termine dell'operazione in corso")
+            return
+
+        self.stop_live_mode()
+        self.live_var.set(False)
+        self.datasets = {}
+        self.active_dataset = None
+        self._refresh_dataset_combo()
+        if self.tab_built('compare'):
+            self.update_comparison()
         self.df = None
         self.df_packed = None
         self.df_cisterne = None
         self.results_df = None
+        self.results_all = None
+        self._date_index = None
+        self._view_range = None
+        self.coverage = None
+        self.coverage_warning = None
+        self.nan_journal_key = None
+        self.input_fingerprints = None
         self.csv_path = None
         self.packed_csv_path = None
         self.cisterne_csv_path = None
+        self._analysis_blocks = {}
+        self._analysis_records = None
+        self._analysis_start = 0
+        self._analysis_combo_version = None
+        self._what_if_log = []
         self.csv_path_var.set("Nessun file selezionato")
         self.packed_csv_path_var.set("Nessun file selezionato")
         self.cisterne_csv_path_var.set("Nessun file selezionato")
         self.update_info_text("")
+        self._update_date_filter_label()
         self.set_status("Pronto")
 
-        # Pulisci statistiche
-        for key in self.stat_labels:
-            self.stat_labels[key].config(text="--")
+        # Pulisci statistiche e tabella (se il dashboard è stato aperto)
+        if self.tab_built('dashboard'):
+            for key in self.stat_labels:
+                self.stat_labels[key].config(text="--")
+            self._set_results_table(None)
 
-        # Pulisci tabella
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+        # Pulisci analisi giornaliera
+        self._refresh_analysis_text()
+
+        # Pulisci grafici (scollega gli handler)
+        if self.tab_built('charts'):
+            self._teardown_charts()
 
     def export_csv(self):
         """Esporta risultati in CSV"""
@@ -1216,11 +3211,17 @@ class ProducedGUI:
         )
 
         if filename:
-            try:
-                self.results_df.to_csv(filename, index=False)
-                messagebox.showinfo("Successo", f"Risultati esportati in:\n{filename}")
-            except Exception as e:
-                messagebox.showerror("Errore", f"Errore durante l'esportazione:\n{str(e)}")
+            results_df = self.results_df
+
+            def work(progress):
+                progress(f"Scrittura {os.path.basename(filename)}...")
+                results_df.to_csv(filename, index=False)
+                return filename
+
+            self.run_task("Esportazione CSV", work,
+                          lambda path: self._export_done(f"Risultati esportati in:\n{path}"),
+                          on_error=lambda e: messagebox.showerror(
+                              "Errore", f"Errore durante l'esportazione:\n{str(e)}"))
 
     def export_excel(self):
         """Esporta risultati in Excel"""
@@ -1235,86 +3236,373 @@ class ProducedGUI:
         )
 
         if filename:
-            try:
-                self.results_df.to_excel(filename, index=False, sheet_name='Produced')
-                messagebox.showinfo("Successo", f"Risultati esportati in:\n{filename}")
-            except Exception as e:
-                messagebox.showerror("Errore",
-                                   f"Errore durante l'esportazione:\n{str(e)}\n\n"
-                                   "Nota: Richiede openpyxl installato")
+            results_df = self.results_df
+
+            def work(progress):
+                progress(f"Scrittura {os.path.basename(filename)}...")
+                results_df.to_excel(filename, index=False, sheet_name='Produced')
+                return filename
+
+            self.run_task("Esportazione Excel", work,
+                          lambda path: self._export_done(f"Risultati esportati in:\n{path}"),
+                          on_error=lambda e: messagebox.showerror(
+                              "Errore",
+                              f"Errore durante l'esportazione:\n{str(e)}\n\n"
+                              "Nota: Richiede openpyxl installato"))
+
+    def _export_done(self, message, title="Successo"):
+        """Esportazione completata (thread Tk)"""
+        self.set_status("Esportazione completata")
+        messagebox.showinfo(title, message)
 
     def update_chart(self):
-        """Aggiorna il grafico visualizzato"""
-        if self.results_df is None:
+        """Mostra il grafico selezionato (assi persistenti, dati aggiornati sul posto)"""
+        if self.results_df is None or not self.tab_built('charts'):
             return
 
-        # Pulisci figura
-        self.figure.clear()
-
         chart_type = self.chart_var.get()
 
         try:
-            if chart_type == 'produced_daily':
-                self._plot_produced_daily()
-            elif chart_type == 'produced_weekly':
-                self._plot_produced_weekly()
-            elif chart_type == 'components_stacked':
-                self._plot_components_stacked()
-            elif chart_type == 'packed_detail':
-                self._plot_packed_detail()
-            elif chart_type == 'stock_evolution':
-                self._plot_stock_evolution()
-
-            self.canvas.draw()
+            state = self._charts.get(chart_type)
+            if state is None:
+                state = self._build_chart(chart_type)
+
+            # Dati cambiati dall'ultimo disegno di questo grafico → aggiorna gli artist
+            if state['version'] != self._results_version:
+                self._chart_plotters[chart_type](state)
+                state['version'] = self._results_version
+                state['layout'] = None
+                state['patched'] = False
+            elif state.get('patched'):
+                # Modifiche what-if arrivate mentre il grafico non era visibile
+                self._redraw_patched_chart(state)
+
+            self._show_chart(chart_type)
+            self.canvas.draw_idle()
 
         except Exception as e:
             # In caso di errore, mostra messaggio
-            ax = self.figure.add_subplot(111)
-            ax.text(0.5, 0.5, f'Errore nella generazione del grafico:\n{str(e)}',
-                   ha='center', va='center', fontsize=12, color='red')
-            ax.set_xticks([])
-            ax.set_yticks([])
-            self.canvas.draw()
-
-    def _plot_produced_daily(self):
-        """Grafico Produced giornaliero con tooltip interattivi"""
-        ax = self.figure.add_subplot(111)
-
-        # Converti date per matplotlib
-        dates = pd.to_datetime(self.results_df['Data'])
-
-        # Grafico a barre
-        bars = ax.bar(dates, self.results_df['Produced'], color='steelblue', alpha=0.7, edgecolor='navy')
-
-        ax.set_xlabel('Data', fontweight='bold', fontsize=11)
-        ax.set_ylabel('Produced (hl)', fontweight='bold', fontsize=11)
-        ax.set_title('Produced Giornaliero (passa il mouse per valori)', fontweight='bold', fontsize=13, pad=15)
-        ax.grid(True, alpha=0.3, axis='y')
+            self._show_chart_message(f'Errore nella generazione del grafico:\n{str(e)}', color='red')
+
+    def _build_chart(self, chart_type):
+        """Crea assi, annotazione tooltip e handler del grafico (una sola volta per tipo)"""
+        ax = self.figure.add_subplot(111, label=chart_type)
+        ax.set_visible(False)
+        ax.set_in_layout(False)
+
+        # Tooltip (solo grafici a barre): 'animated' → ridisegnato con blitting, non col canvas
+        annot = None
+        if chart_type in CHART_TOOLTIP_COLORS:
+            annot = ax.annotate("", xy=(0, 0), xytext=(10, 10),
+                               textcoords="offset points",
+                               bbox=dict(boxstyle="round,pad=0.5", fc=CHART_TOOLTIP_COLORS[chart_type], alpha=0.9),
+                               arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=0"),
+                               fontsize=9 if chart_type in ('produced_daily', 'produced_weekly') else 8,
+                               fontweight='bold', animated=True)
+            annot.set_visible(False)
+
+        # Nota "dati incompleti" in basso a destra (testo aggiornato ad ogni ricalcolo)
+        note = ax.text(0.98, 0.02, '', transform=ax.transAxes, fontsize=8, color='red',
+                       bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.7),
+                       ha='right', va='bottom')
+        note.set_visible(False)
+
+        state = {'type': chart_type, 'ax': ax, 'annot': annot, 'note': note,
+                 'version': None, 'layout': None, 'cids': [], 'ax_cids': []}
+
+        # Zoom/pan dalla toolbar → ricalcola la vista ridotta della finestra visibile
+        if chart_type in self._chart_views:
+            state['ax_cids'].append(ax.callbacks.connect(
+                'xlim_changed', lambda changed_ax: self._on_chart_xlim_changed(state)))
+
+        if annot is not None:
+            state['cids'].append(self.canvas.mpl_connect(
+                "motion_notify_event", lambda event: self._hover_chart(state, event)))
+
+        self._charts[chart_type] = state
+        return state
+
+    def _show_chart(self, chart_type):
+        """Rende visibile solo gli assi del grafico scelto (layout in cache per tipo)"""
+        self._active_chart = chart_type
+        self._chart_message_ax.set_visible(False)
+        self._chart_message_ax.set_in_layout(False)
+        for name, state in self._charts.items():
+            active = name == chart_type
+            state['ax'].set_visible(active)
+            state['ax'].set_in_layout(active)
+            if not active and state['annot'] is not None:
+                state['annot'].set_visible(False)
+
+        state = self._charts[chart_type]
+        if state['layout'] is None:
+            self.figure.tight_layout()
+            params = self.figure.subplotpars
+            state['layout'] = dict(left=params.left, right=params.right,
+                                   bottom=params.bottom, top=params.top)
+        else:
+            self.figure.subplots_adjust(**state['layout'])
+
+    def _show_chart_message(self, message, color='gray'):
+        """Nasconde i grafici e mostra un messaggio al centro della figura"""
+        self._active_chart = None
+        for state in self._charts.values():
+            state['ax'].set_visible(False)
+            state['ax'].set_in_layout(False)
+        self._chart_message.set_text(message)
+        self._chart_message.set_color(color)
+        self._chart_message_ax.set_visible(True)
+        self._chart_message_ax.set_in_layout(True)
+        self.canvas.draw_idle()
+
+    def _teardown_charts(self):
+        """Scollega gli handler e rimuove gli assi di tutti i grafici"""
+        for state in self._charts.values():
+            for cid in state['cids']:
+                self.canvas.mpl_disconnect(cid)
+            for cid in state['ax_cids']:
+                state['ax'].callbacks.disconnect(cid)
+            state['ax'].remove()
+        self._charts = {}
+        self._show_chart_message('Carica dati per visualizzare i grafici')
+
+    def _set_bars(self, ax, bars, x, heights, bottom=None, width=0.8, **style):
+        """
+        Aggiorna le barre sul posto (set_x/set_width/set_height/set_y) se il numero
+        di barre non cambia, altrimenti sostituisce il container.
+        """
+        heights = np.asarray(heights, dtype=float)
+        bottom = np.zeros(len(heights)) if bottom is None else np.asarray(bottom, dtype=float)
+
+        if bars is not None and len(bars.patches) == len(heights):
+            x_num = np.asarray(ax.convert_xunits(x), dtype=float)
+            for rect, xc, height, base in zip(bars.patches, x_num, heights, bottom):
+                rect.set_x(xc - width / 2)
+                rect.set_width(width)
+                rect.set_height(height)
+                rect.set_y(base)
+            return bars
+
+        if bars is not None:
+            bars.remove()
+        return ax.bar(x, heights, bottom=bottom, width=width, **style)
+
+    def _set_chart_note(self, state, text):
+        """Mostra/nasconde la nota di avviso del grafico"""
+        state['note'].set_text(text or '')
+        state['note'].set_visible(bool(text))
+
+    def _format_date_axis(self, ax):
+        """Assi data: al massimo ~15 etichette per la vista corrente, ruotate a 45°"""
+        x_min, x_max = ax.get_xlim()
+        # Oltre un anno visibile il giorno non serve più: mese-anno
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m' if x_max - x_min <= 366 else '%m-%Y'))
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=5, maxticks=15))
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels(which='major'):
+            label.set_ha('right')
+
+    def _chart_view_slice(self, state, pad=0):
+        """Intervallo [i0, i1) dei giorni dentro i limiti x correnti (bisezione)"""
+        x = state['full']['x']
+        x_min, x_max = state['ax'].get_xlim()
+        i0 = max(0, int(np.searchsorted(x, x_min, side='left')) - pad)
+        i1 = min(len(x), int(np.searchsorted(x, x_max, side='right')) + pad)
+        return i0, i1
+
+    def _chart_capacity(self, ax, px_per_item):
+        """Quanti elementi entrano nella larghezza in pixel degli assi"""
+        return max(1, int(ax.get_window_extent().width / px_per_item))
+
+    def _week_start_labels(self, centers):
+        """Data del lunedì (dd-mm-YYYY) per i centri settimana di weekly_means"""
+        return [d.strftime('%d-%m-%Y') for d in mdates.num2date(np.asarray(centers) - 3)]
+
+    def _reset_chart_view(self, state):
+        """Nuovi dati: vista sull'intero periodo e scala y automatica"""
+        ax, x = state['ax'], state['full']['x']
+        state['updating'] = True
+        try:
+            if len(x):
+                ax.set_xlim(x[0] - 1, x[-1] + 1)
+            ax.set_autoscaley_on(True)
+            self._refresh_chart_view(state)
+        finally:
+            state['updating'] = False
+
+    def _refresh_chart_view(self, state):
+        """Ridisegna gli artist per la finestra visibile (downsampling) e aggiorna gli assi"""
+        ax = state['ax']
+        self._chart_views[state['type']](state)
+        self._format_date_axis(ax)
+        # Scala y automatica solo se l'utente non ha fissato i limiti con lo zoom
+        if ax.get_autoscaley_on():
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+
+    def _on_chart_xlim_changed(self, state):
+        """Callback xlim_changed (zoom/pan/home della toolbar)"""
+        if state.get('updating') or state.get('full') is None:
+            return
+        state['updating'] = True
+        try:
+            self._refresh_chart_view(state)
+        finally:
+            state['updating'] = False
+        self.canvas.draw_idle()
+
+    def _first_week_label(self):
+        """Settimana ISO del primo giorno (per le note di avviso)"""
+        first_date = pd.to_datetime(self.results_df.iloc[0]['Data'])
+        first_week = first_date.isocalendar().week
+        first_year = first_date.isocalendar().year
+        return f"{first_year}-W{str(first_week).zfill(2)}"
+
+    def _rescale(self, ax):
+        """Ricalcola i limiti degli assi dopo un aggiornamento dei dati"""
+        ax.relim()
+        ax.autoscale_view()
+
+    def _patch_charts(self, changed):
+        """
+        Modifica what-if: corregge sul posto i giorni cambiati nei grafici già aggiornati.
+        Solo il grafico visibile ridisegna subito gli artist, gli altri alla prossima visualizzazione;
+        quelli senza correzione dedicata vengono ricostruiti per intero.
+        """
+        active_type = self.chart_var.get()
+        for chart_type, state in self._charts.items():
+            if state['version'] != self._results_version:
+                continue  # già da ridisegnare per intero
+            patcher = self._chart_patchers.get(chart_type)
+            if patcher is None:
+                state['version'] = None
+                continue
+            patcher(state, changed)
+            if chart_type == active_type:
+                self._redraw_patched_chart(state)
+            else:
+                state['patched'] = True
 
-        # Formattazione date
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m'))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(dates)//15)))
-        self.figure.autofmt_xdate(rotation=45)
+        active = self._charts.get(active_type)
+        if active is not None and active['version'] is None:
+            self.update_chart()
+        else:
+            self.canvas.draw_idle()
 
-        # Aggiungi tooltip interattivi
-        self._add_bar_tooltips(ax, bars, dates, self.results_df['Produced'])
+    def _redraw_patched_chart(self, state):
+        """Artist del grafico dai dati corretti (senza toccare zoom e limiti fissati dall'utente)"""
+        state['patched'] = False
+        state['updating'] = True
+        try:
+            if state['type'] == 'produced_weekly':
+                self._draw_produced_weekly(state)
+            else:
+                self._refresh_chart_view(state)
+        finally:
+            state['updating'] = False
+
+    def _patch_full_series(self, state, positions, series):
+        """Scrive i valori dei giorni cambiati nelle serie complete {chiave: colonna, fattore}"""
+        full = state['full']
+        for key, (col, factor) in series.items():
+            array = full[key]
+            if not array.flags.writeable:
+                array = full[key] = array.copy()
+            for i in positions:
+                array[i] = self.results_df[col].iat[i] * factor
+        return full
+
+    def _patch_produced_daily(self, state, changed):
+        """Produced giornaliero: barre e tooltip dei giorni modificati"""
+        full = self._patch_full_series(state, changed, {'produced': ('Produced', 1)})
+        for i in changed:
+            date_str = pd.Timestamp(self.results_df['Data'].iat[i]).strftime('%d-%m-%Y')
+            full['labels'][i] = f"{date_str}\nProduced: {full['produced'][i]:.2f} hl"
+
+    def _patch_components_stacked(self, state, changed):
+        """Componenti stacked: pile e tooltip dei giorni modificati"""
+        full = self._patch_full_series(state, changed, {
+            'packed': ('Packed', 1),
+            'cisterne_half': ('Cisterne', 0.5),
+            'delta_half': ('Delta_Stock', 0.5),
+            'produced': ('Produced', 1),
+        })
+        for i in changed:
+            date_str = pd.Timestamp(self.results_df['Data'].iat[i]).strftime('%d-%m-%Y')
+            full['labels'][i] = self._components_label(date_str, full['produced'][i], full['packed'][i],
+                                                       full['cisterne_half'][i], full['delta_half'][i])
+
+    def _patch_stock_evolution(self, state, changed):
+        """Evoluzione stock: punti dei giorni modificati"""
+        self._patch_full_series(state, changed, {
+            'stock_iniziale': ('Stock_Iniziale', 1),
+            'stock_finale': ('Stock_Finale', 1),
+        })
+
+    def _patch_produced_weekly(self, state, changed):
+        """Produced settimanale: solo le settimane toccate (totale += ΔProduced, media = totale / giorni)"""
+        weekly_data = state['weekly_data']
+        for i, delta in changed.items():
+            iso = pd.Timestamp(self.results_df['Data'].iat[i]).isocalendar()
+            week = f"{iso.year}-W{str(iso.week).zfill(2)}"
+            row = weekly_data.index[weekly_data['Week_Year'] == week]
+            weekly_data.loc[row, 'Total'] += delta
+            weekly_data.loc[row, 'Mean'] = weekly_data.loc[row, 'Total'] / weekly_data.loc[row, 'Days']
+
+    def _plot_produced_daily(self, state):
+        """Grafico Produced giornaliero con tooltip interattivi (vista ridotta in base allo zoom)"""
+        ax = state['ax']
+
+        # Converti date per matplotlib (numeri data: bisezione e zoom lavorano su float)
+        dates = pd.to_datetime(self.results_df['Data'])
+        values = self.results_df['Produced'].to_numpy(dtype=float)
+        state['full'] = {
+            'x': mdates.date2num(dates),
+            'produced': values,
+            # Tooltip: testi precalcolati per ogni giorno (la vista ne prende una fetta)
+            'labels': [f"{date_str}\nProduced: {val:.2f} hl"
+                       for date_str, val in zip(dates.dt.strftime('%d-%m-%Y'), values)],
+        }
+
+        if 'styled' not in state:
+            ax.xaxis_date()
+            ax.set_xlabel('Data', fontweight='bold', fontsize=11)
+            ax.set_ylabel('Produced (hl)', fontweight='bold', fontsize=11)
+            ax.grid(True, alpha=0.3, axis='y')
+            state['styled'] = True
+
+        self._reset_chart_view(state)
 
         # Aggiungi nota se c'è warning sui dati
-        if self.data_warning:
-            first_week = pd.to_datetime(self.results_df.iloc[0]['Data']).isocalendar().week
-            first_year = pd.to_datetime(self.results_df.iloc[0]['Data']).isocalendar().year
-            week_label = f"{first_year}-W{str(first_week).zfill(2)}"
-            ax.text(0.98, 0.02, f'⚠️ ATTENZIONE: Primo giorno/settimana {week_label} imprecisi (Stock Iniziale = 0)',
-                   transform=ax.transAxes, fontsize=8, color='red',
-                   bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.7),
-                   ha='right', va='bottom')
+        self._set_chart_note(state, self.data_warning and
+                             f'⚠️ ATTENZIONE: Primo giorno/settimana {self._first_week_label()} '
+                             f'imprecisi (Stock Iniziale = 0)')
+
+    def _view_produced_daily(self, state):
+        """Barre della finestra visibile: giornaliere, o medie settimanali se troppo dense"""
+        ax, full = state['ax'], state['full']
+        i0, i1 = self._chart_view_slice(state)
+        x, values = full['x'][i0:i1], full['produced'][i0:i1]
+
+        if len(x) > self._chart_capacity(ax, CHART_MIN_BAR_PX):
+            centers, days, (means,) = weekly_means(x, values)
+            labels = [f"Settimana {date_str}\nMedia: {mean:.2f} hl/giorno\nGiorni: {n}"
+                      for date_str, mean, n in zip(self._week_start_labels(centers), means, days)]
+            x, values, width = centers, means, 7 * 0.8
+            ax.set_title('Produced Giornaliero - media settimanale (zoom per il dettaglio)',
+                         fontweight='bold', fontsize=13, pad=15)
+        else:
+            labels = full['labels'][i0:i1]
+            width = 0.8
+            ax.set_title('Produced Giornaliero (passa il mouse per valori)', fontweight='bold', fontsize=13, pad=15)
 
-        self.figure.tight_layout()
+        # Grafico a barre
+        state['bars'] = self._set_bars(ax, state.get('bars'), x, values, width=width,
+                                       color='steelblue', alpha=0.7, edgecolor='navy')
+        self._set_hover_targets(state, x, width / 2, [np.zeros(len(values)), values], values, labels)
 
-    def _plot_produced_weekly(self):
+    def _plot_produced_weekly(self, state):
         """Grafico Produced settimanale con tooltip"""
-        ax = self.figure.add_subplot(111)
-
         # Aggiungi colonna settimana
         df_temp = self.results_df.copy()
         df_temp['Data'] = pd.to_datetime(df_temp['Data'])
@@ -1327,407 +3615,460 @@ class ProducedGUI:
             'Produced': ['sum', 'mean', 'count']
         }).reset_index()
         weekly_data.columns = ['Week_Year', 'Total', 'Mean', 'Days']
+        state['weekly_data'] = weekly_data
 
-        # Grafico a barre
-        x = range(len(weekly_data))
-        bars = ax.bar(x, weekly_data['Total'], color='darkgreen', alpha=0.7, edgecolor='darkgreen')
+        self._draw_produced_weekly(state)
 
-        # Aggiungi valori sopra le barre
+    def _draw_produced_weekly(self, state):
+        """Barre, valori e tooltip settimanali da state['weekly_data']"""
+        ax, weekly_data = state['ax'], state['weekly_data']
+
+        # Grafico a barre
+        x = np.arange(len(weekly_data))
+        state['bars'] = self._set_bars(ax, state.get('bars'), x, weekly_data['Total'],
+                                       color='darkgreen', alpha=0.7, edgecolor='darkgreen')
+
+        # Valori sopra le barre (testi riutilizzati, creati solo se mancano)
+        labels = state.setdefault('value_labels', [])
+        while len(labels) > len(weekly_data):
+            labels.pop().remove()
         for i, val in enumerate(weekly_data['Total']):
-            ax.text(i, val, f'{val:.0f}', ha='center', va='bottom', fontsize=9, fontweight='bold')
+            if i < len(labels):
+                labels[i].set_position((i, val))
+                labels[i].set_text(f'{val:.0f}')
+            else:
+                labels.append(ax.text(i, val, f'{val:.0f}', ha='center', va='bottom',
+                                      fontsize=9, fontweight='bold'))
+
+        if 'styled' not in state:
+            ax.set_xlabel('Settimana', fontweight='bold', fontsize=11)
+            ax.set_ylabel('Produced (hl)', fontweight='bold', fontsize=11)
+            ax.set_title('Produced Settimanale - Hover per media giornaliera', fontweight='bold', fontsize=13, pad=15)
+            ax.grid(True, alpha=0.3, axis='y')
+            state['styled'] = True
 
-        ax.set_xlabel('Settimana', fontweight='bold', fontsize=11)
-        ax.set_ylabel('Produced (hl)', fontweight='bold', fontsize=11)
-        ax.set_title('Produced Settimanale - Hover per media giornaliera', fontweight='bold', fontsize=13, pad=15)
         ax.set_xticks(x)
         ax.set_xticklabels(weekly_data['Week_Year'], rotation=45, ha='right')
-        ax.grid(True, alpha=0.3, axis='y')
+        self._rescale(ax)
 
-        # Tooltip con dettagli (media e giorni)
-        self._add_weekly_tooltips(ax, bars, weekly_data)
+        # Tooltip con dettagli (media e giorni), testi precalcolati
+        totals = weekly_data['Total'].to_numpy(dtype=float)
+        labels = [f"{week}\nTotale: {total:.2f} hl\nMedia: {mean:.2f} hl/giorno\nGiorni: {int(days)}"
+                  for week, total, mean, days in zip(weekly_data['Week_Year'], totals,
+                                                     weekly_data['Mean'], weekly_data['Days'])]
+        self._set_hover_targets(state, x, 0.4, [np.zeros(len(totals)), totals], totals, labels)
 
         # Aggiungi nota se prima settimana è affetta
-        if self.data_warning:
-            first_week_label = weekly_data.iloc[0]['Week_Year']
-            ax.text(0.98, 0.02, f'⚠️ ATTENZIONE: Settimana {first_week_label} potrebbe essere imprecisa (dati incompleti)',
-                   transform=ax.transAxes, fontsize=8, color='red',
-                   bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.7),
-                   ha='right', va='bottom')
-
-        self.figure.tight_layout()
-
-    def _plot_components_stacked(self):
-        """Grafico componenti stacked con tooltip dettagliati"""
-        ax = self.figure.add_subplot(111)
+        self._set_chart_note(state, self.data_warning and len(weekly_data) and
+                             f"⚠️ ATTENZIONE: Settimana {weekly_data.iloc[0]['Week_Year']} "
+                             f"potrebbe essere imprecisa (dati incompleti)")
+
+    def _components_label(self, header, total, packed, cisterne, delta_stock):
+        """Testo tooltip con breakdown componenti (giorno o media settimanale)"""
+        # Helper per percentuali
+        def perc(val):
+            return (val / total * 100) if total != 0 else 0.0
+
+        text = f"{header}\n"
+        text += f"━━━━━━━━━━━━━━━━━━━\n"
+        text += f"PRODUCED: {total:.2f} hl\n"
+        text += f"━━━━━━━━━━━━━━━━━━━\n"
+        text += f"Packed:       {packed:8.2f} hl ({perc(packed):5.1f}%)\n"
+        text += f"Cisterne/2:   {cisterne:8.2f} hl ({perc(cisterne):5.1f}%)\n"
+        text += f"ΔStock/2:     {delta_stock:8.2f} hl ({perc(delta_stock):5.1f}%)"
+        return text
+
+    def _plot_components_stacked(self, state):
+        """Grafico componenti stacked con tooltip dettagliati (vista ridotta in base allo zoom)"""
+        ax = state['ax']
 
         # Converti date
         dates = pd.to_datetime(self.results_df['Data'])
+        packed = self.results_df['Packed'].to_numpy(dtype=float)
+        cisterne_half = self.results_df['Cisterne'].to_numpy(dtype=float) / 2
+        delta_half = self.results_df['Delta_Stock'].to_numpy(dtype=float) / 2
+        produced = self.results_df['Produced'].to_numpy(dtype=float)
+
+        state['full'] = {
+            'x': mdates.date2num(dates),
+            'packed': packed,
+            'cisterne_half': cisterne_half,
+            'delta_half': delta_half,
+            'produced': produced,
+            # Tooltip dettagliato con breakdown componenti (testi precalcolati)
+            'labels': [self._components_label(date_str, total, p, c, d)
+                       for date_str, total, p, c, d in zip(dates.dt.strftime('%d-%m-%Y'), produced,
+                                                           packed, cisterne_half, delta_half)],
+        }
+
+        if 'styled' not in state:
+            ax.xaxis_date()
+            ax.set_xlabel('Data', fontweight='bold', fontsize=11)
+            ax.set_ylabel('Valore (hl)', fontweight='bold', fontsize=11)
+            ax.grid(True, alpha=0.3, axis='y')
+            state['styled'] = True
+
+        self._reset_chart_view(state)
+
+        if ax.get_legend() is None:
+            ax.legend(loc='upper left', fontsize=10)
+
+    def _view_components_stacked(self, state):
+        """Pile della finestra visibile: giornaliere, o medie settimanali se troppo dense"""
+        ax, full = state['ax'], state['full']
+        i0, i1 = self._chart_view_slice(state)
+        x = full['x'][i0:i1]
+        packed = full['packed'][i0:i1]
+        cisterne_half = full['cisterne_half'][i0:i1]
+        delta_half = full['delta_half'][i0:i1]
+        produced = full['produced'][i0:i1]
+
+        if len(x) > self._chart_capacity(ax, CHART_MIN_BAR_PX):
+            x, days, (packed, cisterne_half, delta_half, produced) = weekly_means(
+                x, packed, cisterne_half, delta_half, produced)
+            labels = [self._components_label(f"Settimana {date_str} (media di {n} giorni)", total, p, c, d)
+                      for date_str, n, total, p, c, d in zip(self._week_start_labels(x), days, produced,
+                                                             packed, cisterne_half, delta_half)]
+            width = 7 * 0.8
+            ax.set_title('Componenti del Produced (Stacked) - media settimanale (zoom per il dettaglio)',
+                         fontweight='bold', fontsize=13, pad=15)
+        else:
+            labels = full['labels'][i0:i1]
+            width = 0.8
+            ax.set_title('Componenti del Produced (Stacked) - Hover per dettagli', fontweight='bold', fontsize=13, pad=15)
 
         # Grafico stacked
-        bars1 = ax.bar(dates, self.results_df['Packed'], label='Packed', alpha=0.8, color='#2E86AB')
-        bars2 = ax.bar(dates, self.results_df['Cisterne']/2,
-               bottom=self.results_df['Packed'],
-               label='Cisterne/2', alpha=0.8, color='#A23B72')
-        bars3 = ax.bar(dates, self.results_df['Delta_Stock']/2,
-               bottom=self.results_df['Packed'] + self.results_df['Cisterne']/2,
-               label='Delta Stock/2', alpha=0.8, color='#F18F01')
-
-        ax.set_xlabel('Data', fontweight='bold', fontsize=11)
-        ax.set_ylabel('Valore (hl)', fontweight='bold', fontsize=11)
-        ax.set_title('Componenti del Produced (Stacked) - Hover per dettagli', fontweight='bold', fontsize=13, pad=15)
-        ax.legend(loc='upper left', fontsize=10)
-        ax.grid(True, alpha=0.3, axis='y')
-
-        # Formattazione date
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m'))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(dates)//15)))
-        self.figure.autofmt_xdate(rotation=45)
-
-        # Aggiungi tooltip dettagliato con breakdown componenti
-        self._add_components_tooltips(ax, bars1, dates)
-
-        self.figure.tight_layout()
-
-    def _plot_stock_evolution(self):
-        """Grafico evoluzione stock"""
-        ax = self.figure.add_subplot(111)
+        state['bars'] = self._set_bars(ax, state.get('bars'), x, packed, width=width,
+                                       label='Packed', alpha=0.8, color='#2E86AB')
+        state['bars_cisterne'] = self._set_bars(ax, state.get('bars_cisterne'), x, cisterne_half,
+                                                bottom=packed, width=width,
+                                                label='Cisterne/2', alpha=0.8, color='#A23B72')
+        state['bars_delta'] = self._set_bars(ax, state.get('bars_delta'), x, delta_half,
+                                             bottom=packed + cisterne_half, width=width,
+                                             label='Delta Stock/2', alpha=0.8, color='#F18F01')
+
+        stack = np.cumsum([np.zeros(len(x)), packed, cisterne_half, delta_half], axis=0)
+        self._set_hover_targets(state, x, width / 2, list(stack), produced, labels)
+
+    def _plot_stock_evolution(self, state):
+        """Grafico evoluzione stock (min/max per pixel sulle serie lunghe)"""
+        ax = state['ax']
 
         # Converti date
         dates = pd.to_datetime(self.results_df['Data'])
+        state['full'] = {
+            'x': mdates.date2num(dates),
+            'stock_iniziale': self.results_df['Stock_Iniziale'].to_numpy(dtype=float),
+            'stock_finale': self.results_df['Stock_Finale'].to_numpy(dtype=float),
+        }
+
+        if 'styled' not in state:
+            ax.xaxis_date()
+            ax.set_xlabel('Data', fontweight='bold', fontsize=11)
+            ax.set_ylabel('Stock (hl std)', fontweight='bold', fontsize=11)
+            ax.set_title('Evoluzione Stock', fontweight='bold', fontsize=13, pad=15)
+            ax.grid(True, alpha=0.3)
+            state['styled'] = True
+
+        self._reset_chart_view(state)
+
+        if ax.get_legend() is None:
+            ax.legend(loc='best', fontsize=10)
+
+    def _view_stock_evolution(self, state):
+        """Linee della finestra visibile, ridotte a min/max per pixel se troppo dense"""
+        ax, full = state['ax'], state['full']
+        # Un punto oltre i bordi per ciascun lato: le linee arrivano fino al margine
+        i0, i1 = self._chart_view_slice(state, pad=1)
+        x = full['x'][i0:i1]
+        stock_iniziale = full['stock_iniziale'][i0:i1]
+        stock_finale = full['stock_finale'][i0:i1]
+
+        capacity = self._chart_capacity(ax, 1)
+        dense = len(x) > capacity
+        if dense:
+            keep = minmax_indices(x, capacity, stock_iniziale, stock_finale)
+            x, stock_iniziale, stock_finale = x[keep], stock_iniziale[keep], stock_finale[keep]
+
+        # Plot linee (create una volta, poi set_data); marker solo se i punti sono distinguibili
+        if 'line_iniziale' not in state:
+            state['line_iniziale'], = ax.plot(x, stock_iniziale,
+                                              marker='o', label='Stock Iniziale', linewidth=2,
+                                              color='#E63946', markersize=4)
+            state['line_finale'], = ax.plot(x, stock_finale,
+                                            marker='s', label='Stock Finale', linewidth=2,
+                                            color='#06A77D', markersize=4)
+        else:
+            state['line_iniziale'].set_data(x, stock_iniziale)
+            state['line_finale'].set_data(x, stock_finale)
 
-        # Plot linee
-        line1 = ax.plot(dates, self.results_df['Stock_Iniziale'],
-                       marker='o', label='Stock Iniziale', linewidth=2,
-                       color='#E63946', markersize=4)
-        line2 = ax.plot(dates, self.results_df['Stock_Finale'],
-                       marker='s', label='Stock Finale', linewidth=2,
-                       color='#06A77D', markersize=4)
-
-        # Fill between
-        ax.fill_between(dates,
-                       self.results_df['Stock_Iniziale'],
-                       self.results_df['Stock_Finale'],
-                       alpha=0.2, color='gray')
-
-        ax.set_xlabel('Data', fontweight='bold', fontsize=11)
-        ax.set_ylabel('Stock (hl std)', fontweight='bold', fontsize=11)
-        ax.set_title('Evoluzione Stock', fontweight='bold', fontsize=13, pad=15)
-        ax.legend(loc='best', fontsize=10)
-        ax.grid(True, alpha=0.3)
+        markers_visible = len(x) <= self._chart_capacity(ax, CHART_MIN_BAR_PX)
+        state['line_iniziale'].set_marker('o' if markers_visible else '')
+        state['line_finale'].set_marker('s' if markers_visible else '')
 
-        # Formattazione date
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m'))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(dates)//15)))
-        self.figure.autofmt_xdate(rotation=45)
-
-        self.figure.tight_layout()
+        # Fill between (matplotlib >= 3.10 aggiorna sul posto, altrimenti si ricrea)
+        fill = state.get('fill')
+        if fill is not None and hasattr(fill, 'set_data'):
+            fill.set_data(x, stock_iniziale, stock_finale)
+        else:
+            if fill is not None:
+                fill.remove()
+            state['fill'] = ax.fill_between(x, stock_iniziale, stock_finale,
+                                            alpha=0.2, color='gray')
 
     def generate_pdf(self):
-        """Genera il report PDF"""
+        """Genera il report PDF (in background)"""
         if self.results_df is None:
             messagebox.showwarning("Attenzione", "Calcola prima i risultati")
             return
 
-        try:
-            # Log inizio
-            self._pdf_log("Inizio generazione report PDF...")
-            self.set_status("Generazione PDF in corso...", show_progress=True)
-
-            # Importa modulo PDF
-            from produced_pdf_report import ReportPDFProduced
-
-            # Crea report con i dati già caricati (passa DataFrame direttamente)
-            self._pdf_log("Inizializzazione report...")
-            report = ReportPDFProduced(csv_path=self.csv_path, df=self.df.copy())
-
-            # Calcola produced (usa i risultati già calcolati)
-            self._pdf_log("Preparazione dati per PDF...")
-            report.results = self.results_df.to_dict('records')
-            report.df_results = self.results_df.copy()
-            report.data_warning = self.data_warning  # Passa warning al PDF
-
-            # Aggiungi colonne settimana se mancano
-            if 'Week' not in report.df_results.columns:
-                report.df_results['Data'] = pd.to_datetime(report.df_results['Data'])
-                report.df_results['Week'] = report.df_results['Data'].dt.isocalendar().week
-                report.df_results['Year'] = report.df_results['Data'].dt.isocalendar().year
-                report.df_results['Week_Year'] = (report.df_results['Year'].astype(str) + '-W' +
-                                                   report.df_results['Week'].astype(str).str.zfill(2))
-
-            # Genera PDF
-            self._pdf_log("Generazione pagine PDF...")
-            self._pdf_log("  - Pagina titolo")
-            self._pdf_log("  - Grafici principali")
-
-            if self.pdf_include_weekly.get():
-                self._pdf_log("  - Analisi settimanali")
-
-            if self.pdf_include_tanks.get():
-                self._pdf_log("  - Dettagli tank BBT")
-                self._pdf_log("  - Dettagli tank FST")
-                self._pdf_log("  - Dettagli truck")
-
-            report.genera_pdf_report()
-
-            # Determina il percorso del file generato
-            from datetime import datetime
-            data_generazione = datetime.now().strftime('%Y-%m-%d')
-            filename = f'report_produced_{data_generazione}_PA.pdf'
-
-            if IS_WINDOWS:
-                base_dir = r"C:\Users\arup01\OneDrive - Heineken International\Documents - Dashboard Assemini\General\producedGiornaliero\App"
-            else:
-                base_dir = '/mnt/user-data/outputs'
-
-            report_dir = os.path.join(base_dir, 'report')
-            pdf_path = os.path.join(report_dir, filename)
-
-            # Se non esiste, cerca nella cartella del CSV
-            if not os.path.exists(pdf_path) and self.csv_path:
-                report_dir = os.path.join(os.path.dirname(self.csv_path), 'report')
-                pdf_path = os.path.join(report_dir, filename)
-
-            self._pdf_log(f"\n✓ Report PDF generato con successo!")
-            self._pdf_log(f"  Nome file: {filename}")
-            self._pdf_log(f"  Cartella: {report_dir}")
-
-            self.set_status("Report PDF generato")
-            messagebox.showinfo("Successo",
-                               f"Report PDF generato con successo!\n\n"
-                               f"File: {filename}\n"
-                               f"Cartella: report/\n"
-                               f"Percorso completo:\n{pdf_path}")
-
-        except ImportError as e:
+        # Snapshot di dati e opzioni nel thread Tk: il worker non legge widget né variabili Tk
+        options = {
+            'include_charts': self.pdf_include_charts.get(),
+            'include_weekly': self.pdf_include_weekly.get(),
+            'include_tanks': self.pdf_include_tanks.get(),
+            'tank_overview': self.pdf_tank_overview.get(),
+            'tank_detail': [tank for tank in self.pdf_tank_detail.get().split(',') if tank.strip()],
+        }
+        snapshot = {
+            'csv_path': self.csv_path,
+            'df': self.df.copy(),
+            'results_df': self.results_df.copy(),
+            'data_warning': self.data_warning,
+            'coverage': self._view_slice(self.coverage),
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+        }
+
+        self._pdf_log("Inizio generazione report PDF...")
+        self.run_task("Generazione PDF",
+                      lambda progress: self._compute_pdf(snapshot, options, progress),
+                      self._pdf_done,
+                      on_error=self._pdf_failed,
+                      on_progress=self._pdf_log)
+
+    def _compute_pdf(self, snapshot, options, progress):
+        """Costruisce e scrive il report PDF (worker thread: nessun widget Tk)"""
+        # Importa modulo PDF
+        from produced_pdf_report import ReportPDFProduced
+
+        # Crea report con i dati già caricati (passa DataFrame direttamente)
+        progress("Inizializzazione report...")
+        # Le sezioni escluse non vengono né estratte né disegnate; il report riporta
+        # ogni pagina finita con progress (Annulla → si ferma alla pagina successiva)
+        report = ReportPDFProduced(csv_path=snapshot['csv_path'], df=snapshot['df'],
+                                   date_from=snapshot['date_from'], date_to=snapshot['date_to'],
+                                   sezioni={'grafici': options['include_charts'],
+                                            'settimanali': options['include_weekly'],
+                                            'tank': options['include_tanks']},
+                                   panoramica=options['tank_overview'],
+                                   tank_dettaglio=options['tank_detail'],
+                                   progress=progress)
+
+        # Calcola produced (usa i risultati già calcolati)
+        progress("Preparazione dati per PDF...")
+        report.results = snapshot['results_df'].to_dict('records')
+        report.df_results = snapshot['results_df']
+        report.data_warning = snapshot['data_warning']  # Passa warning al PDF
+        report.coverage = snapshot['coverage']  # Copertura oraria (giorni incompleti)
+
+        # Aggiungi colonne settimana se mancano
+        if 'Week' not in report.df_results.columns:
+            report.df_results['Data'] = pd.to_datetime(report.df_results['Data'])
+            report.df_results['Week'] = report.df_results['Data'].dt.isocalendar().week
+            report.df_results['Year'] = report.df_results['Data'].dt.isocalendar().year
+            report.df_results['Week_Year'] = (report.df_results['Year'].astype(str) + '-W' +
+                                               report.df_results['Week'].astype(str).str.zfill(2))
+
+        # Genera PDF (pagine, tempi e riepilogo per sezione arrivano nel log tramite progress)
+        pdf_path = report.genera_pdf_report()
+        return os.path.basename(pdf_path), os.path.dirname(pdf_path), pdf_path
+
+    def _pdf_done(self, result):
+        """Report PDF scritto (thread Tk)"""
+        filename, report_dir, pdf_path = result
+
+        self._pdf_log(f"\n✓ Report PDF generato con successo!")
+        self._pdf_log(f"  Nome file: {filename}")
+        self._pdf_log(f"  Cartella: {report_dir}")
+
+        self.set_status("Report PDF generato")
+        messagebox.showinfo("Successo",
+                           f"Report PDF generato con successo!\n\n"
+                           f"File: {filename}\n"
+                           f"Cartella: report/\n"
+                           f"Percorso completo:\n{pdf_path}")
+
+    def _pdf_failed(self, error):
+        """Errore nel worker PDF (thread Tk)"""
+        if isinstance(error, ImportError):
             self._pdf_log(f"\n✗ ERRORE: Modulo non trovato")
-            self._pdf_log(f"  {str(e)}")
+            self._pdf_log(f"  {str(error)}")
             self.set_status("Errore: modulo mancante")
             messagebox.showerror("Errore",
                                "Modulo produced_pdf_report.py non trovato!\n"
                                "Assicurati che sia nella stessa cartella.")
-        except Exception as e:
+        else:
             self._pdf_log(f"\n✗ ERRORE durante la generazione:")
-            self._pdf_log(f"  {str(e)}")
+            self._pdf_log(f"  {str(error)}")
             self.set_status("Errore generazione PDF")
-            messagebox.showerror("Errore", f"Errore durante la generazione PDF:\n{str(e)}")
+            messagebox.showerror("Errore", f"Errore durante la generazione PDF:\n{str(error)}")
 
     def _pdf_log(self, message):
         """Aggiunge messaggio al log PDF"""
+        self.ensure_tab('pdf')
         self.pdf_log.config(state='normal')
         self.pdf_log.insert('end', message + '\n')
         self.pdf_log.see('end')
         self.pdf_log.config(state='disabled')
         self.root.update_idletasks()
 
-    def _add_bar_tooltips(self, ax, bars, dates, values, label='Produced'):
-        """Aggiunge tooltip interattivi alle barre del grafico"""
-        # Crea annotazione (inizialmente invisibile)
-        annot = ax.annotate("", xy=(0, 0), xytext=(10, 10),
-                           textcoords="offset points",
-                           bbox=dict(boxstyle="round,pad=0.5", fc="yellow", alpha=0.9),
-                           arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=0"),
-                           fontsize=9, fontweight='bold')
-        annot.set_visible(False)
-
-        def hover(event):
-            """Gestisce evento hover del mouse"""
-            if event.inaxes == ax:
-                # Trova la barra sotto il cursore
-                for i, (bar, date, val) in enumerate(zip(bars, dates, values)):
-                    if bar.contains(event)[0]:
-                        # Aggiorna posizione e testo dell'annotazione
-                        x = bar.get_x() + bar.get_width() / 2
-                        y = bar.get_height()
-                        annot.xy = (x, y)
-
-                        # Formatta data
-                        date_str = pd.to_datetime(date).strftime('%d-%m-%Y')
-                        text = f"{date_str}\n{label}: {val:.2f} hl"
-                        annot.set_text(text)
-                        annot.set_visible(True)
-                        self.canvas.draw_idle()
-                        return
-
-                # Se non c'è nessuna barra sotto il cursore, nascondi tooltip
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    self.canvas.draw_idle()
-
-        # Collega evento
-        self.canvas.mpl_connect("motion_notify_event", hover)
-
-    def _add_weekly_tooltips(self, ax, bars, weekly_data):
-        """Aggiunge tooltip dettagliati per grafico settimanale"""
-        # Crea annotazione
-        annot = ax.annotate("", xy=(0, 0), xytext=(10, 10),
-                           textcoords="offset points",
-                           bbox=dict(boxstyle="round,pad=0.5", fc="lightgreen", alpha=0.9),
-                           arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=0"),
-                           fontsize=9, fontweight='bold')
-        annot.set_visible(False)
-
-        def hover(event):
-            """Gestisce evento hover del mouse"""
-            if event.inaxes == ax:
-                for i, bar in enumerate(bars):
-                    if bar.contains(event)[0]:
-                        x = bar.get_x() + bar.get_width() / 2
-                        y = bar.get_height()
-                        annot.xy = (x, y)
-
-                        # Dati settimana
-                        week = weekly_data.iloc[i]
-                        text = f"{week['Week_Year']}\n"
-                        text += f"Totale: {week['Total']:.2f} hl\n"
-                        text += f"Media: {week['Mean']:.2f} hl/giorno\n"
-                        text += f"Giorni: {int(week['Days'])}"
-
-                        annot.set_text(text)
-                        annot.set_visible(True)
-                        self.canvas.draw_idle()
-                        return
-
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    self.canvas.draw_idle()
-
-        self.canvas.mpl_connect("motion_notify_event", hover)
-
-    def _add_components_tooltips(self, ax, bars, dates):
-        """Tooltip dettagliato con breakdown di tutte le componenti"""
-        annot = ax.annotate("", xy=(0, 0), xytext=(10, 10),
-                           textcoords="offset points",
-                           bbox=dict(boxstyle="round,pad=0.5", fc="lightblue", alpha=0.95),
-                           arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=0"),
-                           fontsize=8, fontweight='bold')
-        annot.set_visible(False)
-
-        def hover(event):
-            if event.inaxes == ax:
-                for i, bar in enumerate(bars):
-                    if bar.contains(event)[0]:
-                        x = bar.get_x() + bar.get_width() / 2
-                        y = self.results_df.iloc[i]['Produced']  # Top della barra totale
-                        annot.xy = (x, y)
-
-                        # Dati componenti
-                        row = self.results_df.iloc[i]
-                        date_str = pd.to_datetime(row['Data']).strftime('%d-%m-%Y')
-
-                        packed = row['Packed']
-                        cisterne = row['Cisterne'] / 2
-                        delta_stock = row['Delta_Stock'] / 2
-                        produced = row['Produced']
-
-                        # Helper per percentuali
-                        def perc(val):
-                            return (val / produced * 100) if produced != 0 else 0.0
-
-                        text = f"{date_str}\n"
-                        text += f"━━━━━━━━━━━━━━━━━━━\n"
-                        text += f"PRODUCED: {produced:.2f} hl\n"
-                        text += f"━━━━━━━━━━━━━━━━━━━\n"
-                        text += f"Packed:       {packed:8.2f} hl ({perc(packed):5.1f}%)\n"
-                        text += f"Cisterne/2:   {cisterne:8.2f} hl ({perc(cisterne):5.1f}%)\n"
-                        text += f"ΔStock/2:     {delta_stock:8.2f} hl ({perc(delta_stock):5.1f}%)"
-
-                        annot.set_text(text)
-                        annot.set_visible(True)
-                        self.canvas.draw_idle()
-                        return
-
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    self.canvas.draw_idle()
-
-        self.canvas.mpl_connect("motion_notify_event", hover)
-
-    def _plot_packed_detail(self):
+    def _set_hover_targets(self, state, x, half_width, levels, anchor, labels):
+        """
+        Prepara l'hit-test dei tooltip: centri delle barre ordinati (per bisezione),
+        estensione verticale della colonna impilata e testi già formattati.
+
+        Args:
+            x: centri delle barre (date o numeri)
+            half_width: metà larghezza barra (unità dati)
+            levels: quote cumulative della pila, una riga per barra (0, a, a+b, ...)
+            anchor: quota a cui punta la freccia del tooltip
+            labels: testo del tooltip per barra
+        """
+        centers = np.asarray(state['ax'].convert_xunits(x), dtype=float)
+        levels = np.column_stack(levels)
+        order = np.argsort(centers, kind='stable')
+
+        state['hover'] = {
+            'centers': centers[order],
+            'half_width': half_width,
+            'y_low': levels.min(axis=1)[order],
+            'y_high': levels.max(axis=1)[order],
+            'anchor': np.asarray(anchor, dtype=float)[order],
+            'labels': [labels[i] for i in order],
+        }
+
+    def _hover_chart(self, state, event):
+        """Tooltip: barra sotto il cursore trovata per bisezione sui centri (O(log n))"""
+        targets = state.get('hover')
+        annot = state['annot']
+        if event.inaxes != state['ax'] or targets is None or len(targets['centers']) == 0:
+            if annot.get_visible():
+                annot.set_visible(False)
+                self._blit_chart_tooltip(state)
+            return
+
+        centers = targets['centers']
+        i = int(np.searchsorted(centers, event.xdata))
+        # Candidati: barra a sinistra e a destra del cursore, tengo la più vicina
+        if i == len(centers) or (i > 0 and event.xdata - centers[i - 1] < centers[i] - event.xdata):
+            i -= 1
+
+        hit = (abs(event.xdata - centers[i]) <= targets['half_width'] and
+               targets['y_low'][i] <= event.ydata <= targets['y_high'][i])
+
+        if hit:
+            if not annot.get_visible() or state.get('hover_index') != i:
+                annot.xy = (centers[i], targets['anchor'][i])
+                annot.set_text(targets['labels'][i])
+                annot.set_visible(True)
+                state['hover_index'] = i
+                self._blit_chart_tooltip(state)
+        elif annot.get_visible():
+            # Se non c'è nessuna barra sotto il cursore, nascondi tooltip
+            annot.set_visible(False)
+            state['hover_index'] = None
+            self._blit_chart_tooltip(state)
+
+    def _on_chart_draw(self, event):
+        """Dopo ogni ridisegno completo: salva lo sfondo per il blitting dei tooltip"""
+        if self.canvas.supports_blit:
+            self._chart_background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+        # Il tooltip è 'animated' (escluso dal draw normale): se visibile va ridisegnato
+        state = self._charts.get(self._active_chart)
+        if state is not None and state['annot'] is not None and state['annot'].get_visible():
+            state['ax'].draw_artist(state['annot'])
+
+    def _blit_chart_tooltip(self, state):
+        """Ridisegna solo il tooltip sopra lo sfondo salvato"""
+        if self._chart_background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._chart_background)
+        if state['annot'].get_visible():
+            state['ax'].draw_artist(state['annot'])
+        self.canvas.blit(self.figure.bbox)
+
+    def _packed_component(self, name):
+        """Serie giornaliera di una tipologia Packed (results_df, altrimenti DataFrame unito)"""
+        for source in (self.results_df, self._view_slice(self.df)):
+            if source is None or len(source) != len(self.results_df):
+                continue
+            for col in (f'Packed_{name}', f'Packed {name}'):
+                if col in source.columns:
+                    return pd.to_numeric(source[col], errors='coerce').fillna(0).to_numpy(dtype=float)
+        return np.zeros(len(self.results_df))
+
+    def _plot_packed_detail(self, state):
         """Grafico dettagliato componenti Packed (OW1, RGB, OW2, KEG)"""
-        ax = self.figure.add_subplot(111)
+        ax = state['ax']
 
         # Converti date
         dates = pd.to_datetime(self.results_df['Data'])
+        state['dates'] = dates
 
-        # Estrai componenti Packed (usa get per gestire nomi diversi)
-        packed_ow1 = self.results_df.get('Packed_OW1', self.results_df.get('Packed OW1', 0))
-        packed_rgb = self.results_df.get('Packed_RGB', self.results_df.get('Packed RGB', 0))
-        packed_ow2 = self.results_df.get('Packed_OW2', self.results_df.get('Packed OW2', 0))
-        packed_keg = self.results_df.get('Packed_KEG', self.results_df.get('Packed KEG', 0))
+        # Estrai componenti Packed
+        components = {name: self._packed_component(name) for name in ('OW1', 'RGB', 'OW2', 'KEG')}
+        state['components'] = components
 
         # Grafico stacked
-        bars1 = ax.bar(dates, packed_ow1, label='OW1', alpha=0.9, color='#FF6B6B')
-        bars2 = ax.bar(dates, packed_rgb, bottom=packed_ow1,
-                      label='RGB', alpha=0.9, color='#4ECDC4')
-        bars3 = ax.bar(dates, packed_ow2, bottom=packed_ow1 + packed_rgb,
-                      label='OW2', alpha=0.9, color='#45B7D1')
-        bars4 = ax.bar(dates, packed_keg,
-                      bottom=packed_ow1 + packed_rgb + packed_ow2,
-                      label='KEG', alpha=0.9, color='#FFA07A')
-
-        ax.set_xlabel('Data', fontweight='bold', fontsize=11)
-        ax.set_ylabel('Packed (hl)', fontweight='bold', fontsize=11)
-        ax.set_title('Dettaglio Packed per Tipologia - Hover per valori', fontweight='bold', fontsize=13, pad=15)
-        ax.legend(loc='upper left', fontsize=10)
-        ax.grid(True, alpha=0.3, axis='y')
+        colors = {'OW1': '#FF6B6B', 'RGB': '#4ECDC4', 'OW2': '#45B7D1', 'KEG': '#FFA07A'}
+        bottom = np.zeros(len(dates))
+        for name, values in components.items():
+            key = 'bars' if name == 'OW1' else f'bars_{name}'
+            state[key] = self._set_bars(ax, state.get(key), dates, values, bottom=bottom,
+                                        label=name, alpha=0.9, color=colors[name])
+            bottom = bottom + values
+
+        if 'styled' not in state:
+            ax.set_xlabel('Data', fontweight='bold', fontsize=11)
+            ax.set_ylabel('Packed (hl)', fontweight='bold', fontsize=11)
+            ax.set_title('Dettaglio Packed per Tipologia - Hover per valori', fontweight='bold', fontsize=13, pad=15)
+            ax.legend(loc='upper left', fontsize=10)
+            ax.grid(True, alpha=0.3, axis='y')
+            state['styled'] = True
+
+        # Tooltip dettagliato (testi precalcolati)
+        labels = []
+        for i, date_str in enumerate(dates.dt.strftime('%d-%m-%Y')):
+            v_ow1 = components['OW1'][i]
+            v_rgb = components['RGB'][i]
+            v_ow2 = components['OW2'][i]
+            v_keg = components['KEG'][i]
+            total = v_ow1 + v_rgb + v_ow2 + v_keg
+
+            def perc(val):
+                return (val / total * 100) if total != 0 else 0.0
+
+            text = f"{date_str}\n"
+            text += f"━━━━━━━━━━━━━━━━━━━\n"
+            text += f"PACKED TOT: {total:.2f} hl\n"
+            text += f"━━━━━━━━━━━━━━━━━━━\n"
+            text += f"OW1:  {v_ow1:8.2f} hl ({perc(v_ow1):5.1f}%)\n"
+            text += f"RGB:  {v_rgb:8.2f} hl ({perc(v_rgb):5.1f}%)\n"
+            text += f"OW2:  {v_ow2:8.2f} hl ({perc(v_ow2):5.1f}%)\n"
+            text += f"KEG:  {v_keg:8.2f} hl ({perc(v_keg):5.1f}%)"
+            labels.append(text)
+
+        stack = np.cumsum([np.zeros(len(dates))] + list(components.values()), axis=0)
+        self._set_hover_targets(state, dates, state['bars'].patches[0].get_width() / 2 if len(dates) else 0,
+                                list(stack), stack[-1], labels)
 
         # Formattazione date
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m'))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(dates)//15)))
-        self.figure.autofmt_xdate(rotation=45)
-
-        # Tooltip dettagliato
-        self._add_packed_detail_tooltips(ax, bars1, dates, packed_ow1, packed_rgb, packed_ow2, packed_keg)
-
-        self.figure.tight_layout()
-
-    def _add_packed_detail_tooltips(self, ax, bars, dates, ow1, rgb, ow2, keg):
-        """Tooltip per grafico dettaglio Packed"""
-        annot = ax.annotate("", xy=(0, 0), xytext=(10, 10),
-                           textcoords="offset points",
-                           bbox=dict(boxstyle="round,pad=0.5", fc="lightyellow", alpha=0.95),
-                           arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=0"),
-                           fontsize=8, fontweight='bold')
-        annot.set_visible(False)
-
-        def hover(event):
-            if event.inaxes == ax:
-                for i, bar in enumerate(bars):
-                    if bar.contains(event)[0]:
-                        x = bar.get_x() + bar.get_width() / 2
-                        y = ow1.iloc[i] + rgb.iloc[i] + ow2.iloc[i] + keg.iloc[i]
-                        annot.xy = (x, y)
-
-                        date_str = pd.to_datetime(dates.iloc[i]).strftime('%d-%m-%Y')
-
-                        v_ow1 = ow1.iloc[i]
-                        v_rgb = rgb.iloc[i]
-                        v_ow2 = ow2.iloc[i]
-                        v_keg = keg.iloc[i]
-                        total = v_ow1 + v_rgb + v_ow2 + v_keg
-
-                        def perc(val):
-                            return (val / total * 100) if total != 0 else 0.0
-
-                        text = f"{date_str}\n"
-                        text += f"━━━━━━━━━━━━━━━━━━━\n"
-                        text += f"PACKED TOT: {total:.2f} hl\n"
-                        text += f"━━━━━━━━━━━━━━━━━━━\n"
-                        text += f"OW1:  {v_ow1:8.2f} hl ({perc(v_ow1):5.1f}%)\n"
-                        text += f"RGB:  {v_rgb:8.2f} hl ({perc(v_rgb):5.1f}%)\n"
-                        text += f"OW2:  {v_ow2:8.2f} hl ({perc(v_ow2):5.1f}%)\n"
-                        text += f"KEG:  {v_keg:8.2f} hl ({perc(v_keg):5.1f}%)"
-
-                        annot.set_text(text)
-                        annot.set_visible(True)
-                        self.canvas.draw_idle()
-                        return
-
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    self.canvas.draw_idle()
-
-        self.canvas.mpl_connect("motion_notify_event", hover)
+        self._rescale(ax)
+        self._format_date_axis(ax)
 
     def show_formula_test(self):
         """Mostra dialog per testare le formule"""
@@ -1766,9 +4107,15 @@ def main():
     # Crea applicazione
     app = ProducedGUI(root)
 
+    # Tempo di avvio misurato alla prima finestra disegnata, poi proposta di ripristino sessione
+    root.after_idle(app.report_startup_time)
+    root.after_idle(app.offer_session_restore)
+
     # Avvia loop
     root.mainloop()
 
 
 if __name__ == '__main__':
+    # Eseguibile PyInstaller: i processi del report PDF ripartono da qui
+    multiprocessing.freeze_support()
     main()
@@ -8,11 +8,21 @@ Genera report PDF con grafici dettagliati e leggibili per ogni tank
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import io
+import multiprocessing
 import os
+import threading
+import time
 import sys
+import argparse
 from pathlib import Path
 from colorama import Fore, Style
-from nan_handler import handle_missing_values
+from nan_handler import handle_missing_values, hash_input_files, NAN_POLICIES
+from produced_batch import (load_results_artifact, calc_hl_std_array, fill_hourly_gaps, aggregate_hourly_grid, build_coverage_index,
+                            describe_incomplete_days, parse_date, build_date_index,
+                            date_range_positions, describe_date_range, PACKED_GAP_FILL, CISTERNE_GAP_FILL)
 
 # Rilevamento sistema operativo
 IS_WINDOWS = sys.platform.startswith('win')
@@ -30,9 +40,11 @@ else:
 
 # Importa matplotlib
 try:
+    import matplotlib
     import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
     from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
     from matplotlib import rcParams
     rcParams['font.size'] = 11
 except ImportError:
@@ -40,8 +52,261 @@ except ImportError:
     print("Installa con: pip install matplotlib reportlab")
     sys.exit(1)
 
+# pypdf (opzionale): unisce le pagine tank/truck disegnate in parallelo in processi separati.
+# Senza pypdf il report viene generato come prima, una pagina dopo l'altra.
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+# Processi per le pagine tank/truck (1 = tutto nel processo corrente)
+PDF_WORKERS = os.cpu_count() or 1
+
+# Cache su disco delle pagine tank/truck/RBT già disegnate (richiede pypdf), 0 MB = disattivata.
+# PAGE_CACHE_VERSION va incrementata quando cambia il disegno delle pagine (invalida la cache).
+PAGE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.produced_calculator', 'page_cache')
+PAGE_CACHE_MAX_MB = 200
+PAGE_CACHE_VERSION = 2
+
+# Sezioni del report (la pagina titolo c'è sempre). Le sezioni escluse non vengono
+# né estratte né disegnate: senza 'tank' il report si riduce alle pagine di sintesi.
+#   grafici:     pagina Produced giornaliero/cumulativo/stock
+#   settimanali: analisi settimanali
+#   tank:        pagine BBT, FST, truck e RBT
+REPORT_SECTIONS = {'grafici': True, 'settimanali': True, 'tank': True}
+
+# Modalità panoramica dei tank: sparkline hl std di tutti i tank su una griglia
+# (OVERVIEW_RIGHE x OVERVIEW_COLONNE pannelli per pagina); pagina completa solo
+# per i tank anomali (vedi anomalie_tank) o richiesti esplicitamente.
+OVERVIEW_RIGHE = 5
+OVERVIEW_COLONNE = 3
+
+
+class TemplatePaginaTank:
+    """
+    Pagina 2x2 di un tank o truck (Level, Plato e hl std nel tempo + riquadro statistiche)
+    costruita una sola volta: barre, etichette, titoli e riquadro vengono creati e impaginati
+    qui, poi ogni tank aggiorna solo altezze, etichette e testi (disegna).
+    Solo API a oggetti (Figure, nessuno stato pyplot): un template per thread/processo.
+    """
+
+    PANNELLI = (
+        ('Level', '.0f', 'steelblue', 'navy', 'Level (L)'),
+        ('Plato', '.1f', 'orange', 'darkorange', 'Plato (°)'),
+        ('hl_std', '.1f', 'green', 'darkgreen', 'hl std'),
+    )
+
+    def __init__(self, date, titoli_assi, colore_box):
+        self.fig = Figure(figsize=(11, 8.5))
+        (ax1, ax2), (ax3, ax4) = self.fig.subplots(2, 2)
+        self.titolo = self.fig.suptitle('', fontsize=12, fontweight='bold')
+
+        # Etichette valore ogni `passo` barre (come prima: ~5 per grafico)
+        self.date = list(date)
+        self.passo = max(1, len(self.date)//5)
+        zeri = np.zeros(len(self.date))
+
+        self.pannelli = []
+        for ax, (col, fmt, color, edgecolor, ylabel), title in zip((ax1, ax2, ax3), self.PANNELLI, titoli_assi):
+            barre = ax.bar(self.date, zeri, color=color, alpha=0.7, edgecolor=edgecolor)
+            etichette = [ax.text(self.date[i], 0, '', ha='center', va='bottom', fontsize=8)
+                         for i in range(0, len(self.date), self.passo)]
+            ax.set_ylabel(ylabel, fontweight='bold')
+            ax.set_title(title, fontweight='bold')
+            ax.grid(True, alpha=0.3, axis='y')
+            ax.tick_params(axis='x', rotation=45)
+            self.pannelli.append((ax, col, fmt, barre, etichette))
+
+        # Statistiche
+        ax4.axis('off')
+        self.stats = ax4.text(0.1, 1.05, '', ha='left', va='top', fontsize=10,
+                              family='monospace', bbox=dict(boxstyle='round', facecolor=colore_box, alpha=0.5))
+
+        # Impaginazione fissa (niente tight_layout a ogni pagina): margini per etichette
+        # Y fino a 5 cifre e date ruotate sotto ogni grafico; tutto entra nella pagina,
+        # quindi si salva senza bbox_inches='tight' (che ridisegnerebbe la pagina due volte)
+        self.fig.subplots_adjust(left=0.08, right=0.98, bottom=0.1, top=0.91, wspace=0.22, hspace=0.42)
+
+    def disegna(self, titolo, df, stats_text):
+        """Aggiorna la pagina per un tank (stesse date del template) e restituisce la Figure"""
+        self.titolo.set_text(titolo)
+        for ax, col, fmt, barre, etichette in self.pannelli:
+            valori = df[col].to_numpy(dtype=float)
+            for barra, val in zip(barre, valori):
+                barra.set_height(val)
+            for etichetta, i in zip(etichette, range(0, len(valori), self.passo)):
+                etichetta.set_position((self.date[i], valori[i]))
+                etichetta.set_text(f'{valori[i]:{fmt}}')
+            ax.relim()
+            ax.autoscale_view()
+        self.stats.set_text(stats_text)
+        return self.fig
+
+
+# Template delle pagine tank per thread (la Figure di un template non va condivisa tra thread)
+_templates_tank = threading.local()
+
+
+def figura_pagina_tank(titolo, df, titoli_assi, stats_text, colore_box):
+    """
+    Pagina 2x2 di un tank o truck dal template del thread corrente (creato al primo uso per
+    queste date/titoli/colore). La Figure restituita viene riusata: salvarla prima della pagina dopo.
+    """
+    templates = getattr(_templates_tank, 'templates', None)
+    if templates is None:
+        templates = _templates_tank.templates = {}
+
+    chiave = (tuple(df['Data']), tuple(titoli_assi), colore_box)
+    template = templates.get(chiave)
+    if template is None:
+        if len(templates) >= 8:
+            templates.clear()  # Date di un altro report: i vecchi template non servono più
+        template = templates[chiave] = TemplatePaginaTank(df['Data'], titoli_assi, colore_box)
+    return template.disegna(titolo, df, stats_text)
+
+
+def pagina_pdf(fig, bbox_inches='tight'):
+    """Figure → PDF vettoriale di una pagina (bytes)"""
+    buffer = io.BytesIO()
+    # Nessuna data di creazione: stessa pagina → stessi byte, in qualunque processo/ordine
+    fig.savefig(buffer, format='pdf', bbox_inches=bbox_inches, metadata={'CreationDate': None})
+    return buffer.getvalue()
+
+
+def pagina_tank_pdf(spec):
+    """Worker: disegna una pagina tank/truck e la restituisce come PDF vettoriale di una pagina"""
+    return pagina_pdf(figura_pagina_tank(**spec), bbox_inches=None)
+
+
+def pagina_tank_pdf_cronometrata(spec):
+    """Worker: come pagina_tank_pdf, più i secondi di disegno (per l'avanzamento del report)"""
+    inizio = time.perf_counter()
+    pagina = pagina_tank_pdf(spec)
+    return pagina, time.perf_counter() - inizio
+
+
+def parse_tank(text):
+    """'BBT 111', 'fst122', 'Truck 1' → ('BBT', 111), ('FST', 122), ('Truck', 1)"""
+    if isinstance(text, tuple):
+        return text
+    testo = str(text).strip().upper().replace(' ', '')
+    for tipo in ('BBT', 'FST', 'RBT', 'TRUCK'):
+        if testo.startswith(tipo) and testo[len(tipo):].isdigit():
+            return ('Truck' if tipo == 'TRUCK' else tipo), int(testo[len(tipo):])
+    raise ValueError(f"Tank non valido: '{text}' (es. BBT 111, FST 122, Truck 1)")
+
+
+def anomalie_tank(df):
+    """Giorni anomali di un tank/truck: Level o Plato negativi, oppure Level senza Plato (hl std a 0)"""
+    return (df['Level'] < 0) | (df['Plato'] < 0) | ((df['Level'] > 0) & (df['Plato'] == 0))
+
+
+def figura_panoramica_tank(titolo, pannelli, nota=None):
+    """
+    Pagina panoramica: una sparkline hl std per tank (una sola linea per pannello, nessuna etichetta
+    per barra). Asse X comune a tutta la pagina, asse Y comune ai tank dello stesso tipo.
+    pannelli: lista di (tipo, nome, df) con df come in estrai_serie_tank; giorni anomali in rosso.
+    """
+    fig = Figure(figsize=(11, 8.5))
+    axes = fig.subplots(OVERVIEW_RIGHE, OVERVIEW_COLONNE, sharex=True, squeeze=False).ravel()
+    fig.suptitle(titolo, fontsize=12, fontweight='bold')
+
+    primo_per_tipo = {}
+    for i, (ax, (tipo, nome, df)) in enumerate(zip(axes, pannelli)):
+        if tipo in primo_per_tipo:
+            ax.sharey(primo_per_tipo[tipo])
+        else:
+            primo_per_tipo[tipo] = ax
+
+        anomali = anomalie_tank(df).to_numpy()
+        ax.plot(df['Data'], df['hl_std'], color='green', linewidth=1.2)
+        if anomali.any():
+            ax.plot(df['Data'][anomali], df['hl_std'][anomali], 'o', color='red', markersize=3)
+        ax.set_title(f"{nome}  ·  {df['hl_std'].sum():.0f} hl" + ("  (!)" if anomali.any() else ""),
+                     fontsize=8, fontweight='bold', color='red' if anomali.any() else 'black')
+        ax.grid(True, alpha=0.3)
+        ax.tick_params(labelsize=7)
+        # Etichette date sull'ultimo pannello di ogni colonna (le celle sotto possono essere vuote)
+        if i + OVERVIEW_COLONNE >= len(pannelli):
+            ax.tick_params(axis='x', labelbottom=True, rotation=45)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m'))
+
+    for ax in axes[len(pannelli):]:
+        ax.axis('off')
+
+    if nota:
+        fig.text(0.5, 0.01, nota, ha='center', va='bottom', fontsize=8, style='italic')
+    fig.tight_layout(rect=(0, 0.03, 1, 1))
+    return fig
+
+
+def chiave_pagina(opzioni, *dfs):
+    """Chiave di cache di una pagina: hash dei dati (colonne + valori) e delle opzioni di disegno"""
+    digest = hashlib.sha1()
+    digest.update(repr((PAGE_CACHE_VERSION, matplotlib.__version__, rcParams['font.size'], opzioni)).encode('utf-8'))
+    for df in dfs:
+        digest.update(repr((list(df.columns), len(df))).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class PageCache:
+    """
+    Cache su disco delle pagine già disegnate: un PDF di una pagina per chiave (chiave_pagina).
+    L'ora di modifica del file fa da ultimo uso: oltre max_mb escono le pagine usate meno di recente.
+    Un errore di lettura/scrittura non blocca il report, la pagina viene solo ridisegnata.
+    """
+
+    def __init__(self, path=PAGE_CACHE_DIR, max_mb=PAGE_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def _file(self, key):
+        return os.path.join(self.path, f'{key}.pdf')
+
+    def get(self, key):
+        """Pagina in cache (bytes) oppure None; segna la pagina come appena usata"""
+        try:
+            with open(self._file(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._file(key))
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        """Salva una pagina (file temporaneo + rename)"""
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            tmp_path = f'{self._file(key)}.{os.getpid()}.tmp'  # più processi possono scrivere insieme
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._file(key))
+        except OSError as e:
+            print(f"{Fore.YELLOW}⚠️ Cache pagine non scrivibile ({e}){Style.RESET_ALL}")
+
+    def evict(self):
+        """Rimuove le pagine usate meno di recente finché la cache non rientra nel limite"""
+        try:
+            files = [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                     for entry in os.scandir(self.path) if entry.name.endswith('.pdf')]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
 class ReportPDFProduced:
-    def __init__(self, csv_path=None, df=None, csv_stock_path=None, csv_packed_path=None, csv_cisterne_path=None):
+    def __init__(self, csv_path=None, df=None, csv_stock_path=None, csv_packed_path=None, csv_cisterne_path=None,
+                 date_from=None, date_to=None, sezioni=None, panoramica=False, tank_dettaglio=None,
+                 nan_policy='ask', progress=None):
         """
         Inizializza il generatore di report PDF (Triple CSV Mode)
 
@@ -51,8 +316,26 @@ class ReportPDFProduced:
             csv_stock_path: Path CSV Stock (solo BBT/FST/RBT)
             csv_packed_path: Path CSV Packed orario
             csv_cisterne_path: Path CSV Cisterne orario
+            date_from, date_to: periodo del report (estremi inclusi, None = tutto)
+            sezioni: {sezione: bool} da REPORT_SECTIONS (mancanti = default)
+            panoramica: tank in modalità panoramica (sparkline su 2-3 pagine)
+            tank_dettaglio: tank con pagina completa anche in panoramica (es. ['BBT 111'])
+            nan_policy: gestione dei NaN non coperti dal journal (vedi NAN_POLICIES)
+            progress: callback(messaggio, passo, totale) chiamato dopo ogni pagina del PDF (con i
+                      tempi) e a fine report; se solleva un'eccezione la generazione si ferma
+                      tra una pagina e l'altra senza lasciare il PDF a metà
         """
+        sconosciute = set(sezioni or {}) - set(REPORT_SECTIONS)
+        if sconosciute:
+            raise ValueError(f"Sezioni report non valide: {', '.join(sorted(sconosciute))}")
+        self.sezioni = {**REPORT_SECTIONS, **(sezioni or {})}
+        self.panoramica = panoramica
+        self.tank_dettaglio = {parse_tank(tank) for tank in (tank_dettaglio or [])}
+
         self.csv_path = csv_path
+        self.coverage = None  # Copertura oraria Packed/Cisterne per giorno
+        self.date_from = date_from
+        self.date_to = date_to
 
         # Se viene passato un DataFrame, usalo direttamente
         if df is not None:
@@ -69,26 +352,42 @@ class ReportPDFProduced:
             df_cisterne = pd.read_csv(csv_cisterne_path)
 
             print("Aggregazione dati Packed (SOMMA)...")
-            packed_daily = self._aggregate_packed_hourly(df_packed)
+            packed_daily, packed_hourly, packed_coverage = self._aggregate_packed_hourly(df_packed)
+            print(f"  Ore sintetizzate ({PACKED_GAP_FILL['strategy']}): {int(packed_hourly['Synthesized'].sum())}")
 
             print("Aggregazione dati Cisterne (MEDIA)...")
-            cisterne_daily = self._aggregate_cisterne_hourly(df_cisterne)
+            cisterne_daily, cisterne_hourly, cisterne_coverage = self._aggregate_cisterne_hourly(df_cisterne)
+            print(f"  Ore sintetizzate ({CISTERNE_GAP_FILL['strategy']}): {int(cisterne_hourly['Synthesized'].sum())}")
 
             print("Merge dei 3 DataFrame...")
             self.df = self._merge_stock_packed_cisterne(df_stock, packed_daily, cisterne_daily)
+            self.coverage = build_coverage_index(df_stock['Date'], packed_coverage, cisterne_coverage)
+
+            # Solo il periodo richiesto (+ giorno precedente per lo Stock Iniziale), prima della gestione NaN
+            start, stop = date_range_positions(build_date_index(self.df['Time']), date_from, date_to)
+            if start == stop:
+                raise ValueError(f"Nessun giorno nel periodo {describe_date_range(date_from, date_to)}")
+            self.df = self.df.iloc[max(start - 1, 0):stop].reset_index(drop=True)
+            self.coverage = self.coverage.iloc[start:stop].reset_index(drop=True)
 
-            # Gestione interattiva dei valori NaN
-            self.df = handle_missing_values(self.df)
+            # Gestione interattiva dei valori NaN (con journal delle risoluzioni)
+            self.df = handle_missing_values(self.df, journal_key=hash_input_files(csv_stock_path), policy=nan_policy)
         # Fallback: carica CSV singolo (retrocompatibilità)
         elif csv_path:
             self.df = pd.read_csv(csv_path)
-            self.df = handle_missing_values(self.df)
+            self.df = handle_missing_values(self.df, policy=nan_policy)
         else:
             raise ValueError("Devi fornire df, oppure (csv_stock_path + csv_packed_path + csv_cisterne_path), oppure csv_path")
 
         self.results = []
         self.df_results = None
         self.data_warning = None  # Warning per dati incompleti
+        self._serie_tank = None  # (chiave, {tank: DataFrame}) di estrai_serie_tank
+        self.page_cache = PageCache() if PAGE_CACHE_MAX_MB > 0 else None  # None = ridisegna tutto
+        self.progress = progress
+        self._passo = 0
+        self._totale = 0
+        self._tempi_sezioni = {}  # {sezione: secondi di disegno} del report in corso
 
         # Liste tank
         self.BBT_TANKS = [111, 112, 121, 132, 211, 212, 221, 222, 231, 232, 241, 242, 251, 252]
@@ -102,7 +401,7 @@ class ReportPDFProduced:
         }
 
     def _aggregate_packed_hourly(self, df_packed):
-        """Aggrega i dati Packed orari in dati giornalieri"""
+        """Aggrega i dati Packed orari in dati giornalieri (+ griglia oraria completa e copertura per giorno)"""
         # Trova la colonna temporale
         time_col = None
         possible_time_cols = ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']
@@ -126,9 +425,6 @@ class ReportPDFProduced:
                 f"Errore: {str(e)}"
             )
 
-        # Estrai solo la data (senza ora)
-        df_packed['Date'] = df_packed[time_col].dt.date
-
         # Trova colonne Packed
         packed_cols_map = {}
         for orig_name, target_name in [
@@ -151,17 +447,24 @@ class ReportPDFProduced:
                 f"Trovate: {', '.join(df_packed.columns)}"
             )
 
-        # Aggrega per giorno (somma di tutte le ore)
-        agg_dict = {col: 'sum' for col in packed_cols_map.keys()}
-        packed_daily = df_packed.groupby('Date').agg(agg_dict).reset_index()
+        # Griglia oraria completa: ore mancanti riempite e marcate 'Synthesized'
+        df_packed = fill_hourly_gaps(df_packed, time_col, list(packed_cols_map.keys()),
+                                     how='sum', **PACKED_GAP_FILL)
+
+        # Estrai solo la data (senza ora)
+        df_packed['Date'] = df_packed[time_col].dt.date
+
+        # Aggrega per giorno (somma di tutte le ore) + copertura nello stesso groupby
+        packed_daily, packed_coverage = aggregate_hourly_grid(df_packed, time_col,
+                                                              list(packed_cols_map.keys()), 'sum')
 
         # Rinomina colonne per compatibilità
         packed_daily = packed_daily.rename(columns=packed_cols_map)
 
-        return packed_daily
+        return packed_daily, df_packed, packed_coverage
 
     def _aggregate_cisterne_hourly(self, df_cisterne):
-        """Aggrega i dati Cisterne orari in dati giornalieri (MEDIA, non somma)"""
+        """Aggrega i dati Cisterne orari in dati giornalieri (MEDIA) + griglia oraria completa e copertura"""
         # Trova la colonna temporale
         time_col = None
         possible_time_cols = ['Timestamp', 'Time', 'DateTime', 'Date', 'timestamp', 'time', 'datetime']
@@ -185,9 +488,6 @@ class ReportPDFProduced:
                 f"Errore: {str(e)}"
             )
 
-        # Estrai solo la data (senza ora)
-        df_cisterne['Date'] = df_cisterne[time_col].dt.date
-
         # Trova colonne Cisterne con vari formati possibili
         cisterne_cols_map = {}
         for orig_name, target_name in [
@@ -216,14 +516,21 @@ class ReportPDFProduced:
                 f"Trovate: {', '.join(df_cisterne.columns)}"
             )
 
-        # Aggrega per giorno (MEDIA di tutte le ore, non somma!)
-        agg_dict = {col: 'mean' for col in cisterne_cols_map.keys()}
-        cisterne_daily = df_cisterne.groupby('Date').agg(agg_dict).reset_index()
+        # Griglia oraria completa: ore mancanti riempite e marcate 'Synthesized'
+        df_cisterne = fill_hourly_gaps(df_cisterne, time_col, list(cisterne_cols_map.keys()),
+                                       how='mean', **CISTERNE_GAP_FILL)
+
+        # Estrai solo la data (senza ora)
+        df_cisterne['Date'] = df_cisterne[time_col].dt.date
+
+        # Aggrega per giorno (MEDIA di tutte le ore, non somma!) + copertura nello stesso groupby
+        cisterne_daily, cisterne_coverage = aggregate_hourly_grid(df_cisterne, time_col,
+                                                                  list(cisterne_cols_map.keys()), 'mean')
 
         # Rinomina colonne per compatibilità
         cisterne_daily = cisterne_daily.rename(columns=cisterne_cols_map)
 
-        return cisterne_daily
+        return cisterne_daily, df_cisterne, cisterne_coverage
 
     def _merge_stock_packed_cisterne(self, df_stock, df_packed, df_cisterne):
         """Unisce i 3 DataFrame (Stock, Packed, Cisterne) per data"""
@@ -287,11 +594,22 @@ class ReportPDFProduced:
         hl_std = (volume_hl * grado_vol) / grado_std
         return hl_std
     
+    def _periodo(self):
+        """Posizioni [start, stop) delle righe di self.df nel periodo del report (ricerca binaria)"""
+        return date_range_positions(build_date_index(self.df['Time']), self.date_from, self.date_to)
+
+    def _df_periodo(self):
+        """Righe di self.df nel periodo del report (slice, nessuna copia)"""
+        start, stop = self._periodo()
+        return self.df.iloc[start:stop]
+
     def calcola_produced(self):
         """Calcola tutti i produced"""
         print(f"\n{Fore.CYAN}Elaborazione dati per report PDF...{Style.RESET_ALL}")
-        
-        for idx in range(len(self.df)):
+
+        # Il giorno prima del periodo (se presente) serve solo allo Stock Iniziale
+        start, stop = self._periodo()
+        for idx in range(start, stop):
             row = self.df.iloc[idx]
             
             # PACKED
@@ -361,117 +679,350 @@ class ReportPDFProduced:
             })
         
         self.df_results = pd.DataFrame(self.results)
+        self._aggiungi_settimane()
+        
+        print(f"{Fore.GREEN}✓ Dati calcolati{Style.RESET_ALL}")
+
+    def usa_risultati(self, results, coverage=None):
+        """
+        Usa risultati già calcolati (es. artefatto di produced_batch.py) al posto di calcola_produced:
+        solo i giorni del periodo del report, nessun ricalcolo.
+
+        Args:
+            results: DataFrame con Data, Produced, Packed, Cisterne, Stock_Iniziale, Stock_Finale, Delta_Stock
+            coverage: copertura oraria allineata alle righe di results (opzionale)
+        """
+        start, stop = date_range_positions(build_date_index(results['Data']), self.date_from, self.date_to)
+        if start == stop:
+            raise ValueError(f"Nessun giorno nel periodo {describe_date_range(self.date_from, self.date_to)} "
+                             f"tra i risultati già calcolati")
+        self.df_results = results.iloc[start:stop].reset_index(drop=True)
+        self.results = self.df_results.to_dict('records')
+        # Periodo aperto: lo fissano i risultati, così le serie dei tank non includono
+        # il giorno prima (presente in df solo per lo Stock Iniziale)
+        if self.date_from is None:
+            self.date_from = pd.Timestamp(self.df_results['Data'].iloc[0]).normalize()
+        if self.date_to is None:
+            self.date_to = pd.Timestamp(self.df_results['Data'].iloc[-1]).normalize()
+        if coverage is not None:
+            self.coverage = coverage.iloc[start:stop].reset_index(drop=True)
+        self._aggiungi_settimane()
+        print(f"{Fore.GREEN}✓ {len(self.df_results)} giorni dai risultati già calcolati{Style.RESET_ALL}")
+
+    def _aggiungi_settimane(self):
+        """Colonne Week / Year / Week_Year (ISO) dei risultati"""
         self.df_results['Data'] = pd.to_datetime(self.df_results['Data'])
         self.df_results['Week'] = self.df_results['Data'].dt.isocalendar().week
         self.df_results['Year'] = self.df_results['Data'].dt.isocalendar().year
         self.df_results['Week_Year'] = self.df_results['Year'].astype(str) + '-W' + self.df_results['Week'].astype(str).str.zfill(2)
-        
-        print(f"{Fore.GREEN}✓ Dati calcolati{Style.RESET_ALL}")
     
+    def estrai_serie_tank(self):
+        """
+        Serie di tutti i tank nel periodo del report, estratte in un'unica passata vettoriale.
+
+        Returns:
+            dict {('BBT', 111): DataFrame, ..., ('RBT', 251): ..., ('Truck', 1): ...}
+            con colonne Data, Level, Plato, Material, hl_std (RBT: solo Data, Plato,
+            Material, il CSV non ha il Level). Tank senza colonne nel CSV: assenti.
+        """
+        start, stop = self._periodo()
+        chiave = (id(self.df), start, stop)
+        if self._serie_tank is not None and self._serie_tank[0] == chiave:
+            return self._serie_tank[1]
+
+        df = self.df.iloc[start:stop]
+        date = pd.to_datetime(df['Time']).reset_index(drop=True)
+        if self.df_results is not None and not date.dt.normalize().equals(
+                pd.to_datetime(self.df_results['Data']).dt.normalize().rename('Time')):
+            raise ValueError(f"Serie dei tank ({len(date)} giorni) e risultati del report "
+                             f"({len(self.df_results)} giorni) non coprono gli stessi giorni")
+        colonne = (
+            [(('BBT', n), f'BBT {n} Average Plato', f'BBT{n} Level', f'BBT{n} Material') for n in self.BBT_TANKS] +
+            [(('FST', n), f'FST {n} Average Plato', f'FST{n} Level ', f'FST{n} Material') for n in self.FST_TANKS] +
+            [(('RBT', n), f'RBT {n} Average Plato', None, f'RBT{n} Material') for n in self.RBT_TANKS] +
+            [(('Truck', n), f'Truck{n} Average Plato', f'Truck{n} Level', None) for n in [1, 2]]
+        )
+
+        serie = {}
+        for tank, plato_col, level_col, material_col in colonne:
+            if plato_col not in df.columns:
+                continue
+            plato = df[plato_col].to_numpy(dtype=float)
+
+            if level_col is None:
+                # RBT: solo Plato e Material (grezzo, può mancare)
+                material = df[material_col].to_numpy() if material_col in df.columns else None
+                serie[tank] = pd.DataFrame({'Data': date, 'Plato': plato, 'Material': material})
+                continue
+            if level_col not in df.columns:
+                continue
+            level = df[level_col].to_numpy(dtype=float)
+
+            if material_col is None:
+                # Truck: Material 8
+                serie[tank] = pd.DataFrame({'Data': date, 'Plato': plato, 'Level': level,
+                                            'hl_std': calc_hl_std_array(level, plato, 8)})
+            else:
+                material = df[material_col].to_numpy(dtype=float)
+                hl_std = calc_hl_std_array(level, plato, material)
+                serie[tank] = pd.DataFrame({'Data': date, 'Plato': plato, 'Level': level,
+                                            'Material': material.astype(int), 'hl_std': hl_std})
+
+        self._serie_tank = (chiave, serie)
+        return serie
+
     def estrai_dati_truck(self, truck_num):
         """Estrae dati per un singolo truck (1 o 2)"""
-        dati = []
-
-        for idx, row in self.df.iterrows():
-            plato_col = f'Truck{truck_num} Average Plato'
-            level_col = f'Truck{truck_num} Level'
-
-            if plato_col in row.index and level_col in row.index:
-                plato = float(row[plato_col])
-                level = float(row[level_col])
-                hl_std = self.calc_hl_std(level, plato, 8)  # Material 8 per truck
-
-                dati.append({
-                    'Data': pd.to_datetime(row['Time']),
-                    'Plato': plato,
-                    'Level': level,
-                    'hl_std': hl_std
-                })
+        return self.estrai_serie_tank().get(('Truck', truck_num), pd.DataFrame())
 
-        return pd.DataFrame(dati)
-    
     def estrai_dati_tank(self, tank_type, tank_num):
         """Estrae dati per un singolo tank"""
-        dati = []
+        return self.estrai_serie_tank().get((tank_type, tank_num), pd.DataFrame())
 
-        for idx, row in self.df.iterrows():
-            if tank_type == 'BBT':
-                plato_col = f'BBT {tank_num} Average Plato'
-                level_col = f'BBT{tank_num} Level'
-                material_col = f'BBT{tank_num} Material'
-            elif tank_type == 'FST':
-                plato_col = f'FST {tank_num} Average Plato'
-                level_col = f'FST{tank_num} Level '
-                material_col = f'FST{tank_num} Material'
-            else:  # RBT
-                plato_col = f'RBT {tank_num} Average Plato'
-                level_col = f'RBT{tank_num} Level'
-                material_col = f'RBT{tank_num} Material'
-
-            if plato_col in row.index and level_col in row.index:
-                plato = float(row[plato_col])
-                level = float(row[level_col])
-                material = int(float(row[material_col]))
-                hl_std = self.calc_hl_std(level, plato, material)
-
-                dati.append({
-                    'Data': pd.to_datetime(row['Time']),
-                    'Plato': plato,
-                    'Level': level,
-                    'Material': material,
-                    'hl_std': hl_std
-                })
+    def genera_pdf_report(self, workers=None, output_path=None):
+        """
+        Genera il report PDF completo e restituisce il percorso del file.
 
-        return pd.DataFrame(dati)
-    
-    def genera_pdf_report(self):
-        """Genera il report PDF completo"""
+        Con pypdf le pagine tank/truck (indipendenti) vengono disegnate in `workers`
+        processi (default PDF_WORKERS) e unite nell'ordine del report.
+        output_path: file PDF da scrivere (default report/report_produced_<data>_PA.pdf)
+        """
         if self.df_results is None:
             print(f"{Fore.RED}✗ Calcola i dati prima!{Style.RESET_ALL}")
             return
 
         print(f"\n{Fore.CYAN}Generazione report PDF...{Style.RESET_ALL}")
 
-        # Crea cartella report se non esiste
-        report_dir = os.path.join(OUTPUT_DIR, 'report')
-        os.makedirs(report_dir, exist_ok=True)
+        if output_path is None:
+            # Crea cartella report se non esiste
+            report_dir = os.path.join(OUTPUT_DIR, 'report')
+            os.makedirs(report_dir, exist_ok=True)
 
-        # Nome file con data di generazione
-        data_generazione = datetime.now().strftime('%Y-%m-%d')
-        filename = f'report_produced_{data_generazione}_PA.pdf'
-        output_path = os.path.join(report_dir, filename)
-        
-        with PdfPages(output_path) as pdf:
-            # PAGINA 1: Titolo e Sommario
-            self._pagina_titolo(pdf)
-            
-            # PAGINA 2: Produced Completo
-            self._pagina_produced_principale(pdf)
-            
-            # PAGINA 3-4: Analisi Settimanali
-            self._pagina_analisi_settimanali(pdf)
-            
-            # PAGINE 5+: Grafici Tank BBT
-            self._pagine_grafici_bbt(pdf)
-            
-            # PAGINE: Grafici Tank FST
-            self._pagine_grafici_fst(pdf)
-            
-            # PAGINA: Grafici Truck (Cisterne)
-            self._pagine_grafici_truck(pdf)
-            
-            # PAGINA: Grafici RBT
-            self._pagine_grafici_rbt(pdf)
-            
-            # Metadati PDF
-            d = pdf.infodict()
-            d['Title'] = 'PRODUCED Report - Analisi Completa'
-            d['Author'] = 'Produced Calculator'
-            d['Subject'] = 'Analisi Produzione Giornaliera e Settimanale'
-            d['CreationDate'] = datetime.now()
-        
+            # Nome file con data di generazione
+            data_generazione = datetime.now().strftime('%Y-%m-%d')
+            filename = f'report_produced_{data_generazione}_PA.pdf'
+            output_path = os.path.join(report_dir, filename)
+        elif os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        pagine_testa, panoramica, specs = self._piano_pagine()
+        self._inizia_avanzamento(len(pagine_testa) + len(panoramica) + len(specs) + (1 if self.sezioni['tank'] else 0))
+
+        if PdfWriter is not None:
+            self._genera_pdf_parallelo(output_path, PDF_WORKERS if workers is None else workers,
+                                       pagine_testa, panoramica, specs)
+            self._fine_avanzamento()
+            print(f"{Fore.GREEN}✓ Report PDF generato: {output_path}{Style.RESET_ALL}\n")
+            return output_path
+
+        try:
+            with PdfPages(output_path) as pdf:
+                # PAGINE 1-3: Titolo e Sommario, Produced Completo, Analisi Settimanali
+                for sezione, etichetta, pagina in pagine_testa:
+                    self._pagina_cronometrata(sezione, etichetta, pagina)(pdf)
+
+                # PAGINE 4+: Panoramica e Grafici Tank BBT, FST e Truck (Cisterne)
+                for spec in panoramica:
+                    inizio = time.perf_counter()
+                    pdf.savefig(figura_panoramica_tank(**spec), bbox_inches='tight')
+                    self._avanza('Panoramica', spec['titolo'], time.perf_counter() - inizio)
+                for spec in specs:
+                    inizio = time.perf_counter()
+                    pdf.savefig(figura_pagina_tank(**spec))
+                    self._avanza('Tank', spec['titolo'].split(' - ')[0], time.perf_counter() - inizio)
+
+                # PAGINA: Grafici RBT
+                if self.sezioni['tank']:
+                    self._pagina_cronometrata('RBT', 'Pagine RBT', self._pagine_grafici_rbt)(pdf)
+
+                # Metadati PDF
+                d = pdf.infodict()
+                d['Title'] = 'PRODUCED Report - Analisi Completa'
+                d['Author'] = 'Produced Calculator'
+                d['Subject'] = 'Analisi Produzione Giornaliera e Settimanale'
+                d['CreationDate'] = datetime.now()
+        except BaseException:
+            # Annullato o errore: niente PDF a metà
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+
+        self._fine_avanzamento()
         print(f"{Fore.GREEN}✓ Report PDF generato: {output_path}{Style.RESET_ALL}\n")
-    
+        return output_path
+
+    def _piano_pagine(self):
+        """
+        Pagine del report nell'ordine di stampa, secondo sezioni e panoramica:
+        (pagine iniziali come (sezione, etichetta, metodo(pdf)), pagine panoramica, pagine tank/truck)
+        """
+        pagine_testa = [('Titolo', 'Pagina titolo', self._pagina_titolo)]
+        if self.sezioni['grafici']:
+            pagine_testa.append(('Grafici', 'Grafici principali', self._pagina_produced_principale))
+        if self.sezioni['settimanali']:
+            pagine_testa.append(('Settimanali', 'Analisi settimanali', self._pagina_analisi_settimanali))
+        if not self.sezioni['tank']:
+            return pagine_testa, [], []
+        panoramica = self._pagine_panoramica_specs() if self.panoramica else []
+        return pagine_testa, panoramica, self._pagine_tank_specs(self._tank_in_dettaglio())
+
+    def _inizia_avanzamento(self, totale):
+        """Azzera contatore pagine e tempi per sezione all'inizio di un report"""
+        self._passo = 0
+        self._totale = totale
+        self._tempi_sezioni = {}
+        self._inizio_report = time.perf_counter()
+        if self.progress is not None:
+            self.progress(f"Generazione report PDF: {totale} passi", 0, totale)
+
+    def _avanza(self, sezione, etichetta, secondi=None, pagine=1):
+        """Pagine finite (secondi=None: prese dalla cache): tempi per sezione e callback di avanzamento"""
+        self._passo += pagine
+        if secondi is not None:
+            self._tempi_sezioni[sezione] = self._tempi_sezioni.get(sezione, 0) + secondi
+        if self.progress is not None:
+            tempo = f"{secondi:.2f} s" if secondi is not None else "cache"
+            self.progress(f"  - {etichetta} ({tempo})", self._passo, self._totale)
+
+    def _fine_avanzamento(self):
+        """Riepilogo finale: tempo totale e tempo di disegno per sezione"""
+        totale = time.perf_counter() - self._inizio_report
+        tempi = ', '.join(f"{sezione} {secondi:.1f} s" for sezione, secondi in self._tempi_sezioni.items())
+        messaggio = f"Report PDF in {totale:.1f} s" + (f" (disegno: {tempi})" if tempi else "")
+        if self.progress is None:
+            print(f"  {messaggio}")
+        else:
+            self.progress(messaggio, self._totale, self._totale)
+
+    def _pagina_cronometrata(self, sezione, etichetta, pagina, dopo=None):
+        """Metodo pagina(pdf) che al termine riporta il tempo di disegno (e poi chiama dopo())"""
+        def disegna(pdf):
+            inizio = time.perf_counter()
+            pagina(pdf)
+            self._avanza(sezione, etichetta, time.perf_counter() - inizio)
+            if dopo is not None:
+                dopo()
+        return disegna
+
+    def _genera_pdf_parallelo(self, output_path, workers, pagine_testa, panoramica_specs, specs):
+        """
+        Pagine tank/truck nei worker (un PDF di una pagina ciascuna), pagine iniziali e RBT
+        qui nel frattempo, poi unione con pypdf nell'ordine fisso del report: il file non
+        dipende da quale worker finisce prima. Le pagine già in cache non vengono ridisegnate.
+        L'avanzamento delle pagine dei worker viene riportato da questo thread, tra una
+        pagina e l'altra; se il callback solleva, le pagine non ancora iniziate vengono annullate.
+        """
+        cache = self.page_cache
+        chiavi = [chiave_pagina((spec['titolo'], spec['titoli_assi'], spec['stats_text'], spec['colore_box']),
+                                spec['df']) for spec in specs]
+        pagine_tank = [cache.get(chiave) if cache is not None else None for chiave in chiavi]
+        mancanti = [i for i, pagina in enumerate(pagine_tank) if pagina is None]
+        if cache is not None and specs:
+            print(f"  Pagine tank/truck dalla cache: {len(specs) - len(mancanti)}/{len(specs)}")
+            if len(mancanti) < len(specs):
+                self._avanza('Tank', f"Tank/truck: {len(specs) - len(mancanti)} pagine", pagine=len(specs) - len(mancanti))
+
+        pool = None
+        futuri = {}  # futuro → indice in specs, finché il risultato non è stato ritirato
+        if workers > 1 and len(mancanti) > 1:
+            try:
+                # spawn anche su Linux: la GUI chiama da un thread, fork con Tk attivo non è sicuro
+                pool = ProcessPoolExecutor(max_workers=min(workers, len(mancanti)),
+                                           mp_context=multiprocessing.get_context('spawn'))
+                futuri = {pool.submit(pagina_tank_pdf_cronometrata, specs[i]): i for i in mancanti}
+            except Exception as e:
+                print(f"{Fore.YELLOW}⚠️ Processi non disponibili ({e}): pagine disegnate in sequenza{Style.RESET_ALL}")
+                pool = None
+                futuri = {}
+
+        def ritira_pagine(attendi=False):
+            """Ritira le pagine finite nei worker (attendi=True: tutte) e ne riporta l'avanzamento"""
+            finiti = as_completed(list(futuri)) if attendi else [futuro for futuro in list(futuri) if futuro.done()]
+            for futuro in finiti:
+                i = futuri.pop(futuro)
+                try:
+                    pagina, secondi = futuro.result()
+                except Exception as e:
+                    # Le pagine rimaste vengono disegnate qui, in sequenza
+                    print(f"{Fore.YELLOW}⚠️ Errore nei processi ({e}): pagine disegnate in sequenza{Style.RESET_ALL}")
+                    futuri.clear()
+                    return
+                pagine_tank[i] = pagina
+                self._avanza('Tank', specs[i]['titolo'].split(' - ')[0], secondi)
+
+        try:
+            testa = self._pagine_in_memoria(*[self._pagina_cronometrata(sezione, etichetta, pagina, dopo=ritira_pagine)
+                                              for sezione, etichetta, pagina in pagine_testa])
+
+            # Panoramica tank: poche pagine leggere, disegnate qui (o prese dalla cache)
+            panoramica = []
+            for spec in panoramica_specs:
+                chiave = chiave_pagina(('panoramica', spec['titolo'], spec['nota'],
+                                        [nome for _, nome, _ in spec['pannelli']], OVERVIEW_RIGHE, OVERVIEW_COLONNE),
+                                       *[df for _, _, df in spec['pannelli']])
+                pagina = cache.get(chiave) if cache is not None else None
+                if pagina is None:
+                    inizio = time.perf_counter()
+                    pagina = pagina_pdf(figura_panoramica_tank(**spec))
+                    self._avanza('Panoramica', spec['titolo'], time.perf_counter() - inizio)
+                    if cache is not None:
+                        cache.put(chiave, pagina)
+                else:
+                    self._avanza('Panoramica', spec['titolo'])
+                panoramica.append(pagina)
+                ritira_pagine()
+
+            coda = None
+            if self.sezioni['tank']:
+                serie = self.estrai_serie_tank()
+                chiave_rbt = chiave_pagina('RBT', *[serie[('RBT', n)] for n in self.RBT_TANKS if ('RBT', n) in serie])
+                coda = cache.get(chiave_rbt) if cache is not None else None
+                if coda is None:
+                    coda = self._pagine_in_memoria(self._pagina_cronometrata('RBT', 'Pagine RBT', self._pagine_grafici_rbt))
+                    if cache is not None:
+                        cache.put(chiave_rbt, coda)
+                else:
+                    self._avanza('RBT', 'Pagine RBT')
+
+            ritira_pagine(attendi=True)
+            for i in mancanti:
+                if pagine_tank[i] is None:
+                    pagina, secondi = pagina_tank_pdf_cronometrata(specs[i])
+                    pagine_tank[i] = pagina
+                    self._avanza('Tank', specs[i]['titolo'].split(' - ')[0], secondi)
+        finally:
+            if pool is not None:
+                # Annullamento/errore: le pagine non ancora iniziate non vengono disegnate
+                pool.shutdown(cancel_futures=True)
+
+        for i in mancanti:
+            if cache is not None:
+                cache.put(chiavi[i], pagine_tank[i])
+        if cache is not None and specs:
+            cache.evict()
+
+        writer = PdfWriter()
+        for frammento in [testa, *panoramica, *pagine_tank] + ([coda] if coda is not None else []):
+            writer.append(PdfReader(io.BytesIO(frammento)))
+
+        # Metadati PDF
+        writer.add_metadata({
+            '/Title': 'PRODUCED Report - Analisi Completa',
+            '/Author': 'Produced Calculator',
+            '/Subject': 'Analisi Produzione Giornaliera e Settimanale',
+            '/CreationDate': datetime.now().strftime("D:%Y%m%d%H%M%S"),
+        })
+        with open(output_path, 'wb') as f:
+            writer.write(f)
+
+    def _pagine_in_memoria(self, *pagine):
+        """Disegna le pagine indicate (metodi che ricevono pdf) in un PDF in memoria"""
+        buffer = io.BytesIO()
+        with PdfPages(buffer, metadata={'CreationDate': None}) as pdf:
+            for pagina in pagine:
+                pagina(pdf)
+        return buffer.getvalue()
+
     def _pagina_titolo(self, pdf):
         """Pagina titolo del report"""
         fig = plt.figure(figsize=(11, 8.5))
@@ -519,6 +1070,15 @@ Media Giornaliera: {self.df_results['Cisterne'].mean():.2f} hl
         ax.text(0.1, y_pos, stats_text, ha='left', va='top', fontsize=10,
                 family='monospace', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
 
+        # Giorni con ore Packed/Cisterne mancanti (copertura calcolata in aggregazione)
+        incomplete_lines = describe_incomplete_days(self.coverage, max_days=12)
+        if incomplete_lines:
+            coverage_text = (f"GIORNI INCOMPLETI: {int(self.coverage['Incompleto'].sum())}\n"
+                             f"(ore orarie mancanti)\n\n" + "\n".join(incomplete_lines))
+            ax.text(0.55, y_pos, coverage_text, ha='left', va='top', fontsize=9,
+                    family='monospace', color='darkred',
+                    bbox=dict(boxstyle='round', facecolor='mistyrose', alpha=0.6))
+
         # Aggiungi warning se presente
         if self.data_warning:
             warning_text = "⚠️ ATTENZIONE - DATI INCOMPLETI\n\n" + self.data_warning
@@ -606,126 +1166,26 @@ Media Giornaliera: {self.df_results['Cisterne'].mean():.2f} hl
         pdf.savefig(fig, bbox_inches='tight')
         plt.close(fig)
     
-    def _pagine_grafici_bbt(self, pdf):
-        """Genera pagine con grafici per ogni BBT"""
-        print(f"{Fore.CYAN}Generazione grafici BBT...{Style.RESET_ALL}")
-        
-        for tank_num in self.BBT_TANKS:
-            df_tank = self.estrai_dati_tank('BBT', tank_num)
-            
-            if len(df_tank) == 0 or df_tank['Level'].sum() == 0:
-                continue  # Salta se non ha dati
-            
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(11, 8.5))
-            fig.suptitle(f'BBT {tank_num} - Analisi Completa', fontsize=12, fontweight='bold')
-            
-            # Grafico 1: Level
-            bars1 = ax1.bar(df_tank['Data'], df_tank['Level'], color='steelblue', alpha=0.7, edgecolor='navy')
-            for i, (date, val) in enumerate(zip(df_tank['Data'], df_tank['Level'])):
-                if i % max(1, len(df_tank)//5) == 0:
-                    ax1.text(date, val, f'{val:.0f}', ha='center', va='bottom', fontsize=8)
-            ax1.set_ylabel('Level (L)', fontweight='bold')
-            ax1.set_title('Level nel Tempo', fontweight='bold')
-            ax1.grid(True, alpha=0.3, axis='y')
-            ax1.tick_params(axis='x', rotation=45)
-            
-            # Grafico 2: Plato
-            bars2 = ax2.bar(df_tank['Data'], df_tank['Plato'], color='orange', alpha=0.7, edgecolor='darkorange')
-            for i, (date, val) in enumerate(zip(df_tank['Data'], df_tank['Plato'])):
-                if i % max(1, len(df_tank)//5) == 0:
-                    ax2.text(date, val, f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-            ax2.set_ylabel('Plato (°)', fontweight='bold')
-            ax2.set_title('Plato nel Tempo', fontweight='bold')
-            ax2.grid(True, alpha=0.3, axis='y')
-            ax2.tick_params(axis='x', rotation=45)
-            
-            # Grafico 3: hl std
-            bars3 = ax3.bar(df_tank['Data'], df_tank['hl_std'], color='green', alpha=0.7, edgecolor='darkgreen')
-            for i, (date, val) in enumerate(zip(df_tank['Data'], df_tank['hl_std'])):
-                if i % max(1, len(df_tank)//5) == 0:
-                    ax3.text(date, val, f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-            ax3.set_ylabel('hl std', fontweight='bold')
-            ax3.set_title('hl Standard nel Tempo', fontweight='bold')
-            ax3.grid(True, alpha=0.3, axis='y')
-            ax3.tick_params(axis='x', rotation=45)
-            
-            # Grafico 4: Statistiche
-            ax4.axis('off')
-            stats_text = f"""
-BBT {tank_num} - STATISTICHE
-
-Level:
-  Media: {df_tank['Level'].mean():.2f} L
-  Min: {df_tank['Level'].min():.2f} L
-  Max: {df_tank['Level'].max():.2f} L
-
-Plato:
-  Media: {df_tank['Plato'].mean():.2f} °
-  Min: {df_tank['Plato'].min():.2f} °
-  Max: {df_tank['Plato'].max():.2f} °
+    def _pagine_tank_specs(self, solo=None):
+        """
+        Pagine BBT, FST e Truck nell'ordine del report, come descrizioni autonome
+        (titolo, dati, testo statistiche): disegnabili anche in un processo separato.
+        solo: insieme di tank ('BBT', 111) da includere (None = tutti)
+        """
+        specs = []
+        for tank_type, tanks, colore_box in (('BBT', self.BBT_TANKS, 'lightyellow'),
+                                             ('FST', self.FST_TANKS, 'lightcyan')):
+            print(f"{Fore.CYAN}Generazione grafici {tank_type}...{Style.RESET_ALL}")
+            for tank_num in tanks:
+                if solo is not None and (tank_type, tank_num) not in solo:
+                    continue
+                df_tank = self.estrai_dati_tank(tank_type, tank_num)
 
-hl Standard:
-  Totale: {df_tank['hl_std'].sum():.2f} hl
-  Media: {df_tank['hl_std'].mean():.2f} hl
-  Min: {df_tank['hl_std'].min():.2f} hl
-  Max: {df_tank['hl_std'].max():.2f} hl
+                if len(df_tank) == 0 or df_tank['Level'].sum() == 0:
+                    continue  # Salta se non ha dati
 
-Material: {int(df_tank['Material'].mode()[0]) if len(df_tank) > 0 else 'N/A'}
-"""
-            ax4.text(0.1, 0.9, stats_text, ha='left', va='top', fontsize=10,
-                    family='monospace', bbox=dict(boxstyle='round', facecolor='lightyellow', alpha=0.5))
-            
-            plt.tight_layout()
-            pdf.savefig(fig, bbox_inches='tight')
-            plt.close(fig)
-    
-    def _pagine_grafici_fst(self, pdf):
-        """Genera pagine con grafici per ogni FST"""
-        print(f"{Fore.CYAN}Generazione grafici FST...{Style.RESET_ALL}")
-        
-        for tank_num in self.FST_TANKS:
-            df_tank = self.estrai_dati_tank('FST', tank_num)
-            
-            if len(df_tank) == 0 or df_tank['Level'].sum() == 0:
-                continue  # Salta se non ha dati
-            
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(11, 8.5))
-            fig.suptitle(f'FST {tank_num} - Analisi Completa', fontsize=12, fontweight='bold')
-            
-            # Grafico 1: Level
-            bars1 = ax1.bar(df_tank['Data'], df_tank['Level'], color='steelblue', alpha=0.7, edgecolor='navy')
-            for i, (date, val) in enumerate(zip(df_tank['Data'], df_tank['Level'])):
-                if i % max(1, len(df_tank)//5) == 0:
-                    ax1.text(date, val, f'{val:.0f}', ha='center', va='bottom', fontsize=8)
-            ax1.set_ylabel('Level (L)', fontweight='bold')
-            ax1.set_title('Level nel Tempo', fontweight='bold')
-            ax1.grid(True, alpha=0.3, axis='y')
-            ax1.tick_params(axis='x', rotation=45)
-            
-            # Grafico 2: Plato
-            bars2 = ax2.bar(df_tank['Data'], df_tank['Plato'], color='orange', alpha=0.7, edgecolor='darkorange')
-            for i, (date, val) in enumerate(zip(df_tank['Data'], df_tank['Plato'])):
-                if i % max(1, len(df_tank)//5) == 0:
-                    ax2.text(date, val, f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-            ax2.set_ylabel('Plato (°)', fontweight='bold')
-            ax2.set_title('Plato nel Tempo', fontweight='bold')
-            ax2.grid(True, alpha=0.3, axis='y')
-            ax2.tick_params(axis='x', rotation=45)
-            
-            # Grafico 3: hl std
-            bars3 = ax3.bar(df_tank['Data'], df_tank['hl_std'], color='green', alpha=0.7, edgecolor='darkgreen')
-            for i, (date, val) in enumerate(zip(df_tank['Data'], df_tank['hl_std'])):
-                if i % max(1, len(df_tank)//5) == 0:
-                    ax3.text(date, val, f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-            ax3.set_ylabel('hl std', fontweight='bold')
-            ax3.set_title('hl Standard nel Tempo', fontweight='bold')
-            ax3.grid(True, alpha=0.3, axis='y')
-            ax3.tick_params(axis='x', rotation=45)
-            
-            # Grafico 4: Statistiche
-            ax4.axis('off')
-            stats_text = f"""
-FST {tank_num} - STATISTICHE
+                stats_text = f"""
+{tank_type} {tank_num} - STATISTICHE
 
 Level:
   Media: {df_tank['Level'].mean():.2f} L
@@ -745,58 +1205,23 @@ hl Standard:
 
 Material: {int(df_tank['Material'].mode()[0]) if len(df_tank) > 0 else 'N/A'}
 """
-            ax4.text(0.1, 0.9, stats_text, ha='left', va='top', fontsize=10,
-                    family='monospace', bbox=dict(boxstyle='round', facecolor='lightcyan', alpha=0.5))
-            
-            plt.tight_layout()
-            pdf.savefig(fig, bbox_inches='tight')
-            plt.close(fig)
+                specs.append({
+                    'titolo': f'{tank_type} {tank_num} - Analisi Completa',
+                    'df': df_tank,
+                    'titoli_assi': ('Level nel Tempo', 'Plato nel Tempo', 'hl Standard nel Tempo'),
+                    'stats_text': stats_text,
+                    'colore_box': colore_box,
+                })
 
-    def _pagine_grafici_truck(self, pdf):
-        """Genera pagina con grafici per i truck (cisterne)"""
         print(f"{Fore.CYAN}Generazione grafici Truck...{Style.RESET_ALL}")
-        
         for truck_num in [1, 2]:
+            if solo is not None and ('Truck', truck_num) not in solo:
+                continue
             df_truck = self.estrai_dati_truck(truck_num)
-            
+
             if len(df_truck) == 0 or df_truck['Level'].sum() == 0:
                 continue  # Salta se non ha dati
-            
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(11, 8.5))
-            fig.suptitle(f'TRUCK {truck_num} - Analisi Completa', fontsize=12, fontweight='bold')
-            
-            # Grafico 1: Level
-            bars1 = ax1.bar(df_truck['Data'], df_truck['Level'], color='steelblue', alpha=0.7, edgecolor='navy')
-            for i, (date, val) in enumerate(zip(df_truck['Data'], df_truck['Level'])):
-                if i % max(1, len(df_truck)//5) == 0:
-                    ax1.text(date, val, f'{val:.0f}', ha='center', va='bottom', fontsize=8)
-            ax1.set_ylabel('Level (L)', fontweight='bold')
-            ax1.set_title('Level Cisterna nel Tempo', fontweight='bold')
-            ax1.grid(True, alpha=0.3, axis='y')
-            ax1.tick_params(axis='x', rotation=45)
-            
-            # Grafico 2: Plato
-            bars2 = ax2.bar(df_truck['Data'], df_truck['Plato'], color='orange', alpha=0.7, edgecolor='darkorange')
-            for i, (date, val) in enumerate(zip(df_truck['Data'], df_truck['Plato'])):
-                if i % max(1, len(df_truck)//5) == 0:
-                    ax2.text(date, val, f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-            ax2.set_ylabel('Plato (°)', fontweight='bold')
-            ax2.set_title('Plato Medio Cisterna', fontweight='bold')
-            ax2.grid(True, alpha=0.3, axis='y')
-            ax2.tick_params(axis='x', rotation=45)
-            
-            # Grafico 3: hl std
-            bars3 = ax3.bar(df_truck['Data'], df_truck['hl_std'], color='green', alpha=0.7, edgecolor='darkgreen')
-            for i, (date, val) in enumerate(zip(df_truck['Data'], df_truck['hl_std'])):
-                if i % max(1, len(df_truck)//5) == 0:
-                    ax3.text(date, val, f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-            ax3.set_ylabel('hl std', fontweight='bold')
-            ax3.set_title('hl Standard Cisterna', fontweight='bold')
-            ax3.grid(True, alpha=0.3, axis='y')
-            ax3.tick_params(axis='x', rotation=45)
-            
-            # Grafico 4: Statistiche
-            ax4.axis('off')
+
             stats_text = f"""
 TRUCK {truck_num} - STATISTICHE
 
@@ -818,36 +1243,56 @@ hl Standard:
 
 Giorni con dati: {len(df_truck[df_truck['Level'] > 0])}
 """
-            ax4.text(0.1, 0.9, stats_text, ha='left', va='top', fontsize=10,
-                    family='monospace', bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5))
-            
-            plt.tight_layout()
-            pdf.savefig(fig, bbox_inches='tight')
-            plt.close(fig)
-    
+            specs.append({
+                'titolo': f'TRUCK {truck_num} - Analisi Completa',
+                'df': df_truck,
+                'titoli_assi': ('Level Cisterna nel Tempo', 'Plato Medio Cisterna', 'hl Standard Cisterna'),
+                'stats_text': stats_text,
+                'colore_box': 'lightgreen',
+            })
+
+        return specs
+
+    def _pagine_panoramica_specs(self):
+        """Pagine della panoramica tank: pannelli BBT, FST e Truck con dati, in gruppi da una pagina"""
+        print(f"{Fore.CYAN}Generazione panoramica tank...{Style.RESET_ALL}")
+        serie = self.estrai_serie_tank()
+        pannelli = []
+        senza_dati = []
+        for tipo, numeri in (('BBT', self.BBT_TANKS), ('FST', self.FST_TANKS), ('Truck', [1, 2])):
+            for num in numeri:
+                df = serie.get((tipo, num))
+                nome = f'{tipo.upper()} {num}'
+                if df is None or len(df) == 0 or df['Level'].sum() == 0:
+                    senza_dati.append(nome)
+                else:
+                    pannelli.append((tipo, nome, df))
+
+        per_pagina = OVERVIEW_RIGHE * OVERVIEW_COLONNE
+        pagine = max(1, -(-len(pannelli) // per_pagina))
+        nota = f"Senza dati: {', '.join(senza_dati)}" if senza_dati else None
+        return [{
+            'titolo': f'Panoramica Tank - hl Standard nel Tempo ({i + 1}/{pagine})',
+            'pannelli': pannelli[i * per_pagina:(i + 1) * per_pagina],
+            'nota': nota if i == pagine - 1 else None,
+        } for i in range(pagine)]
+
+    def _tank_in_dettaglio(self):
+        """Tank con pagina completa: tutti, oppure in panoramica solo anomali + richiesti (None = tutti)"""
+        if not self.panoramica:
+            return None
+        anomali = {tank for tank, df in self.estrai_serie_tank().items()
+                   if 'Level' in df.columns and anomalie_tank(df).any()}
+        return anomali | self.tank_dettaglio
+
     def _pagine_grafici_rbt(self, pdf):
         """Genera pagina con grafici per gli RBT"""
         print(f"{Fore.CYAN}Generazione grafici RBT...{Style.RESET_ALL}")
         
         # Una pagina con entrambi gli RBT
-        df_rbt251 = []
-        df_rbt252 = []
-        
-        for idx, row in self.df.iterrows():
-            data = pd.to_datetime(row['Time'])
-
-            # RBT 251
-            plato_251 = float(row['RBT 251 Average Plato'])
-            material_251 = row['RBT251 Material'] if 'RBT251 Material' in row.index else None
-            df_rbt251.append({'Data': data, 'Plato': plato_251, 'Material': material_251})
-
-            # RBT 252
-            plato_252 = float(row['RBT 252 Average Plato'])
-            material_252 = row['RBT252 Material'] if 'RBT252 Material' in row.index else None
-            df_rbt252.append({'Data': data, 'Plato': plato_252, 'Material': material_252})
-        
-        df_rbt251 = pd.DataFrame(df_rbt251)
-        df_rbt252 = pd.DataFrame(df_rbt252)
+        serie = self.estrai_serie_tank()
+        df_rbt251 = serie.get(('RBT', 251), pd.DataFrame(columns=['Data', 'Plato', 'Material']))
+        df_rbt252 = serie.get(('RBT', 252), pd.DataFrame(columns=['Data', 'Plato', 'Material']))
         
         if len(df_rbt251) == 0 and len(df_rbt252) == 0:
             return
@@ -925,60 +1370,282 @@ Material: {int(df_rbt252['Material'].mode()[0]) if len(df_rbt252) > 0 and pd.not
         pdf.savefig(fig, bbox_inches='tight')
         plt.close(fig)
 
-def main_pdf_report(csv_stock_path, csv_packed_path, csv_cisterne_path):
-    """Funzione principale per generare report PDF (Triple CSV Mode)"""
-    print("="*60)
-    print("PRODUCED CALCULATOR - Report PDF (Triple CSV)")
-    print("="*60)
-    report = ReportPDFProduced(csv_stock_path=csv_stock_path, csv_packed_path=csv_packed_path, csv_cisterne_path=csv_cisterne_path)
-    report.calcola_produced()
-    report.genera_pdf_report()
-    print(f"{Fore.GREEN}✓ Report PDF completato!{Style.RESET_ALL}\n")
-
-if __name__ == '__main__':
-    # Prova a trovare i file CSV
-    if not os.path.exists(CSV_STOCK_PATH):
-        # Cerca nella cartella corrente
-        for file in os.listdir('.'):
-            if 'stock' in file.lower() and file.endswith('.csv'):
-                CSV_STOCK_PATH = os.path.join('.', file)
-                break
-            elif file == 'produced.csv':
-                CSV_STOCK_PATH = os.path.join('.', file)
-                break
-
-    if not os.path.exists(CSV_PACKED_PATH):
-        # Cerca nella cartella corrente
-        for file in os.listdir('.'):
-            if 'packed' in file.lower() and file.endswith('.csv'):
-                CSV_PACKED_PATH = os.path.join('.', file)
+def _inizializza_worker_libri():
+    """Processi dei libri mensili: solo rendering su file, nessuna finestra"""
+    plt.switch_backend('Agg')
+
+
+def genera_libro_mese(lavoro):
+    """
+    Worker: report PDF di un mese dai risultati già calcolati (un processo per mese,
+    pagine tank in sequenza al suo interno). Restituisce il percorso scritto.
+    """
+    report = ReportPDFProduced(df=lavoro['df'], date_from=lavoro['date_from'], date_to=lavoro['date_to'],
+                               **lavoro['opzioni'])
+    report.usa_risultati(lavoro['results'], lavoro['coverage'])
+    report.genera_pdf_report(workers=1, output_path=lavoro['output_path'])
+    return lavoro['output_path']
+
+
+def figura_indice_libri(titolo, righe, grafico=None):
+    """Pagina indice dei libri mensili: grafico Produced per mese (solo prima pagina) + tabella"""
+    fig = Figure(figsize=(11, 8.5))
+    fig.suptitle(titolo, fontsize=14, fontweight='bold')
+    if grafico is not None:
+        ax_graf, ax_tab = fig.subplots(2, 1, gridspec_kw={'height_ratios': [1, 1.6]})
+        mesi, produced = grafico
+        ax_graf.bar(mesi, produced, color='steelblue', alpha=0.7, edgecolor='navy')
+        ax_graf.set_ylabel('Produced (hl)', fontweight='bold')
+        ax_graf.grid(True, alpha=0.3, axis='y')
+        ax_graf.tick_params(axis='x', rotation=45, labelsize=8)
+    else:
+        ax_tab = fig.subplots()
+    ax_tab.axis('off')
+
+    intestazione = (f"{'Mese':<8} {'Giorni':>6} {'Produced':>11} {'Media/g':>9} {'Packed':>11} "
+                    f"{'Cisterne':>9} {'Stock Iniz.':>11} {'Stock Fin.':>11} {'Incompl.':>8}  File")
+    ax_tab.text(0, 1, "\n".join([intestazione, '-' * len(intestazione)] + righe), ha='left', va='top',
+                fontsize=7.5, family='monospace', transform=ax_tab.transAxes)
+    fig.tight_layout()
+    return fig
+
+
+def genera_libri_mensili(df, results, coverage=None, cartella=None, workers=None, **opzioni):
+    """
+    Libri mensili: un report PDF per ogni mese dei risultati già calcolati, disegnati in
+    processi separati, più un PDF indice con il riepilogo di tutti i mesi.
+
+    Ogni mese riceve solo le sue righe (più il giorno prima, come nel report normale):
+    lo Stock Iniziale del primo giorno del mese è quello dei risultati, cioè lo Stock
+    Finale dell'ultimo giorno del mese precedente.
+
+    Args:
+        df: DataFrame unito (NaN già risolti) da cui estrarre le serie dei tank
+        results: risultati giornalieri (Data, Produced, Packed, Cisterne, Stock_*, Delta_Stock)
+        coverage: copertura oraria allineata a results (opzionale)
+        cartella: cartella dei PDF (default OUTPUT_DIR/report)
+        workers: processi (default PDF_WORKERS, 1 = tutto nel processo corrente)
+        **opzioni: sezioni, panoramica, tank_dettaglio come in ReportPDFProduced
+
+    Returns:
+        (lista dei PDF mensili, PDF indice)
+    """
+    cartella = cartella or os.path.join(OUTPUT_DIR, 'report')
+    os.makedirs(cartella, exist_ok=True)
+    workers = PDF_WORKERS if workers is None else workers
+
+    results = results.reset_index(drop=True)
+    date_results = build_date_index(results['Data'])
+    date_df = build_date_index(df['Time'])
+    mesi = pd.DatetimeIndex(date_results).to_period('M').unique()
+    if len(mesi) == 0:
+        raise ValueError("Nessun risultato da suddividere per mese")
+
+    lavori = []
+    righe_indice = []
+    produced_mesi = []
+    for mese in mesi:
+        date_from = mese.start_time
+        date_to = mese.end_time.normalize()
+        r_start, r_stop = date_range_positions(date_results, date_from, date_to)
+        d_start, d_stop = date_range_positions(date_df, date_from, date_to)
+        mese_results = results.iloc[r_start:r_stop].reset_index(drop=True)
+        mese_coverage = coverage.iloc[r_start:r_stop].reset_index(drop=True) if coverage is not None else None
+        output_path = os.path.join(cartella, f'report_produced_{mese.strftime("%Y-%m")}_PA.pdf')
+
+        lavori.append({
+            'df': df.iloc[max(d_start - 1, 0):d_stop].reset_index(drop=True),
+            'results': mese_results,
+            'coverage': mese_coverage,
+            'date_from': date_from,
+            'date_to': date_to,
+            'opzioni': opzioni,
+            'output_path': output_path,
+        })
+        incompleti = int(mese_coverage['Incompleto'].sum()) if mese_coverage is not None else 0
+        produced_mesi.append(float(mese_results['Produced'].sum()))
+        righe_indice.append(
+            f"{mese.strftime('%Y-%m'):<8} {len(mese_results):>6} {mese_results['Produced'].sum():>11.1f} "
+            f"{mese_results['Produced'].mean():>9.1f} {mese_results['Packed'].sum():>11.1f} "
+            f"{mese_results['Cisterne'].sum():>9.1f} {mese_results['Stock_Iniziale'].iloc[0]:>11.1f} "
+            f"{mese_results['Stock_Finale'].iloc[-1]:>11.1f} {incompleti:>8}  {os.path.basename(output_path)}")
+
+    print(f"{Fore.CYAN}Libri mensili: {len(lavori)} mesi in {min(workers, len(lavori))} processi...{Style.RESET_ALL}")
+    pdf_mesi = None
+    if workers > 1 and len(lavori) > 1:
+        try:
+            # spawn: stessi motivi delle pagine tank (chiamabile anche da un thread della GUI)
+            with ProcessPoolExecutor(max_workers=min(workers, len(lavori)),
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_inizializza_worker_libri) as pool:
+                pdf_mesi = list(pool.map(genera_libro_mese, lavori))
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠️ Processi non disponibili ({e}): mesi generati in sequenza{Style.RESET_ALL}")
+    if pdf_mesi is None:
+        pdf_mesi = [genera_libro_mese(lavoro) for lavoro in lavori]
+
+    # Indice: grafico + tabella nella prima pagina, poi pagine di sola tabella
+    primo, ultimo = mesi[0].strftime('%Y-%m'), mesi[-1].strftime('%Y-%m')
+    indice_path = os.path.join(cartella, f'indice_produced_{primo}_{ultimo}_PA.pdf')
+    per_pagina = [12] + [40] * len(righe_indice)
+    with PdfPages(indice_path, metadata={'Title': f'PRODUCED - Indice libri mensili {primo} → {ultimo}',
+                                         'Author': 'Produced Calculator'}) as pdf:
+        inizio = 0
+        for pagina, quante in enumerate(per_pagina):
+            if inizio >= len(righe_indice):
                 break
+            pdf.savefig(figura_indice_libri(
+                f'PRODUCED - Libri Mensili {primo} → {ultimo}',
+                righe_indice[inizio:inizio + quante],
+                grafico=([m.strftime('%Y-%m') for m in mesi], produced_mesi) if pagina == 0 else None))
+            inizio += quante
 
-    if not os.path.exists(CSV_CISTERNE_PATH):
-        # Cerca nella cartella corrente
-        for file in os.listdir('.'):
-            if 'cisterne' in file.lower() and file.endswith('.csv'):
-                CSV_CISTERNE_PATH = os.path.join('.', file)
-                break
+    print(f"{Fore.GREEN}✓ {len(pdf_mesi)} report mensili + indice: {indice_path}{Style.RESET_ALL}")
+    return pdf_mesi, indice_path
 
-    # Verifica esistenza tutti e 3 i CSV
-    if not os.path.exists(CSV_STOCK_PATH):
-        print(f"{Fore.RED}✗ CSV Stock non trovato: {CSV_STOCK_PATH}{Style.RESET_ALL}")
-        print("  Cerca nella cartella corrente file con 'stock' nel nome o 'produced.csv'")
-        sys.exit(1)
 
-    if not os.path.exists(CSV_PACKED_PATH):
-        print(f"{Fore.RED}✗ CSV Packed non trovato: {CSV_PACKED_PATH}{Style.RESET_ALL}")
-        print("  Cerca nella cartella corrente file con 'packed' nel nome")
-        sys.exit(1)
+def stampa_avanzamento(messaggio, passo, totale):
+    """Callback di avanzamento per la riga di comando: una riga per pagina"""
+    print(f"  [{passo}/{totale}] {messaggio.strip()}")
 
-    if not os.path.exists(CSV_CISTERNE_PATH):
-        print(f"{Fore.RED}✗ CSV Cisterne non trovato: {CSV_CISTERNE_PATH}{Style.RESET_ALL}")
-        print("  Cerca nella cartella corrente file con 'cisterne' nel nome")
-        sys.exit(1)
 
-    print(f"✓ CSV Stock:    {os.path.basename(CSV_STOCK_PATH)}")
-    print(f"✓ CSV Packed:   {os.path.basename(CSV_PACKED_PATH)}")
-    print(f"✓ CSV Cisterne: {os.path.basename(CSV_CISTERNE_PATH)}\n")
+def main_pdf_report(csv_stock_path, csv_packed_path, csv_cisterne_path, date_from=None, date_to=None, sezioni=None,
+                    panoramica=False, tank_dettaglio=None, nan_policy='ask', risultati_path=None, workers=None,
+                    output_path=None, mensile=False, cartella=None):
+    """
+    Funzione principale per generare report PDF (Triple CSV Mode).
+    Con risultati_path (artefatto di produced_batch.py) i CSV non vengono letti né ricalcolati.
+    Con mensile=True: un report per mese + indice in `cartella` (vedi genera_libri_mensili).
+    """
+    print("="*60)
+    print("PRODUCED CALCULATOR - Report PDF (Triple CSV)")
+    print("="*60)
+    print(f"Periodo: {describe_date_range(date_from, date_to)}")
+    opzioni = dict(date_from=date_from, date_to=date_to, sezioni=sezioni,
+                   panoramica=panoramica, tank_dettaglio=tank_dettaglio, progress=stampa_avanzamento)
+    if risultati_path:
+        artifact = load_results_artifact(risultati_path)
+        print(f"Risultati già calcolati: {risultati_path} ({artifact['created']}, "
+              f"periodo {describe_date_range(artifact['date_from'], artifact['date_to'])})")
+        report = ReportPDFProduced(df=artifact['df'], **opzioni)
+        report.usa_risultati(artifact['results'], artifact['coverage'])
+    else:
+        report = ReportPDFProduced(csv_stock_path=csv_stock_path, csv_packed_path=csv_packed_path,
+                                   csv_cisterne_path=csv_cisterne_path, nan_policy=nan_policy, **opzioni)
+        report.calcola_produced()
+    if mensile:
+        # Calcolo fatto una volta sola sull'intero periodo, poi suddiviso per mese
+        genera_libri_mensili(report.df, report.df_results, report.coverage, cartella=cartella, workers=workers,
+                             sezioni=sezioni, panoramica=panoramica, tank_dettaglio=tank_dettaglio)
+    else:
+        report.genera_pdf_report(workers=workers, output_path=output_path)
+    print(f"{Fore.GREEN}✓ Report PDF completato!{Style.RESET_ALL}\n")
 
-    main_pdf_report(CSV_STOCK_PATH, CSV_PACKED_PATH, CSV_CISTERNE_PATH)
\ No newline at end of file
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # eseguibile PyInstaller: processi per le pagine tank
+    parser = argparse.ArgumentParser(
+        description="Produced Calculator - report PDF (Triple CSV), anche senza GUI",
+        epilog="Job notturni: produced_batch.py calcola una volta e scrive produced_results_batch.pkl, "
+               "poi più report con --results (periodi/sezioni diversi) senza ricaricare i CSV.")
+    inputs = parser.add_argument_group("dati in ingresso (CSV grezzi oppure risultati già calcolati)")
+    inputs.add_argument('--stock', metavar='CSV', help="CSV Stock (default: ricerca automatica)")
+    inputs.add_argument('--packed', metavar='CSV', help="CSV Packed orario (default: ricerca automatica)")
+    inputs.add_argument('--cisterne', metavar='CSV', help="CSV Cisterne orario (default: ricerca automatica)")
+    inputs.add_argument('--results', metavar='PKL',
+                        help="artefatto di produced_batch.py (produced_results_batch.pkl): niente CSV né ricalcolo")
+    inputs.add_argument('--nan', dest='nan_policy', choices=NAN_POLICIES,
+                        default='ask' if sys.stdin.isatty() else 'fail',
+                        help="NaN non coperti dal journal: ask (chiede), zero, ffill, fail (errore), keep "
+                             "(default: ask da terminale, fail altrimenti)")
+    parser.add_argument('--from', dest='date_from', type=parse_date, default=None, metavar='DATA',
+                        help="primo giorno del report (gg/mm/aaaa oppure aaaa-mm-gg)")
+    parser.add_argument('--to', dest='date_to', type=parse_date, default=None, metavar='DATA',
+                        help="ultimo giorno del report, incluso (gg/mm/aaaa oppure aaaa-mm-gg)")
+    parser.add_argument('--no-charts', action='store_true', help="senza la pagina dei grafici principali")
+    parser.add_argument('--no-weekly', action='store_true', help="senza le analisi settimanali")
+    parser.add_argument('--no-tank', action='store_true', help="senza le pagine BBT/FST/truck/RBT (report di sintesi)")
+    parser.add_argument('--overview', action='store_true',
+                        help="panoramica tank (sparkline su 2-3 pagine), pagina completa solo per i tank anomali")
+    parser.add_argument('--tank', dest='tank_dettaglio', action='append', type=parse_tank, default=[], metavar='TANK',
+                        help="tank con pagina completa anche in panoramica (es. --tank 'BBT 111'), ripetibile")
+    parser.add_argument('--workers', type=int, default=None, metavar='N',
+                        help=f"processi per le pagine tank (default {PDF_WORKERS})")
+    parser.add_argument('--output', metavar='PDF',
+                        help="file PDF da scrivere (default report/report_produced_<data>_PA.pdf)")
+    parser.add_argument('--monthly', action='store_true',
+                        help="libri mensili: un report per mese (report_produced_AAAA-MM_PA.pdf) + PDF indice, "
+                             "mesi disegnati in parallelo")
+    parser.add_argument('--output-dir', metavar='CARTELLA',
+                        help="cartella dei libri mensili (default report/)")
+    args = parser.parse_args()
+    if args.monthly and args.output:
+        parser.error("con --monthly usa --output-dir (un file per mese)")
+
+    if args.results:
+        if args.stock or args.packed or args.cisterne:
+            parser.error("--results esclude --stock/--packed/--cisterne")
+        if not os.path.exists(args.results):
+            print(f"{Fore.RED}✗ Artefatto risultati non trovato: {args.results}{Style.RESET_ALL}")
+            sys.exit(1)
+    else:
+        CSV_STOCK_PATH = args.stock or CSV_STOCK_PATH
+        CSV_PACKED_PATH = args.packed or CSV_PACKED_PATH
+        CSV_CISTERNE_PATH = args.cisterne or CSV_CISTERNE_PATH
+
+        # Prova a trovare i file CSV
+        if not os.path.exists(CSV_STOCK_PATH) and not args.stock:
+            # Cerca nella cartella corrente
+            for file in os.listdir('.'):
+                if 'stock' in file.lower() and file.endswith('.csv'):
+                    CSV_STOCK_PATH = os.path.join('.', file)
+                    break
+                elif file == 'produced.csv':
+                    CSV_STOCK_PATH = os.path.join('.', file)
+                    break
+
+        if not os.path.exists(CSV_PACKED_PATH) and not args.packed:
+            # Cerca nella cartella corrente
+            for file in os.listdir('.'):
+                if 'packed' in file.lower() and file.endswith('.csv'):
+                    CSV_PACKED_PATH = os.path.join('.', file)
+                    break
+
+        if not os.path.exists(CSV_CISTERNE_PATH) and not args.cisterne:
+            # Cerca nella cartella corrente
+            for file in os.listdir('.'):
+                if 'cisterne' in file.lower() and file.endswith('.csv'):
+                    CSV_CISTERNE_PATH = os.path.join('.', file)
+                    break
+
+        # Verifica esistenza tutti e 3 i CSV
+        if not os.path.exists(CSV_STOCK_PATH):
+            print(f"{Fore.RED}✗ CSV Stock non trovato: {CSV_STOCK_PATH}{Style.RESET_ALL}")
+            print("  Cerca nella cartella corrente file con 'stock' nel nome o 'produced.csv'")
+            sys.exit(1)
+
+        if not os.path.exists(CSV_PACKED_PATH):
+            print(f"{Fore.RED}✗ CSV Packed non trovato: {CSV_PACKED_PATH}{Style.RESET_ALL}")
+            print("  Cerca nella cartella corrente file con 'packed' nel nome")
+            sys.exit(1)
+
+        if not os.path.exists(CSV_CISTERNE_PATH):
+            print(f"{Fore.RED}✗ CSV Cisterne non trovato: {CSV_CISTERNE_PATH}{Style.RESET_ALL}")
+            print("  Cerca nella cartella corrente file con 'cisterne' nel nome")
+            sys.exit(1)
+
+        print(f"✓ CSV Stock:    {os.path.basename(CSV_STOCK_PATH)}")
+        print(f"✓ CSV Packed:   {os.path.basename(CSV_PACKED_PATH)}")
+        print(f"✓ CSV Cisterne: {os.path.basename(CSV_CISTERNE_PATH)}\n")
+
+    try:
+        main_pdf_report(CSV_STOCK_PATH, CSV_PACKED_PATH, CSV_CISTERNE_PATH,
+                        date_from=args.date_from, date_to=args.date_to,
+                        sezioni={'grafici': not args.no_charts, 'settimanali': not args.no_weekly,
+                                 'tank': not args.no_tank},
+                        panoramica=args.overview, tank_dettaglio=args.tank_dettaglio,
+                        nan_policy=args.nan_policy, risultati_path=args.results,
+                        workers=args.workers, output_path=args.output,
+                        mensile=args.monthly, cartella=args.output_dir)
+    except Exception as e:
+        print(f"\n{Fore.RED}✗ Errore: {e}{Style.RESET_ALL}")
+        sys.exit(1)